@@ -123,3 +123,59 @@ USE_TZ = True
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
+
+
+# Cache of computation results, shared by all worker processes
+# Repeated submissions of the same framework are answered from it
+
+ABAP_RESULT_CACHE_DIR = os.path.join(BASE_DIR, "result_cache")
+ABAP_RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Compiled frameworks with their attack graphs, memory-mapped read-only by all worker processes
+# Highlighted and compared extensions are drawn from them without a copy per process
+
+ABAP_SNAPSHOT_DIR = os.path.join(BASE_DIR, "snapshots")
+ABAP_SNAPSHOT_MAX_BYTES = 256 * 1024 * 1024
+
+# Store of the calculation results of each session, shared by all worker processes
+# Results expire after ABAP_SESSION_RESULTS_TTL seconds without access
+
+ABAP_SESSION_RESULTS_PATH = os.path.join(BASE_DIR, "session_results", "results.sqlite3")
+ABAP_SESSION_RESULTS_MAX_BYTES = 64 * 1024 * 1024
+ABAP_SESSION_RESULTS_TTL = 2 * 60 * 60
+
+# Background computation of frameworks
+# At most ABAP_JOBS_MAX_WORKERS frameworks are computed at the same time by all worker processes
+# Finished jobs are removed ABAP_JOBS_RETENTION seconds after their submission
+
+ABAP_JOBS_PATH = os.path.join(BASE_DIR, "jobs", "jobs.sqlite3")
+ABAP_JOBS_MAX_WORKERS = 2
+ABAP_JOBS_RETENTION = 24 * 60 * 60
+
+# The stream of the partial results of a job is closed after ABAP_EVENT_STREAM_DURATION seconds, so that it does not
+# hold a worker of a synchronous server for the whole job; the browser reconnects and continues where it stopped
+
+ABAP_EVENT_STREAM_DURATION = 30
+
+# If True, the time spent in each phase of a computation and the counters of the work done are recorded and shown
+# with its results
+
+ABAP_INSTRUMENTATION = False
+
+# If True, the memory allocated in each phase and the sites allocating the most memory are recorded as well
+# A computation is aborted once the memory it allocates exceeds ABAP_MEMORY_BUDGET bytes, unless it is None
+
+ABAP_MEMORY_PROFILING = False
+ABAP_MEMORY_BUDGET = None
+
+# Attack graphs with more than ABAP_GRAPH_CLUSTER_THRESHOLD nodes are shown summarised, with their nodes clustered
+# by ABAP_GRAPH_CLUSTERING: "scc" (strongly connected components) or "assumption" (first assumption of the premises)
+
+ABAP_GRAPH_CLUSTER_THRESHOLD = 300
+ABAP_GRAPH_CLUSTERING = "scc"
+
+# JSON batch API
+# A batch is cancelled after ABAP_BATCH_MAX_TIMEOUT seconds, or the timeout of the request if it is shorter
+
+ABAP_BATCH_MAX_FRAMEWORKS = 100
+ABAP_BATCH_MAX_TIMEOUT = 300
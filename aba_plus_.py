@@ -20,6 +20,8 @@ different components of such framework (assumptions, rules and preferences).
 import numpy as np
 import functools as ft
 
+from abap_stats import *
+
 LESS_THAN = 1
 LESS_EQUAL = 2
 NO_RELATION = 3
@@ -30,24 +32,33 @@ NORMAL_ATK = 1
 REVERSE_ATK = 2
 
 class ABA_Plus:
-    def __init__(self, assumptions, preferences, rules):
+    # Stats into which the phases and counters are recorded, NO_STATS unless instrumentation is enabled
+    stats = NO_STATS
+
+    def __init__(self, assumptions, preferences, rules, stats=None):
         """
         :param assumptions: set of Sentences
         :param preferences: set of Preferences
         :param rules: set of Rules
+        :param stats: Stats into which the computations on the framework are recorded, or None
         """
         self.assumptions = assumptions
         self.preferences = preferences
         self.rules = rules
+        if stats is not None:
+            self.stats = stats
 
-        if not self.is_flat():
-            raise NonFlatException("The framework is not flat!")
+        with self.stats.phase(VALIDATION_PHASE):
+            if not self.is_flat():
+                raise NonFlatException("The framework is not flat!")
 
-        if not self.preferences_only_between_assumptions():
-            raise InvalidPreferenceException("Non-assumption in preference detected!")
+            if not self.preferences_only_between_assumptions():
+                raise InvalidPreferenceException("Non-assumption in preference detected!")
 
-        if not self.calc_transitive_closure():
-            raise CyclicPreferenceException("Cycle in preferences detected!")
+        with self.stats.phase(CLOSURE_PHASE):
+            if not self.calc_transitive_closure():
+                raise CyclicPreferenceException("Cycle in preferences detected!")
+            self.stats.count(PREFERENCES_CLOSED, len(self.preferences))
 
     def __str__(self):
         return str(self.__dict__)
@@ -62,8 +73,14 @@ class ABA_Plus:
         auto_WCP = kwargs.get('auto_WCP', False)
 
         if auto_WCP:
-            return self.check_and_partially_satisfy_WCP()
-        elif not self.check_WCP():
+            with self.stats.phase(AUTO_WCP_PHASE):
+                rules_added = self.check_and_partially_satisfy_WCP()
+            self.stats.count(RULES_ADDED, len(rules_added))
+            return rules_added
+
+        with self.stats.phase(WCP_PHASE):
+            satisfied = self.check_WCP()
+        if not satisfied:
             raise WCPViolationException("Weak Contraposition is not satisfied!")
 
         return None
@@ -185,11 +202,13 @@ class ABA_Plus:
                     if rule.antecedent.issubset(deduced):
                         new_rule_used = True
                         if rule.consequent == to_deduce:
+                            self.stats.count(RULES_FIRED, len(rules_applied) + 1)
                             return True
                         else:
                             deduced.add(rule.consequent)
                         rules_applied.add(rule)
 
+        self.stats.count(RULES_FIRED, len(rules_applied))
         return False
 
     def generate_all_deductions(self, deduce_from):
@@ -209,6 +228,7 @@ class ABA_Plus:
                         deduced.add(rule.consequent)
                         rules_applied.add(rule)
 
+        self.stats.count(RULES_FIRED, len(rules_applied))
         return deduced
 
     def set_combinations(self, iterable):
@@ -217,7 +237,9 @@ class ABA_Plus:
         example:
         set_combinations({{b}},{{e},{f}}) returns {{b,e},{b,f}}
         """
-        return self._set_combinations(iter(iterable))
+        combinations = self._set_combinations(iter(iterable))
+        self.stats.count(SET_COMBINATIONS, len(combinations))
+        return combinations
 
     def _set_combinations(self, iter):
         current_set = next(iter, None)
@@ -225,6 +247,8 @@ class ABA_Plus:
             sets_to_combine_with = self._set_combinations(iter)
             resulting_combinations = set()
             for c in current_set:
+                # the combinations may grow exponentially
+                self.stats.check_memory()
                 if not sets_to_combine_with:
                     resulting_combinations.add(frozenset(c))
                 for s in sets_to_combine_with:
@@ -339,7 +363,9 @@ class ABA_Plus:
         :param generate_for: a Sentence
         :return: set of sets of assumptions, where each set contains assumptions deducing generate_for
         """
-        return self._generate_arguments(generate_for, set())
+        arguments = self._generate_arguments(generate_for, set())
+        self.stats.count(SUPPORT_SETS, len(arguments))
+        return arguments
 
     def _generate_arguments(self, generate_for, rules_seen):
         if generate_for in self.assumptions:
@@ -377,6 +403,13 @@ class ABA_Plus:
                  attacks: set of all attacks generated
                  all_deductions: set of all Deductions generated
         """
+        with self.stats.phase(ARGUMENTS_PHASE):
+            res = self._generate_arguments_and_attacks(generate_for)
+        self.stats.count(DEDUCTIONS, len(res[2]))
+        self.stats.count(ATTACKS, len(res[1]))
+        return res
+
+    def _generate_arguments_and_attacks(self, generate_for):
         deductions = {}
         attacks = set()
         # maps attackees to attackers in normal attacks
@@ -423,6 +456,7 @@ class ABA_Plus:
         for n_attackee, n_attacker_sets in atk_map.items():
             attackees = [ded for ded in all_deductions if n_attackee in ded.premise]
             for n_attacker in n_attacker_sets:
+                self.stats.check_memory()
                 attackers = [ded for ded in all_deductions if n_attacker.issubset(ded.premise)]
                 for attackee in attackees:
                     for attacker in attackers:
@@ -431,6 +465,7 @@ class ABA_Plus:
         for r_attackee, r_attacker_sets in reverse_atk_map.items():
             attackees = [ded for ded in all_deductions if r_attackee.issubset(ded.premise)]
             for r_attacker in r_attacker_sets:
+                self.stats.check_memory()
                 attackers = [ded for ded in all_deductions if r_attacker in ded.premise]
                 for attackee in attackees:
                     for attacker in attackers:
@@ -3,6 +3,7 @@ __email__ = "zb714@ic.ac.uk"
 __copyright__ = "Copyright (c) 2016 Ziyi Bao"
 
 from abap_parser import *
+from job_queue import JobFailedException, JobNotFinishedException
 from django.shortcuts import render
 
 class ExceptionMiddleware(object):
@@ -12,7 +13,11 @@ class ExceptionMiddleware(object):
            isinstance(exception, InvalidPreferenceException) or \
            isinstance(exception, DuplicateSymbolException) or \
            isinstance(exception, InvalidContraryDeclarationException) or \
-           isinstance(exception, InvalidPreferenceDeclarationException):
+           isinstance(exception, InvalidPreferenceDeclarationException) or \
+           isinstance(exception, InvalidDeclarationException) or \
+           isinstance(exception, JobFailedException) or \
+           isinstance(exception, JobNotFinishedException) or \
+           isinstance(exception, MemoryBudgetExceededException):
             return render(request, template_name='../templates/aba_plus_django/error_page.html',
                           context={'msg':exception.message})
         elif isinstance(exception, WCPViolationException):
@@ -0,0 +1,307 @@
+var width = 700,
+height = 600;
+
+var color = d3.scale.category20();
+
+var radius = d3.scale.sqrt()
+    .range([0, 6]);
+
+attack_type_names = {1: "dashed arrow: normal attack", 2: "dotted arrow: reverse attack", 3: "solid arrow: both normal and reverse attacks"}
+
+var gray_normal = d3.rgb(170,170,170);
+var gray_reverse = d3.rgb(190,190,190);
+var gray_both = d3.rgb(150,150,150);
+
+var gray = d3.rgb(100,100,100);
+var green = d3.rgb(102, 255, 153)
+var red = d3.rgb(255, 102, 102);
+
+var groupColor = function(group) {
+    switch (group) {
+        case 1:
+            return gray;
+        case 2:
+            return red;
+        case 3:
+            return green;
+    }
+};
+
+// set the groups of the nodes from a base64 bitmap with a bit set for each node within the highlighted extension,
+// no node is highlighted without a bitmap
+var applyMembership = function(graph, membership) {
+    var bits = membership ? atob(membership) : null;
+    graph.nodes.forEach(function(node, i) {
+        if (bits === null) {
+            node.group = 1;
+        } else {
+            node.group = (bits.charCodeAt(i >> 3) >> (i & 7)) & 1 ? 3 : 2;
+        }
+    });
+};
+
+// redraw the nodes of a graph drawn in svg after their groups have changed
+var recolorNodes = function(svg) {
+    svg.selectAll(".node circle").attr("fill", function(d) { return groupColor(d.group); });
+};
+
+
+// onExpand is called with the node of a collapsed cluster that is double-clicked, if it is given
+var drawGraph = function(graph, svg, force, onExpand) {
+  var node_drag = d3.behavior.drag()
+        .on("dragstart", dragstart)
+        .on("drag", dragmove)
+        .on("dragend", dragend);
+
+    function dragstart(d, i) {
+        force.stop() // stops the force auto positioning before you start dragging
+    }
+
+    function dragmove(d, i) {
+        d.px += d3.event.dx;
+        d.py += d3.event.dy;
+        d.x += d3.event.dx;
+        d.y += d3.event.dy;
+        tick(); // this is the key to make it work together with updating both px,py,x,y on d !
+    }
+
+    function dragend(d, i) {
+        d.fixed = true; // of course set the node to fixed so the force doesn't include the node in its auto positioning stuff
+        tick();
+        force.resume();
+    }
+
+  force
+      .nodes(graph.nodes)
+      .links(graph.links)
+      .on("tick", tick)
+      .start();
+
+      // build the arrow for normal links
+svg.append("svg:defs").selectAll("marker")
+    .data(["end_normal"])      // Different link/path types can be defined here
+  .enter().append("svg:marker")    // This section adds in the arrows
+    .attr("id", String)
+    .attr("viewBox", "0 -5 10 10")
+    .attr("refX", 20)
+    .attr("refY", -0.5)
+    .attr("markerWidth", 5.5)
+    .attr("markerHeight", 5.5)
+    .attr("orient", "auto")
+        .style("fill", gray_normal)
+  .append("svg:path")
+    .attr("d", "M0,-5L10,0L0,5");
+
+svg.append("svg:defs").selectAll("marker")
+    .data(["end_reverse"])      // Different link/path types can be defined here
+  .enter().append("svg:marker")    // This section adds in the arrows
+    .attr("id", String)
+    .attr("viewBox", "0 -5 10 10")
+    .attr("refX", 20)
+    .attr("refY", -0.5)
+    .attr("markerWidth", 5.5)
+    .attr("markerHeight", 5.5)
+    .attr("orient", "auto")
+        .style("fill", gray_reverse)
+  .append("svg:path")
+    .attr("d", "M0,-5L10,0L0,5");
+
+svg.append("svg:defs").selectAll("marker")
+    .data(["end_both"])      // Different link/path types can be defined here
+  .enter().append("svg:marker")    // This section adds in the arrows
+    .attr("id", String)
+    .attr("viewBox", "0 -5 10 10")
+    .attr("refX", 20)
+    .attr("refY", -0.5)
+    .attr("markerWidth", 5.5)
+    .attr("markerHeight", 5.5)
+    .attr("orient", "auto")
+        .style("fill", gray_both)
+  .append("svg:path")
+    .attr("d", "M0,-5L10,0L0,5");
+
+    //build the arrow for self links
+svg.append("svg:defs").selectAll("marker")
+    .data(["end2_normal"])      // Different link/path types can be defined here
+  .enter().append("svg:marker")    // This section adds in the arrows
+    .attr("id", String)
+    .attr("viewBox", "0 -5 10 10")
+    .attr("refX", -24)
+    .attr("refY", -45)
+    .attr("markerWidth", 5.5)
+    .attr("markerHeight", 5.5)
+    .attr("orient", 260)
+        .style("fill", gray_normal)
+  .append("svg:path")
+    .attr("d", "M0,-5L10,0L0,5");
+
+svg.append("svg:defs").selectAll("marker")
+    .data(["end2_reverse"])      // Different link/path types can be defined here
+  .enter().append("svg:marker")    // This section adds in the arrows
+    .attr("id", String)
+    .attr("viewBox", "0 -5 10 10")
+    .attr("refX", -24)
+    .attr("refY", -45)
+    .attr("markerWidth", 5.5)
+    .attr("markerHeight", 5.5)
+    .attr("orient", 260)
+        .style("fill", gray_reverse)
+  .append("svg:path")
+    .attr("d", "M0,-5L10,0L0,5");
+
+svg.append("svg:defs").selectAll("marker")
+    .data(["end2_both"])      // Different link/path types can be defined here
+  .enter().append("svg:marker")    // This section adds in the arrows
+    .attr("id", String)
+    .attr("viewBox", "0 -5 10 10")
+    .attr("refX", -24)
+    .attr("refY", -45)
+    .attr("markerWidth", 5.5)
+    .attr("markerHeight", 5.5)
+    .attr("orient", 260)
+        .style("fill", gray_both)
+  .append("svg:path")
+    .attr("d", "M0,-5L10,0L0,5");
+
+  var link = svg.selectAll(".link")
+      .data(graph.links)
+    .enter().append("path")
+    .attr("data-legend",function(d) { return attack_type_names[d.value]})
+      .attr("class","link")
+          .attr("stroke-dasharray", function(d) {
+              switch (d.value) {
+                  case 1: //normal attack
+                      return "6,2";
+                  case 2: //reverse attack
+                      return "2,2";
+                  case 3: //both attacks
+                      return "1,0";
+              } })
+          .attr("marker-end", function(d) {
+              if ( d.source == d.target ){
+                  switch (d.value) {
+                  case 1: //normal attack
+                      return "url(#end2_normal)";
+                  case 2: //reverse attack
+                      return "url(#end2_reverse)";
+                  case 3: //both attacks
+                      return "url(#end2_both)";
+              }
+              } else {
+                  switch (d.value) {
+                  case 1: //normal attack
+                      return "url(#end_normal)";
+                  case 2: //reverse attack
+                      return "url(#end_reverse)";
+                  case 3: //both attacks
+                      return "url(#end_both)";
+
+              }}})
+          .style("stroke", function(d) {
+              switch (d.value) {
+                  case 1: //normal attack
+                      return gray_normal;
+                  case 2: //reverse attack
+                      return gray_reverse;
+                  case 3: //both attacks
+                      return gray_both;
+              }
+
+          })
+    .style("stroke-width", 2);
+
+    legend = svg.append("g")
+    .attr("class","legend")
+    .attr("transform","translate(50,30)")
+    .style("font-size","15px")
+    .attr("data-style-padding",10)
+    .call(d3.legend);
+
+
+  var node = svg.selectAll(".node")
+      .data(graph.nodes)
+    .enter().append("g")
+      .attr("class", "node")
+      .call(node_drag)
+      .on("dblclick", function(d) {
+          if (onExpand && d.cluster !== undefined) {
+              onExpand(d);
+          }
+      });
+
+  node.append("circle")
+      .attr("r", function(d) { return d.size ? 12 + 2 * Math.sqrt(d.size) : 12; })
+      .attr("fill", function(d) { return groupColor(d.group); });
+
+  node.append("text")
+      .attr("dx", 12)
+      .attr("dy", ".35em")
+      .text(function(d) { return d.name });
+
+    function tick() {
+      node.attr("cx", function(d) { return d.x = Math.max(8, Math.min(width - 8, d.x)); })
+      .attr("cy", function(d) { return d.y = Math.max(8, Math.min(height - 8, d.y)); });
+
+    link.attr("d", function(d) {
+      var x1 = d.source.x,
+          y1 = d.source.y,
+          x2 = d.target.x,
+          y2 = d.target.y,
+          dx = x2 - x1,
+          dy = y2 - y1,
+          dr = Math.sqrt(dx * dx + dy * dy),
+
+          // Defaults for normal edge.
+          drx = dr,
+          dry = dr,
+          xRotation = 0, // degrees
+          largeArc = 0, // 1 or 0
+          sweep = 1; // 1 or 0
+
+          // Self edge.
+          if ( x1 === x2 && y1 === y2 ) {
+            // Fiddle with this angle to get loop oriented.
+            xRotation = -45;
+
+            // Needs to be 1.
+            largeArc = 1;
+
+            // Change sweep to change orientation of loop.
+            //sweep = 0;
+
+            // Make drx and dry different to get an ellipse
+            // instead of a circle.
+            drx = 30;
+            dry = 20;
+
+            // For whatever reason the arc collapses to a point if the beginning
+            // and ending points of the arc are the same, so kludge it.
+            x2 = x2 + 1;
+            y2 = y2 + 1;
+          }
+
+     return "M" + x1 + "," + y1 + "A" + drx + "," + dry + " " + xRotation + "," + largeArc + "," + sweep + " " + x2 + "," + y2;
+    });
+
+    node.attr("transform", function(d) { return "translate(" + d.x + "," + d.y + ")"; });
+  }
+};
+
+// draw a summarised graph whose collapsed clusters are expanded by fetching the graph again from url
+var drawClusteredGraph = function(graph, svg, force, url) {
+    var expanded = [];
+
+    var expand = function(d) {
+        expanded.push(d.cluster);
+        d3.json(url + "&expand=" + expanded.join("&expand="), function(error, expandedGraph) {
+            if (error) {
+                return;
+            }
+            force.stop();
+            svg.selectAll("*").remove();
+            drawGraph(expandedGraph, svg, force, expand);
+        });
+    };
+
+    drawGraph(graph, svg, force, expand);
+};
@@ -20,4 +20,13 @@ app_name = 'aba_plus_django'
 urlpatterns = [
     url(r'^$', views.IndexView.as_view(), name='index'),
     url(r'^results$', views.ResultsView.as_view(), name='results'),
+    url(r'^results/graph$', views.GraphView.as_view(), name='graph'),
+    url(r'^results/graph\.ndjson$', views.GraphStreamView.as_view(), name='graph_stream'),
+    url(r'^results/attacks$', views.AttacksView.as_view(), name='attacks'),
+    url(r'^results/extensions$', views.ExtensionsView.as_view(), name='extensions'),
+    url(r'^results/extensions/(?P<index>[0-9]+)/membership$', views.MembershipView.as_view(), name='membership'),
+    url(r'^api/batch$', views.BatchView.as_view(), name='batch'),
+    url(r'^jobs/(?P<job_id>[0-9a-f]+)$', views.JobStatusView.as_view(), name='job_status'),
+    url(r'^jobs/(?P<job_id>[0-9a-f]+)/events$', views.JobEventsView.as_view(), name='job_events'),
+    url(r'^jobs/(?P<job_id>[0-9a-f]+)/cancel$', views.CancelJobView.as_view(), name='cancel_job'),
 ]
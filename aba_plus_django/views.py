@@ -13,14 +13,27 @@ See the License for the specific language governing permissions and
 limitations under the License."""
 
 from django.views import generic
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.core.urlresolvers import reverse
+from django.conf import settings
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+import base64
 import json
+import time
 
 from abap_parser import *
 from aspartix_interface import *
+from abap_pipeline import *
+from result_cache import ResultCache
+from session_store import SessionResultStore
+from snapshot_store import SnapshotStore
+from abap_clusters import *
+from abap_ndjson import *
+from abap_listing import *
+from job_queue import *
+from abap_batch import *
 
-SOLVER_INPUT = "input_for_solver.lp"
 TURNSTILE = "&#x22a2;"
 R_ARROW = "&rarr;"
 L_ARROW = "&larr;"
@@ -39,12 +52,33 @@ extension_type_names = {STABLE: "stable", GROUNDED: "grounded",
 
 attack_type_names = {NORMAL_ATK: "normal attack", REVERSE_ATK: "reverse attack", BOTH_ATTACKS: "both attacks"}
 
+# maps the values of the parameters filtering listings by type to the types
+attack_type_params = {"normal": NORMAL_ATK, "reverse": REVERSE_ATK}
+extension_type_params = dict((name, extension_type) for extension_type, name in extension_type_names.items())
+
 NOT_HIGHLIGHTED1 = 1
 NOT_HIGHLIGHTED2 = 2
 HIGHLIGHTED = 3
 
 #maps session keys to calculation results
-results = {}
+results = SessionResultStore(settings.ABAP_SESSION_RESULTS_PATH, settings.ABAP_SESSION_RESULTS_MAX_BYTES,
+                             settings.ABAP_SESSION_RESULTS_TTL)
+
+result_cache = ResultCache(settings.ABAP_RESULT_CACHE_DIR, settings.ABAP_RESULT_CACHE_MAX_BYTES)
+
+#compiled frameworks and attack graphs, memory-mapped by all worker processes
+snapshots = SnapshotStore(settings.ABAP_SNAPSHOT_DIR, settings.ABAP_SNAPSHOT_MAX_BYTES)
+
+def snapshot_node_label(premise):
+    """
+    :return: label of the node of premise in the graph of a snapshot, see set_to_str()
+    """
+    return set_to_str(premise)
+
+#computes frameworks in background processes, which store their snapshots
+jobs = JobQueue(settings.ABAP_JOBS_PATH, result_cache, settings.ABAP_JOBS_MAX_WORKERS, settings.ABAP_JOBS_RETENTION,
+               settings.ABAP_INSTRUMENTATION, settings.ABAP_MEMORY_PROFILING, settings.ABAP_MEMORY_BUDGET, snapshots,
+               snapshot_node_label)
 
 class IndexView(generic.ListView):
     template_name = 'aba_plus_django/index.html'
@@ -65,6 +99,7 @@ class IndexView(generic.ListView):
 
         request.session['auto_WCP'] = False
         request.session['to_compute'] = True
+        request.session['job_id'] = None
 
         return HttpResponseRedirect(reverse('aba_plus_django:results'))
 
@@ -75,43 +110,48 @@ class ResultsView(generic.ListView):
     def get_queryset(self):
         return self.request.session['input'].replace("\r", "<br/>")
 
+    def get_template_names(self):
+        if self.job_pending:
+            return ['aba_plus_django/computing.html']
+        return [self.template_name]
+
     def get_context_data(self, **kwargs):
         context = super(generic.ListView, self).get_context_data(**kwargs)
+        self.job_pending = False
 
         if self.request.session['to_compute']:
 
-            rules_added = None
-            res = generate_aba_plus_framework(self.request.session['input'])
-            abap = res[0]
-            #reverse dictionary to map sentences to contraries
-            contr_map = dict((v, k) for k, v in res[1].items())
-            if self.request.session['auto_WCP']:
-                rules_added = rules_to_str(abap.check_or_auto_WCP(auto_WCP = True), contr_map)
-                context['rules_added'] = rules_added
-            else:
-                abap.check_or_auto_WCP()
-
-            res = abap.generate_arguments_and_attacks_for_contraries()
-            attacks = res[1]
-            deductions = res[2]
+            job_id = self.request.session.get('job_id')
+            if job_id is None:
+                job_id = jobs.submit(self.request.session['input'], self.request.session['auto_WCP'])
+                self.request.session['job_id'] = job_id
 
-            set_attacks = convert_to_attacks_between_sets(res[1])
-            context['attacks'] = [set_atk_to_str(atk) for atk in set_attacks]
+            state = jobs.state(job_id)
+            if state in (QUEUED, RUNNING):
+                # the page polls the job status and reloads once the job has finished
+                self.job_pending = True
+                context['job_id'] = job_id
+                return context
 
-            asp = ASPARTIX_Interface(abap)
-            asp.generate_input_file_for_clingo(SOLVER_INPUT)
+            # a new job is submitted when the results page is requested again
+            self.request.session['job_id'] = None
 
-            stable_ext = asp.calculate_stable_arguments_extensions(SOLVER_INPUT)
-            grounded_ext = asp.calculate_grounded_arguments_extensions(SOLVER_INPUT)
-            complete_ext = asp.calculate_complete_arguments_extensions(SOLVER_INPUT)
-            preferred_ext = asp.calculate_preferred_arguments_extensions(SOLVER_INPUT)
-            ideal_ext = asp.calculate_ideal_arguments_extensions(SOLVER_INPUT)
+            rules_added = None
+            computed = jobs.result(job_id)
+            stats = jobs.stats(job_id)
+            context['stats'] = stats_to_rows(stats)
+            contr_map = computed['contr_map']
+            if self.request.session['auto_WCP']:
+                rules_added = rules_to_str(computed['rules_added'], contr_map)
+                context['rules_added'] = rules_added
 
-            context['stable'] = arguments_extensions_to_str_list(stable_ext, contr_map)
-            context['grounded'] = arguments_extensions_to_str_list(grounded_ext, contr_map)
-            context['complete'] = arguments_extensions_to_str_list(complete_ext, contr_map)
-            context['preferred'] = arguments_extensions_to_str_list(preferred_ext, contr_map)
-            context['ideal'] = arguments_extensions_to_str_list(ideal_ext, contr_map)
+            # the attacks and extensions are listed by AttacksView and ExtensionsView as the page requests them
+            all_ext = computed['extensions']
+            stable_ext = all_ext[STABLE_SEMANTICS]
+            grounded_ext = all_ext[GROUNDED_SEMANTICS]
+            complete_ext = all_ext[COMPLETE_SEMANTICS]
+            preferred_ext = all_ext[PREFERRED_SEMANTICS]
+            ideal_ext = all_ext[IDEAL_SEMANTICS]
 
             # maps indices to extensions
             extension_map = {}
@@ -131,9 +171,15 @@ class ResultsView(generic.ListView):
             for ext, conclusions in ideal_ext.items():
                 extension_map[i] = (ext, conclusions, IDEAL)
                 i += 1
-            context['extensions'] = extension_map
 
-            context['json_input'] = generate_json(deductions, attacks, None)
+            snapshot_key = framework_key(self.request.session['input'], self.request.session['auto_WCP'])
+            snapshot = snapshots.get(snapshot_key)
+            if snapshot is None:
+                snapshots.put(snapshot_key, computed, set_to_str)
+                snapshot = snapshots.get(snapshot_key)
+            clustering = graph_clustering(snapshot)
+            context['json_input'], context['membership'] = snapshot_graph(snapshot, None, clustering)
+            context['graph_url'] = graph_url(clustering, None)
 
             context['input_text'] = self.request.session['input']
 
@@ -141,29 +187,21 @@ class ResultsView(generic.ListView):
             self.request.session['highlight_index'] = None
             self.request.session['compare_index'] = None
 
-            results[self.request.session.session_key] = {'abap': abap, 'deductions': deductions, 'attacks': attacks,
-                                                         'contr_map': contr_map, 'extension_map': extension_map,
-                                                         'stable_ext': stable_ext,
-                                                         'grounded_ext': grounded_ext, 'complete_ext': complete_ext,
-                                                         'ideal_ext': ideal_ext, 'preferred_ext': preferred_ext,
-                                                         'rules_added': rules_added}
+            # the deductions and attacks are only kept in the snapshot shared by all worker processes
+            results[self.request.session.session_key] = {'snapshot_key': snapshot_key, 'contr_map': contr_map,
+                                                         'extension_map': extension_map,
+                                                         'rules_added': rules_added, 'stats': stats}
 
         else:
             result = results[self.request.session.session_key]
 
             context['rules_added'] = result['rules_added']
-
-            set_attacks = convert_to_attacks_between_sets(result['attacks'])
-            context['attacks'] = [set_atk_to_str(atk) for atk in set_attacks]
+            context['stats'] = stats_to_rows(result.get('stats'))
+            snapshot = framework_snapshot(result['snapshot_key'], self.request.session['input'],
+                                          self.request.session['auto_WCP'])
 
             contr_map = result['contr_map']
 
-            context['stable'] = arguments_extensions_to_str_list(result['stable_ext'], contr_map)
-            context['grounded'] = arguments_extensions_to_str_list(result['grounded_ext'], contr_map)
-            context['complete'] = arguments_extensions_to_str_list(result['complete_ext'], contr_map)
-            context['preferred'] = arguments_extensions_to_str_list(result['preferred_ext'], contr_map)
-            context['ideal'] = arguments_extensions_to_str_list(result['ideal_ext'], contr_map)
-
             highlighted_ext = None
             if  self.request.session['highlight_index']:
                 extension_map = result['extension_map']
@@ -175,7 +213,9 @@ class ResultsView(generic.ListView):
                 extension_type = extension_map[to_highlight][2]
                 context['highlighted_extension_type'] = extension_type_names[extension_type]
 
-            context['json_input'] = generate_json(result['deductions'], result['attacks'], highlighted_ext)
+            clustering = graph_clustering(snapshot)
+            context['json_input'], context['membership'] = snapshot_graph(snapshot, highlighted_ext, clustering)
+            context['graph_url'] = graph_url(clustering, self.request.session['highlight_index'])
 
             if self.request.session['compare_index']:
                 extension_map = result['extension_map']
@@ -188,9 +228,12 @@ class ResultsView(generic.ListView):
                 context['compared_extension_type'] = extension_type_names[extension_type]
 
                 context['render_graph2'] = True
-                context['json_input2'] = generate_json(result['deductions'], result['attacks'], highlighted_ext2)
+                json_input2, context['membership2'] = snapshot_graph(snapshot, highlighted_ext2, clustering)
+                # the static graph is only sent once
+                if clustering is not None:
+                    context['json_input2'] = json_input2
+                context['graph_url2'] = graph_url(clustering, to_highlight)
 
-            context['extensions'] = result['extension_map']
             context['input_text'] = self.request.session['input']
 
         return context
@@ -201,6 +244,7 @@ class ResultsView(generic.ListView):
 
             request.session['to_compute'] = True
             request.session['auto_WCP'] = False
+            request.session['job_id'] = None
 
         elif "submit_file" in request.POST:
             file = request.FILES['myfile']
@@ -211,9 +255,11 @@ class ResultsView(generic.ListView):
 
             request.session['to_compute'] = True
             request.session['auto_WCP'] = False
+            request.session['job_id'] = None
 
         if 'auto_WCP' in self.request.POST:
             self.request.session['auto_WCP'] = True
+            self.request.session['job_id'] = None
 
         elif 'select_extension' in self.request.POST:
             selection = request.POST['select_extension']
@@ -225,6 +271,286 @@ class ResultsView(generic.ListView):
 
         return HttpResponseRedirect(reverse('aba_plus_django:results'))
 
+class AttacksView(generic.View):
+    """
+    JSON listing a page of the attacks of the graph of the framework of the session, with the parameters 'offset',
+    'limit', 'assumption' and 'type' (normal or reverse), see list_attacks()
+    """
+    def get(self, request):
+        result = results[request.session.session_key]
+        try:
+            offset, limit = parse_page(request.GET.get('offset'), request.GET.get('limit'))
+            attack_type = request.GET.get('type')
+            if attack_type:
+                attack_type = attack_type_params[attack_type]
+        except (ValueError, KeyError):
+            return JsonResponse({'error': "Invalid page or attack type!"}, status=400)
+
+        snapshot = framework_snapshot(result['snapshot_key'], request.session['input'], request.session['auto_WCP'])
+        total, attacks = list_attacks(snapshot, offset, limit, request.GET.get('assumption') or None,
+                                      attack_type or None)
+        labels = snapshot.node_labels()
+        return JsonResponse({'total': total, 'offset': offset,
+                             'attacks': [labels_atk_to_str(labels[attacker], labels[attackee], attack_type)
+                                         for attacker, attackee, attack_type in attacks]})
+
+class ExtensionsView(generic.View):
+    """
+    JSON listing a page of the extensions of the framework of the session, with the parameters 'offset', 'limit',
+    'assumption' and 'semantics' (stable, grounded, complete, preferred or ideal), see list_extensions()
+    each extension has the entries 'index', 'type', 'set' (the set of assumptions) and 'text' (with its conclusions)
+    """
+    def get(self, request):
+        result = results[request.session.session_key]
+        try:
+            offset, limit = parse_page(request.GET.get('offset'), request.GET.get('limit'))
+            extension_type = request.GET.get('semantics')
+            if extension_type:
+                extension_type = extension_type_params[extension_type]
+        except (ValueError, KeyError):
+            return JsonResponse({'error': "Invalid page or semantics!"}, status=400)
+
+        total, extensions = list_extensions(result['extension_map'], offset, limit, extension_type or None,
+                                            request.GET.get('assumption') or None)
+        return JsonResponse({'total': total, 'offset': offset,
+                             'extensions': [{'index': index, 'type': extension_type_names[ext_type],
+                                             'set': set_to_str(extension),
+                                             'text': argument_to_str(extension, conclusions, result['contr_map'])}
+                                            for index, extension, conclusions, ext_type in extensions]})
+
+class MembershipView(generic.View):
+    """
+    JSON highlighting the extension with the given index in the graph of the framework of the session, an object
+    with the entries 'membership' (see membership_bitmap()), 'extension' and 'type', see ResultsView
+    the session is not changed, the page keeps the highlighted extension itself
+    """
+    def get(self, request, index):
+        result = results[request.session.session_key]
+        extension_map = result['extension_map']
+        index = int(index)
+        if index not in extension_map:
+            return JsonResponse({'error': "Invalid extension!"}, status=400)
+
+        snapshot = framework_snapshot(result['snapshot_key'], request.session['input'], request.session['auto_WCP'])
+        extension, conclusions, extension_type = extension_map[index]
+        return JsonResponse({'membership': membership_bitmap(snapshot, extension),
+                             'extension': argument_to_str(extension, conclusions, result['contr_map']),
+                             'type': extension_type_names[extension_type]})
+
+class GraphStreamView(generic.View):
+    """
+    NDJSON of the nodes, links and attacks of the graph of the framework of the session, streamed in chunks,
+    see graph_records()
+    """
+    def get(self, request):
+        result = results[request.session.session_key]
+        # stores the snapshot again if it has been evicted
+        framework_snapshot(result['snapshot_key'], request.session['input'], request.session['auto_WCP'])
+        snapshot = snapshots.open(result['snapshot_key'])
+        if snapshot is None:
+            return JsonResponse({'error': "The graph is not available!"}, status=503)
+        response = StreamingHttpResponse(stream_graph(snapshot, labels_atk_to_str),
+                                         content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+class GraphView(generic.View):
+    """
+    JSON of the summarised graph of the framework of the session, with the clusters given by the parameters 'expand'
+    expanded and the extension with the index given by the parameter 'highlight' highlighted
+    """
+    def get(self, request):
+        result = results[request.session.session_key]
+        clustering = request.GET.get('clustering', settings.ABAP_GRAPH_CLUSTERING)
+        if clustering not in CLUSTERINGS:
+            return JsonResponse({'error': "The clustering must be one of {}!".format(", ".join(CLUSTERINGS))},
+                                status=400)
+        try:
+            expanded = [int(cluster) for cluster in request.GET.getlist('expand')]
+            highlight_index = request.GET.get('highlight')
+            highlighted_ext = None
+            if highlight_index:
+                highlighted_ext = result['extension_map'][int(highlight_index)][0]
+        except (ValueError, KeyError):
+            return JsonResponse({'error': "Invalid cluster or extension!"}, status=400)
+
+        snapshot = framework_snapshot(result['snapshot_key'], request.session['input'], request.session['auto_WCP'])
+        return HttpResponse(generate_snapshot_json(snapshot, highlighted_ext, clustering, expanded),
+                            content_type='application/json')
+
+class JobStatusView(generic.View):
+    def get(self, request, job_id):
+        return JsonResponse({'state': jobs.state(job_id)})
+
+class JobEventsView(generic.View):
+    def get(self, request, job_id):
+        # raises KeyError for unknown jobs before the response starts
+        jobs.state(job_id)
+        # a reconnecting browser sends the id of the last event it received
+        try:
+            last_event_id = max(int(request.META.get('HTTP_LAST_EVENT_ID', 0)), 0)
+        except ValueError:
+            last_event_id = 0
+        response = StreamingHttpResponse(job_events(job_id, last_event_id, settings.ABAP_EVENT_STREAM_DURATION),
+                                         content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+class CancelJobView(generic.View):
+    def post(self, request, job_id):
+        jobs.cancel(job_id)
+        if request.session.get('job_id') == job_id:
+            request.session['job_id'] = None
+            request.session['to_compute'] = False
+
+        return HttpResponseRedirect(reverse('aba_plus_django:index'))
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class BatchView(generic.View):
+    """
+    JSON API computing one or many frameworks, see parse_batch_request() for the request and
+    compute_batch() for the response
+    """
+    def post(self, request):
+        try:
+            batch_request = json.loads(request.body.decode("utf-8"))
+            frameworks, semantics, max_extensions, timeout = parse_batch_request(batch_request)
+        except ValueError:
+            return JsonResponse({'error': "The request is not valid JSON!"}, status=400)
+        except BatchRequestException as e:
+            return JsonResponse({'error': e.message}, status=400)
+
+        if len(frameworks) > settings.ABAP_BATCH_MAX_FRAMEWORKS:
+            return JsonResponse({'error': "At most {} frameworks can be computed in one request!".format(
+                settings.ABAP_BATCH_MAX_FRAMEWORKS)}, status=400)
+        if timeout is None or timeout > settings.ABAP_BATCH_MAX_TIMEOUT:
+            timeout = settings.ABAP_BATCH_MAX_TIMEOUT
+
+        batch_results = compute_batch(jobs, frameworks, semantics, max_extensions, timeout)
+        return JsonResponse({'results': batch_results})
+
+
+def job_events(job_id, last_event_id=0, max_duration=None):
+    """
+    generate server-sent events with the partial results of a job as soon as they are recorded:
+    an event FRAMEWORK_STAGE with the graph and the rules added to satisfy WCP, then an event for each semantics with
+    its formatted extensions and finally an event 'end' with the final state of the job
+    the stream ends after max_duration seconds even if the job has not finished, which holds a worker of the server
+    only that long: the browser then reconnects and sends the id of the last event it received as Last-Event-ID
+    :param last_event_id: sequence number of the last partial result already sent
+    :param max_duration: maximum number of seconds the events are generated for, no limit if None
+    """
+    start = time.time()
+    # reconnect at once when the stream ends before the job has finished
+    yield "retry: {}\n\n".format(int(POLL_INTERVAL * 1000))
+    contr_map = {}
+    seq = 0
+    while True:
+        # the state is read first, so that no partial result recorded before the job has finished is missed
+        state = jobs.state(job_id)
+        for seq, stage, partial_result in jobs.progress(job_id, seq):
+            if stage == FRAMEWORK_STAGE:
+                # the contraries are needed to format the extensions, even if the graph has already been sent
+                contr_map = partial_result['contr_map']
+            if stage == STATS_STAGE or seq <= last_event_id:
+                continue
+
+            if stage == FRAMEWORK_STAGE:
+                rules_added = None
+                if partial_result['rules_added'] is not None:
+                    rules_added = rules_to_str(partial_result['rules_added'], contr_map)
+                input_string, auto_WCP = jobs.input(job_id)
+                snapshot = framework_snapshot(partial_result['snapshot_key'], input_string, auto_WCP)
+                data = {'graph': snapshot_graph(snapshot, None, graph_clustering(snapshot))[0],
+                        'rules_added': rules_added}
+            else:
+                data = arguments_extensions_to_str_list(partial_result, contr_map)
+            yield "id: {}\nevent: {}\ndata: {}\n\n".format(seq, stage, json.dumps(data))
+
+        if state in FINISHED_STATES:
+            yield "event: end\ndata: {}\n\n".format(json.dumps(state))
+            return
+        if max_duration is not None and time.time() - start >= max_duration:
+            return
+        time.sleep(POLL_INTERVAL)
+
+
+def stats_to_rows(stats):
+    """
+    :param stats: dictionary returned by Stats.to_dict() or MemoryStats.to_dict(), or None
+    :return: tuple with three elements, None if stats is None:
+             1: list of tuples of each phase, its number of milliseconds and calls, the slowest phase first
+             2: list of tuples of each counter and its value, sorted by name
+             3: list of tuples of each phase, its peak and retained kilobytes and its top allocation sites,
+                the phase with the highest peak first, empty if the memory was not profiled
+    """
+    if stats is None:
+        return None
+    phases = [(phase, "{:.1f}".format(seconds * 1000), stats['calls'][phase])
+              for phase, seconds in sorted(stats['timers'].items(), key=lambda item: -item[1])]
+    memory = [(phase, "{:.1f}".format(usage['peak'] / 1024), "{:.1f}".format(usage['retained'] / 1024),
+               ", ".join("{} ({:.1f})".format(site, size / 1024) for site, size in usage['sites']))
+              for phase, usage in sorted(stats.get('memory', {}).items(), key=lambda item: -item[1]['peak'])]
+    return (phases, sorted(stats['counters'].items()), memory)
+
+
+def snapshot_graph(snapshot, highlighted_sentences, clustering):
+    """
+    :param clustering: one of CLUSTERINGS, or None to show all nodes
+    :return: tuple with two elements:
+             1: string containing the JSON of the graph of snapshot, the same for all highlighted_sentences unless
+                the graph is summarised by clustering, see generate_snapshot_json()
+             2: membership_bitmap() of highlighted_sentences, None if they are None or the graph is summarised
+    """
+    if clustering is not None:
+        return (generate_snapshot_json(snapshot, highlighted_sentences, clustering), None)
+    if highlighted_sentences is None:
+        return (snapshot.graph_json(), None)
+    return (snapshot.graph_json(), membership_bitmap(snapshot, highlighted_sentences))
+
+
+def membership_bitmap(snapshot, highlighted_sentences):
+    """
+    :return: base64 string of a bitmap with a bit for each node of the graph of snapshot, least significant bit
+             first, set if the node is within highlighted_sentences
+    """
+    return base64.b64encode(snapshot.membership_bitmap(highlighted_sentences)).decode("ascii")
+
+
+def graph_clustering(snapshot):
+    """
+    :return: settings.ABAP_GRAPH_CLUSTERING if the graph of snapshot has more than
+             settings.ABAP_GRAPH_CLUSTER_THRESHOLD nodes, None otherwise
+    """
+    if len(snapshot.node_labels()) > settings.ABAP_GRAPH_CLUSTER_THRESHOLD:
+        return settings.ABAP_GRAPH_CLUSTERING
+    return None
+
+
+def graph_url(clustering, highlight_index):
+    """
+    :return: URL of the GraphView from which the clusters of a summarised graph are expanded, None if the graph is
+             not summarised
+    """
+    if clustering is None:
+        return None
+    url = "{}?clustering={}".format(reverse('aba_plus_django:graph'), clustering)
+    if highlight_index:
+        url += "&highlight={}".format(highlight_index)
+    return url
+
+
+def framework_snapshot(snapshot_key, input_string, auto_WCP):
+    """
+    :return: CompiledFramework of the snapshot stored under snapshot_key, stored again if it has been evicted
+    """
+    snapshot = snapshots.get(snapshot_key)
+    if snapshot is None:
+        computed = compute_framework_cached(input_string, auto_WCP, result_cache, rename_invariant=True)
+        snapshots.put(snapshot_key, computed, set_to_str)
+        snapshot = snapshots.get(snapshot_key)
+    return snapshot
 
 
 def sets_to_str(sets, contr_map={}):
@@ -286,17 +612,25 @@ def set_atk_to_str(atk):
                 3: attacked set of Sentences
     :return: formatted string representation of atk
     """
+    return labels_atk_to_str(set_to_str(atk[0]), set_to_str(atk[1]), atk[2])
+
+def labels_atk_to_str(attacker, attackee, type):
+    """
+    :param attacker: formatted attacking set of Sentences
+    :param attackee: formatted attacked set of Sentences
+    :param type: attack type
+    :return: formatted string representation of the attack
+    """
     str = ""
 
-    type = atk[2]
     if type == NORMAL_ATK:
         str = "Normal Attack: "
     elif type == REVERSE_ATK:
         str = "Reverse Attack: "
 
-    str += set_to_str(atk[0])
+    str += attacker
     str += " {} ".format(R_ARROW)
-    str += set_to_str(atk[1])
+    str += attackee
 
     return str
 
@@ -366,10 +700,12 @@ def generate_json(deductions, attacks, highlighted_sentences):
     """
     output = {"nodes": list(), "links": list()}
 
-    support_sets = []
+    # maps premises to the indices of their nodes
+    support_sets = {}
     for ded in deductions:
-        if ded.premise not in support_sets:
-            support_sets.append(ded.premise)
+        premise = frozenset(ded.premise)
+        if premise not in support_sets:
+            support_sets[premise] = len(support_sets)
 
             if not(highlighted_sentences is None):
                 group = HIGHLIGHTED if frozenset(ded.premise).issubset(highlighted_sentences) else NOT_HIGHLIGHTED2
@@ -390,8 +726,8 @@ def generate_json(deductions, attacks, highlighted_sentences):
             attack_map[key] = BOTH_ATTACKS
 
     for k, v in attack_map.items():
-        idx_attacker = support_sets.index(k[0])
-        idx_attackee = support_sets.index(k[1])
+        idx_attacker = support_sets[k[0]]
+        idx_attackee = support_sets[k[1]]
 
         link = {"source": idx_attacker,
                 "target": idx_attackee,
@@ -400,4 +736,30 @@ def generate_json(deductions, attacks, highlighted_sentences):
 
     return json.dumps(output)
 
+def generate_snapshot_json(snapshot, highlighted_sentences, clustering=None, expanded=()):
+    """
+    like generate_json(), but read the nodes and links from the attack graph of a snapshot
+    :param snapshot: CompiledFramework including the graph, with the labels of the nodes formatted by set_to_str()
+    :param highlighted_sentences: collection of Sentences to be highlighted
+    :param clustering: one of CLUSTERINGS to summarise the graph with summarize_snapshot() into at most
+                       settings.ABAP_GRAPH_CLUSTER_THRESHOLD clusters, or None to show all nodes
+    :param expanded: collection of the indices of the clusters whose nodes are shown
+    :return: string containing the the json
+    """
+    if highlighted_sentences is None:
+        groups = [NOT_HIGHLIGHTED1] * len(snapshot.node_labels())
+    else:
+        groups = [HIGHLIGHTED if within else NOT_HIGHLIGHTED2
+                  for within in snapshot.nodes_within(highlighted_sentences).tolist()]
+
+    if clustering is not None:
+        return json.dumps(summarize_snapshot(snapshot, clustering, groups, expanded,
+                                             settings.ABAP_GRAPH_CLUSTER_THRESHOLD))
 
+    output = {"nodes": [{"name": name, "group": group} for name, group in zip(snapshot.node_labels(), groups)],
+              "links": [{"source": source, "target": target, "value": value}
+                        for source, target, value in zip(snapshot.link_sources.tolist(),
+                                                         snapshot.link_targets.tolist(),
+                                                         snapshot.link_types.tolist())]}
+
+    return json.dumps(output)
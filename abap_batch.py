@@ -0,0 +1,188 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+This module contains functions computing batches of ABA+ frameworks and converting the results to plain data
+that can be serialised as JSON.
+Sentences are represented by their symbols, contraries by the symbol declared for them, extensions by pairs of
+sorted symbol arrays (assumptions and conclusions) and attacks between sets of assumptions by triples of the
+attacking assumptions, the attacked assumptions and the attack type.
+The frameworks of a batch are computed in parallel by a JobQueue.
+"""
+
+import time
+
+from job_queue import *
+
+# symbol of a contrary that has no declared symbol
+CONTRARY_SYMBOL = "~{}"
+
+ALL_SEMANTICS = [STABLE_SEMANTICS, GROUNDED_SEMANTICS, COMPLETE_SEMANTICS, PREFERRED_SEMANTICS, IDEAL_SEMANTICS]
+
+
+def parse_batch_request(request):
+    """
+    :param request: dictionary with the following entries:
+                    'frameworks': list of dictionaries with the entries 'input' (string defining an ABA+
+                                  framework), optionally 'id' (any value, default the position in the list) and
+                                  'auto_WCP' (boolean, default False),
+                                  alternatively 'framework': a single string defining an ABA+ framework
+                    'semantics': list of semantics to calculate (optional, default all)
+                    'max_extensions': maximum number of extensions returned per semantics (optional, default all)
+                    'timeout': maximum number of seconds to compute the batch (optional, default no limit)
+    :return: tuple with four elements:
+             1: list of tuples of the id, input string and auto_WCP of each framework
+             2: list of semantics
+             3: maximum number of extensions or None
+             4: timeout or None
+    :raise BatchRequestException: if the request is malformed
+    """
+    if not isinstance(request, dict):
+        raise BatchRequestException("The request must be a JSON object!")
+
+    if 'framework' in request:
+        frameworks = [{'input': request['framework']}]
+    else:
+        frameworks = request.get('frameworks')
+    if not isinstance(frameworks, list):
+        raise BatchRequestException("The request must contain a list 'frameworks' or a string 'framework'!")
+
+    parsed_frameworks = []
+    for idx, framework in enumerate(frameworks):
+        if isinstance(framework, str):
+            framework = {'input': framework}
+        if not isinstance(framework, dict) or not isinstance(framework.get('input'), str):
+            raise BatchRequestException("Every framework must be a string or an object with a string 'input'!")
+        parsed_frameworks.append((framework.get('id', idx), framework['input'], bool(framework.get('auto_WCP'))))
+
+    semantics = request.get('semantics', ALL_SEMANTICS)
+    if not isinstance(semantics, list) or any(s not in ALL_SEMANTICS for s in semantics):
+        raise BatchRequestException("The semantics must be a list of {}!".format(", ".join(ALL_SEMANTICS)))
+
+    max_extensions = request.get('max_extensions')
+    # booleans are integers in Python, but not in JSON
+    if max_extensions is not None and (isinstance(max_extensions, bool) or not isinstance(max_extensions, int) or
+                                       max_extensions < 0):
+        raise BatchRequestException("'max_extensions' must be a non-negative integer!")
+
+    timeout = request.get('timeout')
+    if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+        raise BatchRequestException("'timeout' must be a positive number!")
+
+    return (parsed_frameworks, semantics, max_extensions, timeout)
+
+
+def compute_batch(queue, frameworks, semantics=ALL_SEMANTICS, max_extensions=None, timeout=None):
+    """
+    compute all frameworks in parallel, those not finished within timeout are cancelled
+    :param queue: JobQueue computing the frameworks
+    :param frameworks: list of tuples of the id, input string and auto_WCP of each framework
+    :param semantics: list of semantics whose extensions are calculated and returned
+    :param max_extensions: maximum number of extensions returned per semantics, None for all
+    :param timeout: maximum number of seconds to compute the batch, None for no limit
+    :return: list with a dictionary for each framework, see result_to_data() and error_to_data()
+    """
+    start = time.time()
+    job_ids = [queue.submit(input_string, auto_WCP, semantics) for _, input_string, auto_WCP in frameworks]
+
+    res = []
+    for (framework_id, _, _), job_id in zip(frameworks, job_ids):
+        remaining = None
+        if timeout is not None:
+            remaining = max(0, timeout - (time.time() - start))
+        state = queue.wait(job_id, remaining)
+
+        if state not in FINISHED_STATES:
+            queue.cancel(job_id)
+            res.append(error_to_data(framework_id, "Timeout", "The computation exceeded the timeout!"))
+            continue
+
+        try:
+            result = queue.result(job_id)
+        except Exception as e:
+            res.append(error_to_data(framework_id, e.__class__.__name__, getattr(e, 'message', str(e))))
+            continue
+        res.append(result_to_data(framework_id, result, semantics, max_extensions))
+
+    return res
+
+
+def result_to_data(framework_id, result, semantics=ALL_SEMANTICS, max_extensions=None):
+    """
+    :param result: result of compute_parsed_framework()
+    :return: dictionary with the following entries:
+             'id': framework_id
+             'state': DONE
+             'rules_added': list of [head, body] of the rules added to satisfy WCP, None if WCP was not enforced
+             'attacks': list of [attacking assumptions, attacked assumptions, attack type]
+             'extensions': dictionary mapping each of the semantics to a list of [assumptions, conclusions]
+             'truncated': list of the semantics with more than max_extensions extensions
+    """
+    contr_map = result['contr_map']
+
+    rules_added = None
+    if result['rules_added'] is not None:
+        rules_added = sorted([sentence_to_symbol(rule.consequent, contr_map),
+                              sentences_to_symbols(rule.antecedent, contr_map)] for rule in result['rules_added'])
+
+    attacks = sorted([sentences_to_symbols(attacker), sentences_to_symbols(attackee), attack_type]
+                     for attacker, attackee, attack_type in convert_to_attacks_between_sets(result['attacks']))
+
+    extensions = {}
+    truncated = []
+    for s in semantics:
+        extension_list = sorted([sentences_to_symbols(extension), sentences_to_symbols(conclusions, contr_map)]
+                                for extension, conclusions in result['extensions'][s].items())
+        if max_extensions is not None and len(extension_list) > max_extensions:
+            extension_list = extension_list[:max_extensions]
+            truncated.append(s)
+        extensions[s] = extension_list
+
+    return {'id': framework_id, 'state': DONE, 'rules_added': rules_added, 'attacks': attacks,
+            'extensions': extensions, 'truncated': truncated}
+
+
+def error_to_data(framework_id, error_type, message):
+    """
+    :return: dictionary with the entries 'id', 'state' (FAILED) and 'error', a dictionary with the entries
+             'type' and 'message'
+    """
+    return {'id': framework_id, 'state': FAILED, 'error': {'type': error_type, 'message': message}}
+
+
+def sentences_to_symbols(sentences, contr_map={}):
+    """
+    :param sentences: collection of Sentences
+    :param contr_map: dictionary mapping symbols of assumptions to symbols of their contraries (default empty)
+    :return: sorted list of the symbols of sentences
+    """
+    return sorted(sentence_to_symbol(sentence, contr_map) for sentence in sentences)
+
+
+def sentence_to_symbol(sentence, contr_map={}):
+    """
+    :param sentence: Sentence
+    :param contr_map: dictionary mapping symbols of assumptions to symbols of their contraries (default empty)
+    :return: symbol of sentence, for contraries the symbol declared for them
+    """
+    if sentence.is_contrary:
+        if sentence.symbol in contr_map:
+            return contr_map[sentence.symbol]
+        return CONTRARY_SYMBOL.format(sentence.symbol)
+    return sentence.symbol
+
+
+class BatchRequestException(Exception):
+    def __init__(self, message):
+        self.message = message
@@ -0,0 +1,268 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+This module contains functions summarising large attack graphs of compiled frameworks by clustering their nodes.
+Nodes are clustered either by the strongly connected components of the graph or by the first assumption (in the
+order of the symbols) of their premises. Every cluster with more than one node is shown as a single node, and all
+links between the same pair of clusters are collapsed into one, combining their types as in the compiled graph.
+Clusters can be expanded again, showing their nodes while the other clusters stay collapsed.
+As a graph without cycles has only clusters of single nodes, the number of clusters can be bounded: clusters are then
+merged by the level of their nodes in the condensation of the graph, i.e. the length of the longest path of
+strongly connected components leading to them.
+"""
+
+from abap_compiled import *
+
+SCC_CLUSTERING = "scc"
+ASSUMPTION_CLUSTERING = "assumption"
+
+CLUSTERINGS = (SCC_CLUSTERING, ASSUMPTION_CLUSTERING)
+
+# label of a collapsed cluster: label of its first node and number of its other nodes
+CLUSTER_LABEL = "{} (+{})"
+
+
+def strongly_connected_components(n_nodes, sources, targets):
+    """
+    :param n_nodes: number of nodes of the graph
+    :param sources: list of the source nodes of the links
+    :param targets: list of the target nodes of the links
+    :return: list mapping each node to the index of its strongly connected component, components are numbered in
+             the order of their first nodes
+    """
+    successors = [[] for _ in range(0, n_nodes)]
+    for source, target in zip(sources, targets):
+        successors[source].append(target)
+
+    # iterative version of Tarjan's algorithm, so that long paths do not exceed the recursion limit
+    index = [-1] * n_nodes
+    lowlink = [0] * n_nodes
+    on_stack = [False] * n_nodes
+    stack = []
+    component = [-1] * n_nodes
+    counter = 0
+    for root in range(0, n_nodes):
+        if index[root] != -1:
+            continue
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        # nodes being visited with the position of the next successor to visit
+        work = [(root, 0)]
+        while work:
+            node, position = work[-1]
+            if position < len(successors[node]):
+                work[-1] = (node, position + 1)
+                successor = successors[node][position]
+                if index[successor] == -1:
+                    index[successor] = lowlink[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    on_stack[successor] = True
+                    work.append((successor, 0))
+                elif on_stack[successor]:
+                    lowlink[node] = min(lowlink[node], index[successor])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component[member] = node
+                    if member == node:
+                        break
+
+    return _renumber(component)
+
+
+def assumption_clusters(snapshot):
+    """
+    :param snapshot: CompiledFramework including the graph
+    :return: list mapping each node to the index of its cluster, the nodes whose premises have the same first
+             assumption are in the same cluster, nodes with empty premises are in a cluster of their own
+    """
+    offsets = snapshot.node_offsets.tolist()
+    items = snapshot.node_items.tolist()
+    keys = []
+    for i in range(0, len(offsets) - 1):
+        premise = items[offsets[i]:offsets[i + 1]]
+        keys.append(min(premise) if premise else (None, i))
+    return _renumber(keys)
+
+
+def cluster_nodes(snapshot, clustering):
+    """
+    :param snapshot: CompiledFramework including the graph
+    :param clustering: one of CLUSTERINGS
+    :return: list mapping each node to the index of its cluster
+    :raise ValueError: if clustering is unknown
+    """
+    if clustering == SCC_CLUSTERING:
+        return strongly_connected_components(len(snapshot.node_offsets) - 1, snapshot.link_sources.tolist(),
+                                             snapshot.link_targets.tolist())
+    if clustering == ASSUMPTION_CLUSTERING:
+        return assumption_clusters(snapshot)
+    raise ValueError("Unknown clustering '{}'!".format(clustering))
+
+
+def condensation_levels(n_nodes, sources, targets):
+    """
+    :param n_nodes: number of nodes of the graph
+    :param sources: list of the source nodes of the links
+    :param targets: list of the target nodes of the links
+    :return: list mapping each node to the number of strongly connected components on the longest path of
+             components leading to its component, 0 for the components without incoming links
+    """
+    components = strongly_connected_components(n_nodes, sources, targets)
+    n_components = max(components) + 1 if components else 0
+    successors = [set() for _ in range(0, n_components)]
+    for source, target in zip(sources, targets):
+        if components[source] != components[target]:
+            successors[components[source]].add(components[target])
+
+    # the components are visited in topological order
+    predecessors = [0] * n_components
+    for targets_of_component in successors:
+        for component in targets_of_component:
+            predecessors[component] += 1
+    levels = [0] * n_components
+    ready = [component for component in range(0, n_components) if predecessors[component] == 0]
+    while ready:
+        component = ready.pop()
+        for successor in successors[component]:
+            levels[successor] = max(levels[successor], levels[component] + 1)
+            predecessors[successor] -= 1
+            if predecessors[successor] == 0:
+                ready.append(successor)
+
+    return [levels[component] for component in components]
+
+
+def bound_clusters(clusters, sources, targets, max_nodes):
+    """
+    merge clusters until there are at most max_nodes: the clusters of single nodes are merged by the level of their
+    nodes in the condensation of the graph, see condensation_levels(), adjacent levels being merged as well if there
+    are too many of them; if the clusters of several nodes alone are too many, all clusters are merged by the lowest
+    level of their nodes
+    :param clusters: list mapping each node to the index of its cluster
+    :param sources: list of the source nodes of the links
+    :param targets: list of the target nodes of the links
+    :param max_nodes: maximum number of clusters, at least 1
+    :return: list mapping each node to the index of its merged cluster
+    """
+    sizes = {}
+    for cluster in clusters:
+        sizes[cluster] = sizes.get(cluster, 0) + 1
+    if len(sizes) <= max_nodes:
+        return clusters
+
+    levels = condensation_levels(len(clusters), sources, targets)
+    cluster_levels = {}
+    for node, cluster in enumerate(clusters):
+        cluster_levels[cluster] = min(cluster_levels.get(cluster, levels[node]), levels[node])
+
+    n_kept = sum(1 for size in sizes.values() if size > 1)
+    n_buckets = max_nodes - n_kept if n_kept < max_nodes else max_nodes
+    # number of adjacent levels merged into one cluster
+    width = -(-(max(levels) + 1) // n_buckets)
+
+    keys = []
+    for cluster in clusters:
+        if n_kept < max_nodes and sizes[cluster] > 1:
+            keys.append(("cluster", cluster))
+        else:
+            keys.append(("level", cluster_levels[cluster] // width))
+    return _renumber(keys)
+
+
+def summarize_graph(labels, sources, targets, types, clusters, groups, expanded=()):
+    """
+    :param labels: list of the labels of the nodes
+    :param sources: list of the source nodes of the links
+    :param targets: list of the target nodes of the links
+    :param types: list of the types of the links
+    :param clusters: list mapping each node to the index of its cluster
+    :param groups: list of the groups of the nodes, a collapsed cluster has the lowest group of its nodes
+    :param expanded: collection of the indices of the clusters whose nodes are shown
+    :return: dictionary with the entries 'nodes', a list of dictionaries with the entries 'name' and 'group' and
+             either 'node' (index of the node shown) or 'cluster' and 'size' (index and number of nodes of the
+             collapsed cluster), and 'links', a list of dictionaries with the entries 'source' and 'target'
+             (indices into 'nodes'), 'value' (combined type) and 'count' (number of links collapsed)
+    """
+    expanded = set(expanded)
+    sizes = {}
+    for cluster in clusters:
+        sizes[cluster] = sizes.get(cluster, 0) + 1
+
+    nodes = []
+    # maps nodes to their positions in nodes
+    positions = []
+    # maps collapsed clusters to their positions in nodes
+    cluster_positions = {}
+    for node, cluster in enumerate(clusters):
+        if sizes[cluster] == 1 or cluster in expanded:
+            positions.append(len(nodes))
+            nodes.append({"name": labels[node], "group": groups[node], "node": node})
+        elif cluster in cluster_positions:
+            position = cluster_positions[cluster]
+            positions.append(position)
+            nodes[position]["group"] = min(nodes[position]["group"], groups[node])
+        else:
+            cluster_positions[cluster] = len(nodes)
+            positions.append(len(nodes))
+            nodes.append({"name": CLUSTER_LABEL.format(labels[node], sizes[cluster] - 1), "group": groups[node],
+                          "cluster": cluster, "size": sizes[cluster]})
+
+    # maps pairs of positions to the combined type and number of the links between them
+    links = {}
+    for source, target, link_type in zip(sources, targets, types):
+        key = (positions[source], positions[target])
+        combined, count = links.get(key, (0, 0))
+        links[key] = (combined | link_type, count + 1)
+
+    return {"nodes": nodes,
+            "links": [{"source": source, "target": target, "value": value, "count": count}
+                      for (source, target), (value, count) in links.items()]}
+
+
+def summarize_snapshot(snapshot, clustering, groups, expanded=(), max_nodes=None):
+    """
+    summarize the graph of a snapshot with summarize_graph()
+    :param snapshot: CompiledFramework including the graph
+    :param clustering: one of CLUSTERINGS
+    :param groups: list of the groups of the nodes
+    :param expanded: collection of the indices of the clusters whose nodes are shown
+    :param max_nodes: maximum number of clusters, see bound_clusters(), or None for no limit
+    """
+    sources = snapshot.link_sources.tolist()
+    targets = snapshot.link_targets.tolist()
+    clusters = cluster_nodes(snapshot, clustering)
+    if max_nodes is not None:
+        clusters = bound_clusters(clusters, sources, targets, max_nodes)
+    return summarize_graph(snapshot.node_labels(), sources, targets, snapshot.link_types.tolist(), clusters, groups,
+                           expanded)
+
+
+def _renumber(keys):
+    """
+    :return: list mapping each key to the index of its first occurrence among the distinct keys
+    """
+    numbers = {}
+    return [numbers.setdefault(key, len(numbers)) for key in keys]
@@ -0,0 +1,500 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+This module contains functions compiling a validated ABA_Plus object into a compact binary file and a class
+CompiledFramework loading it back from a memory map, without validating the framework or calculating the transitive
+closure of its preferences again.
+
+A compiled file consists of a header with the number of elements of each section, followed by the sections as
+little-endian arrays, each starting at a multiple of 8 bytes:
+    symbols:      offsets (int64, one more than symbols) into the UTF-8 encoded symbols (bytes)
+    assumptions:  symbol ids (int32)
+    rules:        consequents (int32 sentence codes), offsets (int64) into the antecedents (int32 sentence codes)
+    preferences:  the closed preference relation as first and second assumption (int32 symbol ids) and relation (int8)
+    contraries:   symbol ids of the contraries and of their assumptions (int32)
+    deductions:   offsets (int64) into the premises (int32 sentence codes), the same for the conclusions (optional)
+    attacks:      indices of the attacking and attacked deductions (int32) and attack types (int8) (optional)
+    graph:        offsets (int64) into the premises of the nodes (int32 sentence codes), offsets (int64) into their
+                  UTF-8 encoded labels (bytes), and the source and target nodes (int32) and the combined attack types
+                  (int8) of the links (optional, included with the deductions and attacks)
+Sentences are coded as twice the id of their symbol, plus 1 for contraries.
+The graph has a node for each distinct premise of the deductions and a link for each pair of attacking and attacked
+premises, whose type is the bitwise or of the types of the attacks between them, NORMAL_ATK | REVERSE_ATK if both.
+Compiled files are only read, so a file memory-mapped by several processes is shared through the page cache.
+
+usage: python3 abap_compiled.py [--arguments] [--auto-WCP] INPUT OUTPUT
+"""
+
+import argparse
+import bisect
+import json
+import mmap
+import struct
+import sys
+
+import numpy as np
+
+from aba_plus_ import *
+
+COMPILED_MAGIC = b"ABAP"
+COMPILED_FORMAT_VERSION = 2
+COMPILED_FILE_EXTENSION = ".abapc"
+
+# magic, version, flags and the numbers of symbols, symbol bytes, assumptions, rules, antecedents, preferences,
+# contraries, deductions, premises, conclusions, attacks, nodes, node premises, label bytes and links
+HEADER_FORMAT = "<4sII15Q"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# flag set if the deductions, attacks and graph are included
+ARGUMENTS_FLAG = 1
+
+ALIGNMENT = 8
+
+
+def sentence_code(sentence, symbol_ids):
+    return 2 * symbol_ids[sentence.symbol] + (1 if sentence.is_contrary else 0)
+
+
+def compile_framework(filename, abap, contr_map, deductions=None, attacks=None, node_label=None):
+    """
+    the entries of every section are sorted by the codes of their sentences, so that compiling the same framework
+    always numbers its deductions and nodes alike, whatever the order in which the sets are iterated
+    :param filename: name of the compiled file to write
+    :param abap: validated ABA_Plus object, whose preferences are transitively closed
+    :param contr_map: dictionary mapping symbols of contraries to symbols of assumptions
+    :param deductions: collection of Deductions to include, or None
+    :param attacks: collection of Attacks to include, or None,
+                    the deductions of the attacks are included even if they are not in deductions
+    :param node_label: function mapping the premise of a node of the graph to its label, or None for empty labels
+    """
+    symbols = set(contr_map.keys())
+    symbols.update(asm.symbol for asm in abap.assumptions)
+    for rule in abap.rules:
+        symbols.add(rule.consequent.symbol)
+        symbols.update(ant.symbol for ant in rule.antecedent)
+    symbol_list = sorted(symbols)
+    symbol_ids = dict((symbol, idx) for idx, symbol in enumerate(symbol_list))
+
+    encoded_symbols = [symbol.encode("utf-8") for symbol in symbol_list]
+    symbol_offsets = np.zeros(len(encoded_symbols) + 1, dtype='<i8')
+    np.cumsum([len(s) for s in encoded_symbols], out=symbol_offsets[1:])
+    symbol_bytes = b"".join(encoded_symbols)
+
+    assumptions = np.array(sorted(symbol_ids[asm.symbol] for asm in abap.assumptions), dtype='<i4')
+
+    def set_key(sentences):
+        return sorted(sentence_code(sentence, symbol_ids) for sentence in sentences)
+
+    rule_list = sorted(abap.rules, key=lambda rule: (sentence_code(rule.consequent, symbol_ids),
+                                                     set_key(rule.antecedent)))
+    consequents = np.array([sentence_code(rule.consequent, symbol_ids) for rule in rule_list], dtype='<i4')
+    antecedent_offsets, antecedents = _code_sets([rule.antecedent for rule in rule_list], symbol_ids)
+
+    pref_list = sorted(abap.preferences, key=lambda pref: (symbol_ids[pref.assump1.symbol],
+                                                           symbol_ids[pref.assump2.symbol], pref.relation))
+    prefs1 = np.array([symbol_ids[pref.assump1.symbol] for pref in pref_list], dtype='<i4')
+    prefs2 = np.array([symbol_ids[pref.assump2.symbol] for pref in pref_list], dtype='<i4')
+    relations = np.array([pref.relation for pref in pref_list], dtype='<i1')
+
+    contrary_list = sorted(contr_map.keys(), key=lambda contrary: symbol_ids[contrary])
+    contraries = np.array([symbol_ids[contrary] for contrary in contrary_list], dtype='<i4')
+    contrary_assumptions = np.array([symbol_ids[contr_map[contrary]] for contrary in contrary_list], dtype='<i4')
+
+    sections = [symbol_offsets, symbol_bytes, assumptions, consequents, antecedent_offsets, antecedents,
+                prefs1, prefs2, relations, contraries, contrary_assumptions]
+    flags = 0
+    deduction_list = []
+    premises = conclusions = node_items = np.zeros(0, dtype='<i4')
+    attack_list = []
+    node_list = []
+    label_bytes = b""
+    link_types = {}
+    if deductions is not None or attacks is not None:
+        flags |= ARGUMENTS_FLAG
+        def deduction_key(ded):
+            return (set_key(ded.premise), set_key(ded.conclusion))
+
+        deduction_set = set(deductions or [])
+        for atk in attacks or []:
+            deduction_set.update((atk.attacker, atk.attackee))
+        deduction_list = sorted(deduction_set, key=deduction_key)
+        deduction_indices = dict((ded, idx) for idx, ded in enumerate(deduction_list))
+        attack_list = sorted(attacks or [], key=lambda atk: (deduction_indices[atk.attacker],
+                                                             deduction_indices[atk.attackee], atk.type))
+
+        premise_offsets, premises = _code_sets([ded.premise for ded in deduction_list], symbol_ids)
+        conclusion_offsets, conclusions = _code_sets([ded.conclusion for ded in deduction_list], symbol_ids)
+        attackers = np.array([deduction_indices[atk.attacker] for atk in attack_list], dtype='<i4')
+        attackees = np.array([deduction_indices[atk.attackee] for atk in attack_list], dtype='<i4')
+        attack_types = np.array([atk.type for atk in attack_list], dtype='<i1')
+        sections += [premise_offsets, premises, conclusion_offsets, conclusions, attackers, attackees, attack_types]
+
+        # maps premises to their nodes
+        node_indices = {}
+        for ded in deduction_list:
+            premise = frozenset(ded.premise)
+            if premise not in node_indices:
+                node_indices[premise] = len(node_list)
+                node_list.append(ded.premise)
+        # maps pairs of nodes to the combined type of the attacks between them
+        for atk in attack_list:
+            link = (node_indices[frozenset(atk.attacker.premise)], node_indices[frozenset(atk.attackee.premise)])
+            link_types[link] = link_types.get(link, 0) | atk.type
+
+        node_offsets, node_items = _code_sets(node_list, symbol_ids)
+        encoded_labels = [(node_label(premise) if node_label is not None else "").encode("utf-8")
+                          for premise in node_list]
+        label_offsets = np.zeros(len(encoded_labels) + 1, dtype='<i8')
+        np.cumsum([len(label) for label in encoded_labels], out=label_offsets[1:])
+        label_bytes = b"".join(encoded_labels)
+        link_list = sorted(link_types)
+        link_sources = np.array([source for source, _ in link_list], dtype='<i4')
+        link_targets = np.array([target for _, target in link_list], dtype='<i4')
+        link_type_array = np.array([link_types[link] for link in link_list], dtype='<i1')
+        sections += [node_offsets, node_items, label_offsets, label_bytes, link_sources, link_targets,
+                     link_type_array]
+
+    header = struct.pack(HEADER_FORMAT, COMPILED_MAGIC, COMPILED_FORMAT_VERSION, flags,
+                         len(symbol_list), len(symbol_bytes), len(assumptions), len(rule_list), len(antecedents),
+                         len(pref_list), len(contr_map), len(deduction_list), len(premises), len(conclusions),
+                         len(attack_list), len(node_list), len(node_items), len(label_bytes), len(link_types))
+
+    f = open(filename, 'wb')
+    try:
+        f.write(header)
+        position = len(header)
+        for section in sections:
+            padding = -position % ALIGNMENT
+            f.write(b"\0" * padding)
+            data = section if isinstance(section, bytes) else section.tobytes()
+            f.write(data)
+            position += padding + len(data)
+    finally:
+        f.close()
+
+
+def _code_sets(sentence_sets, symbol_ids):
+    """
+    :return: tuple of the offsets (int64) into the concatenated codes (int32) of the sentences of each set
+    """
+    offsets = np.zeros(len(sentence_sets) + 1, dtype='<i8')
+    np.cumsum([len(s) for s in sentence_sets], out=offsets[1:])
+    codes = np.array([code for s in sentence_sets for code in sorted(sentence_code(sentence, symbol_ids)
+                                                                     for sentence in s)], dtype='<i4')
+    return (offsets, codes)
+
+
+class CompiledFramework:
+    def __init__(self, filename):
+        """
+        memory-map a compiled file, the sections are read as they are accessed
+        :param filename: name of a file written by compile_framework()
+        :raise InvalidCompiledFrameworkException: if the file is not a compiled framework of this version
+        """
+        file = open(filename, 'rb')
+        try:
+            # the memory map stays valid after the file is closed
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise InvalidCompiledFrameworkException("The file is not a compiled ABA+ framework!")
+        finally:
+            file.close()
+
+        if len(self.data) < HEADER_SIZE:
+            self.close()
+            raise InvalidCompiledFrameworkException("The file is not a compiled ABA+ framework!")
+        header = struct.unpack_from(HEADER_FORMAT, self.data, 0)
+        if header[0] != COMPILED_MAGIC:
+            self.close()
+            raise InvalidCompiledFrameworkException("The file is not a compiled ABA+ framework!")
+        if header[1] != COMPILED_FORMAT_VERSION:
+            self.close()
+            raise InvalidCompiledFrameworkException("Unsupported version of the compiled ABA+ framework format!")
+
+        flags = header[2]
+        n_symbols, n_symbol_bytes, n_assumptions, n_rules, n_antecedents, n_preferences, n_contraries, \
+            n_deductions, n_premises, n_conclusions, n_attacks, n_nodes, n_node_items, n_label_bytes, \
+            n_links = header[3:]
+        self.has_arguments = bool(flags & ARGUMENTS_FLAG)
+
+        self._position = HEADER_SIZE
+        self.symbol_offsets = self._array('<i8', n_symbols + 1)
+        self.symbol_bytes = self._array('u1', n_symbol_bytes)
+        self.assumption_ids = self._array('<i4', n_assumptions)
+        self.consequents = self._array('<i4', n_rules)
+        self.antecedent_offsets = self._array('<i8', n_rules + 1)
+        self.antecedents = self._array('<i4', n_antecedents)
+        self.prefs1 = self._array('<i4', n_preferences)
+        self.prefs2 = self._array('<i4', n_preferences)
+        self.relations = self._array('<i1', n_preferences)
+        self.contraries = self._array('<i4', n_contraries)
+        self.contrary_assumptions = self._array('<i4', n_contraries)
+        if self.has_arguments:
+            self.premise_offsets = self._array('<i8', n_deductions + 1)
+            self.premises = self._array('<i4', n_premises)
+            self.conclusion_offsets = self._array('<i8', n_deductions + 1)
+            self.conclusions = self._array('<i4', n_conclusions)
+            self.attackers = self._array('<i4', n_attacks)
+            self.attackees = self._array('<i4', n_attacks)
+            self.attack_types = self._array('<i1', n_attacks)
+            self.node_offsets = self._array('<i8', n_nodes + 1)
+            self.node_items = self._array('<i4', n_node_items)
+            self.label_offsets = self._array('<i8', n_nodes + 1)
+            self.label_bytes = self._array('u1', n_label_bytes)
+            self.link_sources = self._array('<i4', n_links)
+            self.link_targets = self._array('<i4', n_links)
+            self.link_types = self._array('<i1', n_links)
+
+        self._symbols = None
+        self._sentences = {}
+        self._labels = None
+        self._graph_json = None
+
+    def _array(self, dtype, count):
+        """
+        :return: read-only numpy array of the next section, backed by the memory map
+        """
+        self._position += -self._position % ALIGNMENT
+        array = np.frombuffer(self.data, dtype=dtype, count=count, offset=self._position)
+        self._position += array.nbytes
+        return array
+
+    def close(self):
+        """
+        release the memory map, arrays of the sections must not be used afterwards
+        """
+        self._symbols = None
+        self._sentences = {}
+        self._labels = None
+        self._graph_json = None
+        for name in list(self.__dict__):
+            if isinstance(self.__dict__[name], np.ndarray):
+                del self.__dict__[name]
+        try:
+            self.data.close()
+        except (AttributeError, BufferError):
+            # arrays still referenced elsewhere keep the memory map open until they are released
+            pass
+
+    def symbols(self):
+        """
+        :return: list of all symbols, indexed by their ids
+        """
+        if self._symbols is None:
+            symbol_bytes = self.symbol_bytes.tobytes()
+            offsets = self.symbol_offsets.tolist()
+            self._symbols = [symbol_bytes[offsets[i]:offsets[i + 1]].decode("utf-8")
+                             for i in range(0, len(offsets) - 1)]
+        return self._symbols
+
+    def symbol_id(self, symbol):
+        """
+        :return: id of symbol, None if the framework does not contain it
+        """
+        symbols = self.symbols()
+        idx = bisect.bisect_left(symbols, symbol)
+        if idx < len(symbols) and symbols[idx] == symbol:
+            return idx
+        return None
+
+    def sentence(self, code):
+        """
+        :param code: sentence code
+        :return: the Sentence with code, the same object for the same code
+        """
+        sentence = self._sentences.get(code)
+        if sentence is None:
+            sentence = Sentence(self.symbols()[code >> 1], bool(code & 1))
+            self._sentences[code] = sentence
+        return sentence
+
+    def _sentence_sets(self, offsets, codes):
+        offsets = offsets.tolist()
+        codes = codes.tolist()
+        sentence = self.sentence
+        return [set(sentence(code) for code in codes[offsets[i]:offsets[i + 1]]) for i in range(0, len(offsets) - 1)]
+
+    def aba_plus(self):
+        """
+        :return: ABA_Plus object of the compiled framework, created without validation or calculating the
+                 transitive closure of its preferences
+        """
+        assumptions = set(self.sentence(2 * idx) for idx in self.assumption_ids.tolist())
+
+        rules = set()
+        antecedents = self._sentence_sets(self.antecedent_offsets, self.antecedents)
+        for consequent, antecedent in zip(self.consequents.tolist(), antecedents):
+            rules.add(Rule(antecedent, self.sentence(consequent)))
+
+        preferences = set(Preference(self.sentence(2 * idx1), self.sentence(2 * idx2), relation)
+                          for idx1, idx2, relation in zip(self.prefs1.tolist(), self.prefs2.tolist(),
+                                                          self.relations.tolist()))
+
+        abap = ABA_Plus.__new__(ABA_Plus)
+        abap.assumptions = assumptions
+        abap.preferences = preferences
+        abap.rules = rules
+        return abap
+
+    def contr_map(self):
+        """
+        :return: dictionary mapping symbols of contraries to symbols of assumptions
+        """
+        symbols = self.symbols()
+        return dict((symbols[contrary], symbols[asm])
+                    for contrary, asm in zip(self.contraries.tolist(), self.contrary_assumptions.tolist()))
+
+    def deductions(self):
+        """
+        :return: list of the compiled Deductions, indexed as in the attacks
+        :raise InvalidCompiledFrameworkException: if the deductions are not included
+        """
+        if not self.has_arguments:
+            raise InvalidCompiledFrameworkException("The compiled framework does not include deductions!")
+        premises = self._sentence_sets(self.premise_offsets, self.premises)
+        conclusions = self._sentence_sets(self.conclusion_offsets, self.conclusions)
+        return [Deduction(premise, conclusion) for premise, conclusion in zip(premises, conclusions)]
+
+    def attacks(self, deductions=None):
+        """
+        :param deductions: list returned by deductions(), computed if None
+        :return: set of the compiled Attacks
+        :raise InvalidCompiledFrameworkException: if the attacks are not included
+        """
+        if deductions is None:
+            deductions = self.deductions()
+        return set(Attack(deductions[attacker], deductions[attackee], attack_type)
+                   for attacker, attackee, attack_type in zip(self.attackers.tolist(), self.attackees.tolist(),
+                                                              self.attack_types.tolist()))
+
+
+    def node_labels(self):
+        """
+        :return: list of the labels of the nodes of the graph
+        :raise InvalidCompiledFrameworkException: if the graph is not included
+        """
+        if not self.has_arguments:
+            raise InvalidCompiledFrameworkException("The compiled framework does not include the graph!")
+        if self._labels is None:
+            label_bytes = self.label_bytes.tobytes()
+            offsets = self.label_offsets.tolist()
+            self._labels = [label_bytes[offsets[i]:offsets[i + 1]].decode("utf-8")
+                            for i in range(0, len(offsets) - 1)]
+        return self._labels
+
+    def nodes_within(self, sentences):
+        """
+        :param sentences: collection of Sentences
+        :return: boolean numpy array, True for the nodes of the graph whose premises are subsets of sentences
+        :raise InvalidCompiledFrameworkException: if the graph is not included
+        """
+        if not self.has_arguments:
+            raise InvalidCompiledFrameworkException("The compiled framework does not include the graph!")
+        codes = []
+        for sentence in sentences:
+            idx = self.symbol_id(sentence.symbol)
+            if idx is not None:
+                codes.append(2 * idx + (1 if sentence.is_contrary else 0))
+
+        contained = np.zeros(2 * len(self.symbol_offsets), dtype=bool)
+        contained[codes] = True
+        sizes = np.diff(self.node_offsets)
+        # number of sentences of each premise contained in sentences
+        node_of_item = np.repeat(np.arange(len(sizes)), sizes)
+        counts = np.bincount(node_of_item, weights=contained[self.node_items], minlength=len(sizes))
+        return counts == sizes
+
+    def membership_bitmap(self, sentences):
+        """
+        :param sentences: collection of Sentences
+        :return: bytes with a bit for each node of the graph, least significant bit first, set if the premise of the
+                 node is a subset of sentences
+        :raise InvalidCompiledFrameworkException: if the graph is not included
+        """
+        return np.packbits(self.nodes_within(sentences), bitorder='little').tobytes()
+
+    def graph_json(self):
+        """
+        the JSON is serialised once and kept until the snapshot is closed
+        :return: string containing the JSON of the graph, an object with the list 'nodes' of objects with the entry
+                 'name' (label) and the list 'links' of objects with the entries 'source', 'target' (indices of
+                 nodes) and 'value' (type)
+        :raise InvalidCompiledFrameworkException: if the graph is not included
+        """
+        if self._graph_json is None:
+            graph = {"nodes": [{"name": name} for name in self.node_labels()],
+                     "links": [{"source": source, "target": target, "value": value}
+                               for source, target, value in zip(self.link_sources.tolist(),
+                                                                self.link_targets.tolist(),
+                                                                self.link_types.tolist())]}
+            self._graph_json = json.dumps(graph)
+        return self._graph_json
+
+
+def load_framework(filename):
+    """
+    :param filename: name of a file written by compile_framework()
+    :return: tuple with two elements, like generate_aba_plus_framework():
+             1: ABA_Plus object
+             2: dictionary mapping symbols of contraries to symbols of assumptions
+    """
+    compiled = CompiledFramework(filename)
+    try:
+        return (compiled.aba_plus(), compiled.contr_map())
+    finally:
+        compiled.close()
+
+
+def is_compiled_framework(filename):
+    """
+    :return: True if the file starts like a compiled framework
+    """
+    f = open(filename, 'rb')
+    magic = f.read(len(COMPILED_MAGIC))
+    f.close()
+    return magic == COMPILED_MAGIC
+
+
+def main(argv):
+    from abap_parser import generate_aba_plus_framework_from_file
+
+    parser = argparse.ArgumentParser(description="Compile an ABA+ framework into a binary file.")
+    parser.add_argument("input", metavar="INPUT", help="file defining an ABA+ framework")
+    parser.add_argument("output", metavar="OUTPUT",
+                        help="compiled file to write, conventionally ending in {}".format(COMPILED_FILE_EXTENSION))
+    parser.add_argument("--arguments", action="store_true", help="include the deductions and attacks")
+    parser.add_argument("--auto-WCP", action="store_true",
+                        help="automatically satisfy WCP before compiling, otherwise WCP is only checked if the "
+                             "deductions and attacks are included")
+    args = parser.parse_args(argv[1:])
+
+    abap, contr_map = generate_aba_plus_framework_from_file(args.input)
+    if args.auto_WCP or args.arguments:
+        abap.check_or_auto_WCP(auto_WCP=args.auto_WCP)
+
+    deductions = attacks = None
+    if args.arguments:
+        _, attacks, deductions = abap.generate_arguments_and_attacks_for_contraries()
+
+    compile_framework(args.output, abap, contr_map, deductions, attacks)
+
+
+class InvalidCompiledFrameworkException(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,210 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+This module contains functions computing a fingerprint of an ABA_Plus object that does not depend on the order in
+which its components were declared and, optionally, on the symbols used.
+
+Symbols are renamed canonically by colour refinement of the graph connecting symbols to the rules they occur in and
+to the symbols they are preferred to, individualising symbols that refinement cannot tell apart. The fingerprint
+hashes the framework after this renaming, so two frameworks with equal fingerprints are equal up to renaming;
+frameworks which need more than MAX_INDIVIDUALISATIONS individualisations at worst get different fingerprints.
+"""
+
+import hashlib
+
+from aba_plus_ import *
+
+CANONICAL_SYMBOL = "s{}"
+
+# maximum number of symbols individualised by canonical_renaming(), each costing a colour refinement
+MAX_INDIVIDUALISATIONS = 64
+
+# edge labels of the graph refined by colour refinement
+HEAD = "head"
+BODY = "body"
+PREF_OUT = "pref_out"
+PREF_IN = "pref_in"
+
+
+def fingerprint(abap, rename_invariant=False):
+    """
+    :param abap: ABA_Plus object
+    :param rename_invariant: if True, the fingerprint is the same for frameworks that only differ in their symbols
+    :return: tuple with two elements:
+             1: hexadecimal fingerprint of abap
+             2: dictionary mapping the symbols of abap to the symbols they were renamed to in the fingerprint
+                (the identity if rename_invariant is False)
+    """
+    symbols = framework_symbols(abap)
+    if rename_invariant:
+        renaming = canonical_renaming(abap, symbols)
+    else:
+        renaming = dict((symbol, symbol) for symbol in symbols)
+
+    h = hashlib.sha256()
+    h.update(repr(canonical_form(abap, renaming)).encode("utf-8"))
+    return (h.hexdigest(), renaming)
+
+
+def framework_symbols(abap):
+    """
+    :return: set of all symbols occurring in abap
+    """
+    symbols = set(asm.symbol for asm in abap.assumptions)
+    for rule in abap.rules:
+        symbols.add(rule.consequent.symbol)
+        symbols.update(ant.symbol for ant in rule.antecedent)
+    return symbols
+
+
+def canonical_form(abap, renaming):
+    """
+    :param renaming: dictionary mapping the symbols of abap to new symbols
+    :return: tuple of sorted assumptions, rules and preferences of abap after renaming
+    """
+    def sentence_key(sentence):
+        return (renaming[sentence.symbol], sentence.is_contrary)
+
+    assumptions = tuple(sorted(renaming[asm.symbol] for asm in abap.assumptions))
+    rules = tuple(sorted((sentence_key(rule.consequent), tuple(sorted(sentence_key(ant) for ant in rule.antecedent)))
+                         for rule in abap.rules))
+    preferences = tuple(sorted((renaming[pref.assump1.symbol], renaming[pref.assump2.symbol], pref.relation)
+                               for pref in abap.preferences))
+    return (assumptions, rules, preferences)
+
+
+def canonical_renaming(abap, symbols, max_individualisations=MAX_INDIVIDUALISATIONS):
+    """
+    rename symbols in the order of their colours after colour refinement
+    symbols with the same colour are individualised one at a time, each by giving it a colour of its own and refining
+    again, and the renaming with the least canonical_form() over all choices is kept, so that it does not depend on
+    the original symbols
+    once max_individualisations symbols have been individualised, the remaining symbols with the same colour are
+    ordered by their original symbol instead: the renaming is then only a best-effort cache key, equal frameworks may
+    be renamed differently, but different frameworks are never renamed to the same canonical form
+    a refinement takes up to one round per symbol, and each round takes O(E log E) for E occurrences of symbols in
+    rules and preferences, so the renaming takes O((max_individualisations + 1) n E log E) for n symbols in the
+    worst case, although few rounds usually suffice
+    :return: dictionary mapping symbols to canonical symbols
+    """
+    symbol_list = sorted(symbols)
+    symbol_indices = dict((symbol, idx) for idx, symbol in enumerate(symbol_list))
+    rule_list = list(abap.rules)
+    n = len(symbol_list)
+
+    # nodes 0 to n-1 are symbols, the following nodes rules
+    initial_colours = []
+    for symbol in symbol_list:
+        initial_colours.append(("asm",) if Sentence(symbol, False) in abap.assumptions else ("sentence",))
+    adjacency = [[] for _ in range(0, n + len(rule_list))]
+    for idx, rule in enumerate(rule_list):
+        rule_node = n + idx
+        initial_colours.append(("rule", len(rule.antecedent)))
+        consequent_node = symbol_indices[rule.consequent.symbol]
+        adjacency[rule_node].append(((HEAD, rule.consequent.is_contrary), consequent_node))
+        adjacency[consequent_node].append(((HEAD, rule.consequent.is_contrary), rule_node))
+        for ant in rule.antecedent:
+            ant_node = symbol_indices[ant.symbol]
+            adjacency[rule_node].append(((BODY, ant.is_contrary), ant_node))
+            adjacency[ant_node].append(((BODY, ant.is_contrary), rule_node))
+    for pref in abap.preferences:
+        node1 = symbol_indices[pref.assump1.symbol]
+        node2 = symbol_indices[pref.assump2.symbol]
+        adjacency[node1].append(((PREF_OUT, pref.relation), node2))
+        adjacency[node2].append(((PREF_IN, pref.relation), node1))
+
+    # the renaming with the least canonical form found so far and the number of individualisations left
+    search = {'renaming': None, 'form': None, 'budget': max_individualisations}
+
+    def visit(colours):
+        cells = {}
+        for idx in range(0, n):
+            cells.setdefault(colours[idx], []).append(idx)
+        ties = [cell for _, cell in sorted(cells.items()) if len(cell) > 1]
+
+        if not ties or search['budget'] <= 0:
+            ordered = sorted(range(0, n), key=lambda idx: (colours[idx], symbol_list[idx]))
+            renaming = dict((symbol_list[idx], CANONICAL_SYMBOL.format(position))
+                            for position, idx in enumerate(ordered))
+            form = canonical_form(abap, renaming)
+            if search['form'] is None or form < search['form']:
+                search['renaming'] = renaming
+                search['form'] = form
+            return
+
+        # the first cell is chosen by its colour only, so the choices explored do not depend on the symbols
+        for individualised in ties[0]:
+            if search['budget'] <= 0:
+                return
+            search['budget'] -= 1
+            visit(_refine(_compress([(colour, node != individualised) for node, colour in enumerate(colours)]),
+                          adjacency))
+
+    visit(_refine(_compress(initial_colours), adjacency))
+    return search['renaming']
+
+
+def _refine(colours, adjacency):
+    """
+    refine colours until the number of colours no longer grows
+    :param colours: list of the colours of the nodes, as returned by _compress()
+    :param adjacency: list of the lists of (edge label, neighbour) of each node
+    :return: list of the refined colours of the nodes
+    """
+    colour_count = len(set(colours))
+    while True:
+        signatures = [(colours[v], tuple(sorted((label, colours[u]) for label, u in adjacency[v])))
+                      for v in range(0, len(adjacency))]
+        colours = _compress(signatures)
+        new_colour_count = len(set(colours))
+        if new_colour_count == colour_count:
+            return colours
+        colour_count = new_colour_count
+
+
+def _compress(signatures):
+    """
+    :return: list replacing every signature by its position among the sorted distinct signatures
+    """
+    ids = dict((sig, idx) for idx, sig in enumerate(sorted(set(signatures))))
+    return [ids[sig] for sig in signatures]
+
+
+def invert_renaming(renaming):
+    """
+    :return: dictionary mapping the renamed symbols back to the original symbols
+    """
+    return dict((v, k) for k, v in renaming.items())
+
+
+def rename_sentences(obj, renaming):
+    """
+    :param obj: Sentence, Rule, Preference, Deduction, Attack, ABA_Plus or a set, frozenset, list, tuple or dict
+                of these
+    :param renaming: dictionary mapping symbols to new symbols, symbols not in renaming are kept
+    :return: a copy of obj in which the symbols of all Sentences are renamed
+    """
+    if isinstance(obj, Sentence):
+        return Sentence(renaming.get(obj.symbol, obj.symbol), obj.is_contrary)
+    if isinstance(obj, (set, frozenset, list, tuple)):
+        return type(obj)(rename_sentences(item, renaming) for item in obj)
+    if isinstance(obj, dict):
+        return dict((rename_sentences(k, renaming), rename_sentences(v, renaming)) for k, v in obj.items())
+    if isinstance(obj, (Rule, Preference, Deduction, Attack, ABA_Plus)):
+        # copy without calling __init__, which would validate the framework again
+        copy = obj.__class__.__new__(obj.__class__)
+        copy.__dict__ = dict((k, rename_sentences(v, renaming)) for k, v in obj.__dict__.items())
+        return copy
+    return obj
@@ -0,0 +1,119 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+This module contains functions listing the attacks of the graph of a compiled framework and the extensions of a
+framework one page at a time, optionally filtered by an assumption or by the type of the attacks or extensions.
+The attacks are those between the premises of the nodes of the graph, a link with both types being two attacks,
+ordered by link and normal attacks first.
+"""
+
+import numpy as np
+
+from abap_compiled import *
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+
+def nodes_containing(snapshot, assumption):
+    """
+    :param snapshot: CompiledFramework including the graph
+    :param assumption: symbol of an assumption
+    :return: boolean numpy array, True for the nodes of the graph whose premises contain assumption
+    """
+    n_nodes = len(snapshot.node_offsets) - 1
+    res = np.zeros(n_nodes, dtype=bool)
+    idx = snapshot.symbol_id(assumption)
+    if idx is None:
+        return res
+    sizes = np.diff(snapshot.node_offsets)
+    node_of_item = np.repeat(np.arange(n_nodes), sizes)
+    res[node_of_item[snapshot.node_items == 2 * idx]] = True
+    return res
+
+
+def list_attacks(snapshot, offset=0, limit=DEFAULT_PAGE_SIZE, assumption=None, attack_type=None):
+    """
+    :param snapshot: CompiledFramework including the graph
+    :param offset: number of matching attacks skipped
+    :param limit: maximum number of attacks returned
+    :param assumption: symbol of an assumption the premise of the attacker or attackee must contain, or None
+    :param attack_type: NORMAL_ATK or REVERSE_ATK to list only attacks of this type, or None
+    :return: tuple with two elements:
+             1: number of matching attacks
+             2: list of tuples of the attacking node, the attacked node and the type of each attack of the page
+    :raise InvalidCompiledFrameworkException: if the graph is not included
+    """
+    if not snapshot.has_arguments:
+        raise InvalidCompiledFrameworkException("The compiled framework does not include the graph!")
+
+    types = snapshot.link_types
+    selected = np.ones(len(types), dtype=bool)
+    if assumption is not None:
+        containing = nodes_containing(snapshot, assumption)
+        selected &= containing[snapshot.link_sources] | containing[snapshot.link_targets]
+
+    # the attacks are numbered 2 * link for normal and 2 * link + 1 for reverse attacks
+    numbers = []
+    for number_type, shift in ((NORMAL_ATK, 0), (REVERSE_ATK, 1)):
+        if attack_type is None or attack_type == number_type:
+            numbers.append(2 * np.flatnonzero(selected & ((types & number_type) != 0)) + shift)
+    numbers = np.sort(np.concatenate(numbers)) if numbers else np.zeros(0, dtype=np.int64)
+
+    page = numbers[offset:offset + limit]
+    links = page // 2
+    page_types = np.where(page % 2 == 0, NORMAL_ATK, REVERSE_ATK)
+    return (len(numbers), list(zip(snapshot.link_sources[links].tolist(), snapshot.link_targets[links].tolist(),
+                                   page_types.tolist())))
+
+
+def list_extensions(extension_map, offset=0, limit=DEFAULT_PAGE_SIZE, extension_type=None, assumption=None):
+    """
+    :param extension_map: dictionary mapping indices to tuples of an extension (set of Sentences), its conclusions
+                          and its type
+    :param offset: number of matching extensions skipped
+    :param limit: maximum number of extensions returned
+    :param extension_type: type of the extensions listed, or None for all types
+    :param assumption: symbol of an assumption the extensions must contain, or None
+    :return: tuple with two elements:
+             1: number of matching extensions
+             2: list of tuples of the index, extension, conclusions and type of each extension of the page, in the
+                order of the indices
+    """
+    matching = []
+    for index in sorted(extension_map):
+        extension, conclusions, ext_type = extension_map[index]
+        if extension_type is not None and ext_type != extension_type:
+            continue
+        if assumption is not None and not any(sentence.symbol == assumption and not sentence.is_contrary
+                                              for sentence in extension):
+            continue
+        matching.append(index)
+
+    return (len(matching), [(index,) + tuple(extension_map[index]) for index in matching[offset:offset + limit]])
+
+
+def parse_page(offset, limit):
+    """
+    :param offset: offset of the page as given in a request, or None
+    :param limit: size of the page as given in a request, or None
+    :return: tuple of the offset and size of the page, the size limited to MAX_PAGE_SIZE
+    :raise ValueError: if offset or limit is not a non-negative integer
+    """
+    offset = int(offset) if offset is not None else 0
+    limit = int(limit) if limit is not None else DEFAULT_PAGE_SIZE
+    if offset < 0 or limit < 0:
+        raise ValueError("The offset and limit must not be negative!")
+    return (offset, min(limit, MAX_PAGE_SIZE))
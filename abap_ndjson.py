@@ -0,0 +1,117 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+This module contains functions streaming the attack graph of a compiled framework as NDJSON (one JSON object per
+line): first a record for each node, then for each link, then for each attack between the premises of two nodes.
+The sections of the compiled framework are read in blocks as the records are generated, so the memory used does not
+grow with the size of the graph.
+"""
+
+import json
+
+from abap_compiled import *
+
+NODE_RECORD = "node"
+LINK_RECORD = "link"
+ATTACK_RECORD = "attack"
+
+# minimum number of bytes of each chunk, except the last one
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# number of nodes or links read from the sections at once
+BLOCK_SIZE = 4096
+
+
+def graph_records(snapshot, attack_text=None):
+    """
+    :param snapshot: CompiledFramework including the graph
+    :param attack_text: function mapping the labels of the attacking and attacked nodes and the type of an attack
+                        to its text, or None to leave out the texts
+    :return: generator of dictionaries, each with the entry 'type' and:
+             NODE_RECORD: 'index' and 'name' (label) of a node
+             LINK_RECORD: 'source', 'target' (indices of nodes) and 'value' (combined type of the attacks) of a link
+             ATTACK_RECORD: 'attacker', 'attackee' (indices of nodes), 'value' (NORMAL_ATK or REVERSE_ATK) and
+                            'text' of an attack, a link with both types is two attacks
+    :raise InvalidCompiledFrameworkException: if the graph is not included
+    """
+    if not snapshot.has_arguments:
+        raise InvalidCompiledFrameworkException("The compiled framework does not include the graph!")
+
+    n_nodes = len(snapshot.label_offsets) - 1
+    for start in range(0, n_nodes, BLOCK_SIZE):
+        end = min(start + BLOCK_SIZE, n_nodes)
+        offsets = snapshot.label_offsets[start:end + 1].tolist()
+        label_bytes = snapshot.label_bytes[offsets[0]:offsets[-1]].tobytes()
+        for i in range(0, end - start):
+            name = label_bytes[offsets[i] - offsets[0]:offsets[i + 1] - offsets[0]].decode("utf-8")
+            yield {"type": NODE_RECORD, "index": start + i, "name": name}
+
+    for source, target, value in _links(snapshot):
+        yield {"type": LINK_RECORD, "source": source, "target": target, "value": value}
+
+    for source, target, value in _links(snapshot):
+        for attack_type in (NORMAL_ATK, REVERSE_ATK):
+            if value & attack_type:
+                record = {"type": ATTACK_RECORD, "attacker": source, "attackee": target, "value": attack_type}
+                if attack_text is not None:
+                    record["text"] = attack_text(_label(snapshot, source), _label(snapshot, target), attack_type)
+                yield record
+
+
+def ndjson_chunks(records, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    :param records: iterable of dictionaries
+    :param chunk_size: minimum number of characters of each chunk, except the last one
+    :return: generator of strings with one line of JSON for each record, joined into chunks of chunk_size
+    """
+    lines = []
+    size = 0
+    for record in records:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(lines)
+            lines = []
+            size = 0
+    if lines:
+        yield "".join(lines)
+
+
+def stream_graph(snapshot, attack_text=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    :param snapshot: CompiledFramework including the graph, closed once the stream ends
+    :return: generator of the NDJSON chunks of graph_records()
+    """
+    try:
+        for chunk in ndjson_chunks(graph_records(snapshot, attack_text), chunk_size):
+            yield chunk
+    finally:
+        snapshot.close()
+
+
+def _links(snapshot):
+    n_links = len(snapshot.link_sources)
+    for start in range(0, n_links, BLOCK_SIZE):
+        end = min(start + BLOCK_SIZE, n_links)
+        for link in zip(snapshot.link_sources[start:end].tolist(), snapshot.link_targets[start:end].tolist(),
+                        snapshot.link_types[start:end].tolist()):
+            yield link
+
+
+def _label(snapshot, node):
+    start = int(snapshot.label_offsets[node])
+    end = int(snapshot.label_offsets[node + 1])
+    return snapshot.label_bytes[start:end].tobytes().decode("utf-8")
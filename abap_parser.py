@@ -18,7 +18,11 @@ The Prolog-style syntax can be found under the syntax section.
 """
 
 from aba_plus_ import *
+from abap_compiled import COMPILED_MAGIC, load_framework
+import mmap
+import os
 import re
+import sys
 
 ####### SYNTAX #######
 # myAsm(a). means "a" is an assumptions
@@ -36,174 +40,248 @@ LT_PREDICATE = "myPrefLT"
 # myPrefLE(a, b) represents a <= b
 LE_PREDICATE = "myPrefLE"
 
-ASSUMP_REGEX = r"myAsm\((.+)\)"
-CONTR_REGEX = r"contrary\((.+),(.+)\)"
-RULE_REGEX = r"myRule\((.+),\[(.*)\]\)"
-LT_REGEX = r"myPrefLT\((.+),(.+)\)"
-LE_REGEX = r"myPrefLE\((.+),(.+)\)"
+# % starts a comment until the end of the line
 
-DUPLICATE_USE_FOUND = "_duplicate"
+# whitespace, comment, punctuation or symbol, every character of the input belongs to one of them
+TOKEN_PATTERN = r"(\s+)|(%[^\n]*)|([()\[\],.])|([^\s()\[\],.%]+)"
+TOKEN_REGEX = re.compile(TOKEN_PATTERN)
+# the same for UTF-8 encoded input, e.g. memory-mapped files
+TOKEN_BYTES_REGEX = re.compile(TOKEN_PATTERN.encode("ascii"))
 
-def generate_aba_plus_framework_from_file(filename):
+PUNCTUATION = frozenset("()[],.")
+
+# shapes of the arguments of each predicate
+SYMBOL_ARG = "symbol"
+LIST_ARG = "list"
+PREDICATE_ARGS = {ASSUMP_PREDICATE: (SYMBOL_ARG,),
+                  CONTR_PREDICATE: (SYMBOL_ARG, SYMBOL_ARG),
+                  RULE_PREDICATE: (SYMBOL_ARG, LIST_ARG),
+                  LT_PREDICATE: (SYMBOL_ARG, SYMBOL_ARG),
+                  LE_PREDICATE: (SYMBOL_ARG, SYMBOL_ARG)}
+
+LINE_MESSAGE = "Line {}: {}"
+
+def generate_aba_plus_framework_from_file(filename, stats=None):
     """
-    :param filename: name of the file definining an ABA+ framework
+    the file is memory-mapped and parsed without reading it into memory as a whole,
+    files written by abap_compiled.compile_framework() are loaded without parsing
+    :param filename: name of the UTF-8 encoded file definining an ABA+ framework, or of a compiled framework
+    :param stats: Stats into which the parsing and the computations on the framework are recorded, or None
     :return: tuple with two elements:
              1: ABA_Plus object generated from file
              2: dictionary mapping symbols of contraries to symbols of assumptions
     """
-    file = open(filename, 'r')
-    input = file.read()
-    file.close()
-    return generate_aba_plus_framework(input)
-
-def generate_aba_plus_framework(input_string):
+    file = open(filename, 'rb')
+    try:
+        # empty files cannot be memory-mapped
+        if os.fstat(file.fileno()).st_size == 0:
+            return generate_aba_plus_framework("", stats)
+
+        input = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if input[:len(COMPILED_MAGIC)] == COMPILED_MAGIC:
+                abap, contr_map = load_framework(filename)
+                if stats is not None:
+                    abap.stats = stats
+                return (abap, contr_map)
+            return generate_aba_plus_framework(input, stats)
+        finally:
+            input.close()
+    finally:
+        file.close()
+
+def generate_aba_plus_framework(input_string, stats=None):
     """
-    :param input_string: A string defining an ABA+ framework
+    :param input_string: A string defining an ABA+ framework, or a bytes-like object (e.g. mmap) with its UTF-8
+                         encoding
+    :param stats: Stats into which the parsing and the computations on the framework are recorded, or None
     :return: tuple with two elements:
              1: ABA_Plus object generated from file
              2: dictionary mapping symbols of contraries to symbols of assumptions
     """
-    input = input_string.replace('\r', '')
-    input = input.replace('\n', '')
-    declarations = input.split(".")
-
-
-    assump_declarations = [decl for decl in declarations if ASSUMP_PREDICATE in decl]
-    assumptions = generate_assumptions(assump_declarations)
-
-    contr_declarations = [decl for decl in declarations if CONTR_PREDICATE in decl]
-    contr_map = generate_contraries_map(contr_declarations, assumptions)
-
-    rule_declarations = [decl for decl in declarations if RULE_PREDICATE in decl]
-    rules = generate_rules(rule_declarations, contr_map)
-
-    pref_declarations = [decl for decl in declarations if (LT_PREDICATE in decl) or (LE_PREDICATE in decl)]
-    preferences = generate_preferences(pref_declarations, assumptions)
+    with (stats or NO_STATS).phase(PARSE_PHASE):
+        assumptions, preferences, rules, contr_map = _parse_framework(input_string)
+    return (ABA_Plus(assumptions, preferences, rules, stats), contr_map)
 
-    return (ABA_Plus(assumptions, preferences, rules), contr_map)
-
-def generate_assumptions(assump_decls):
+def _parse_framework(input_string):
     """
-    :param assump_decls: list of assumption declarations
-    :return: set of assumptions(Sentences) generated from assumption declarations
+    :return: tuple with the assumptions, preferences, rules and contrary map declared in input_string
     """
-    assumptions = set()
+    # only the arguments of declarations are kept until all assumptions and contraries are known
+    assumption_symbols = set()
+    contr_decls = []
+    rule_decls = []
+    pref_decls = []
+
+    for line, predicate, args in parse_declarations(input_string):
+        if predicate == ASSUMP_PREDICATE:
+            assumption_symbols.add(args[0])
+        elif predicate == CONTR_PREDICATE:
+            contr_decls.append((line, args))
+        elif predicate == RULE_PREDICATE:
+            rule_decls.append((line, args))
+        else:
+            pref_decls.append((line, predicate, args))
 
-    for decl in assump_decls:
-        # remove spaces
-        cleaned_decl = decl.replace(" ", "")
-        match = re.match(ASSUMP_REGEX, cleaned_decl)
-        if match:
-            symbol = match.group(1)
-            assumptions.add(Sentence(symbol, False))
+    # all Sentences with the same symbol and type are the same object
+    sentences = {}
+    def sentence(symbol, is_contrary):
+        key = (symbol, is_contrary)
+        if key not in sentences:
+            sentences[key] = Sentence(symbol, is_contrary)
+        return sentences[key]
 
-    return assumptions
+    assumptions = set(sentence(symbol, False) for symbol in assumption_symbols)
 
-def generate_contraries_map(contr_decls, assumptions):
-    """
-    :param contr_decls: list of contrary declrations
-    :param assumptions: set of assumptions(Sentences)
-    :return: dictionary mapping symbols of contraries to symbols of assumptions
-    """
-    # maps symbols to contraries
-    map = {}
+    # maps symbols of contraries to symbols of assumptions
+    contr_map = {}
     symbols_seen = set()
-    assumption_symbols = [asm.symbol for asm in assumptions]
-
-    for decl in contr_decls:
-        cleaned_decl = decl.replace(" ", "")
-        match = re.match(CONTR_REGEX, cleaned_decl)
-        if match:
-            sentence = match.group(1)
-            contrary = match.group(2)
-
-            if sentence not in assumption_symbols:
-                raise InvalidContraryDeclarationException("Contraries cannot be declared for non-assumptions!")
-            if contrary in assumption_symbols:
-                raise InvalidContraryDeclarationException("The symbol of an assumption cannot be used as a contrary!")
-
-            if sentence in symbols_seen:
-                raise DuplicateSymbolException("The contrary of an assumption can only be mapped to a single symbol!")
-            if contrary in symbols_seen:
-                raise DuplicateSymbolException("A symbol can only be mapped to the contrary of one assumption!")
-
-            map[contrary] = sentence
-            symbols_seen.add(sentence)
-            symbols_seen.add(contrary)
-
-    return map
+    for line, (symbol, contrary) in contr_decls:
+        if symbol not in assumption_symbols:
+            raise InvalidContraryDeclarationException(
+                LINE_MESSAGE.format(line, "Contraries cannot be declared for non-assumptions!"))
+        if contrary in assumption_symbols:
+            raise InvalidContraryDeclarationException(
+                LINE_MESSAGE.format(line, "The symbol of an assumption cannot be used as a contrary!"))
+
+        if symbol in symbols_seen:
+            raise DuplicateSymbolException(
+                LINE_MESSAGE.format(line, "The contrary of an assumption can only be mapped to a single symbol!"))
+        if contrary in symbols_seen:
+            raise DuplicateSymbolException(
+                LINE_MESSAGE.format(line, "A symbol can only be mapped to the contrary of one assumption!"))
+
+        contr_map[contrary] = symbol
+        symbols_seen.add(symbol)
+        symbols_seen.add(contrary)
+
+    def translate(symbol):
+        if symbol in contr_map:
+            return sentence(contr_map[symbol], True)
+        return sentence(symbol, False)
 
-def generate_rules(rule_decls, map):
-    """
-    :param rule_decls: list of rule declarations
-    :param map: dictionary mapping symbols of contraries to symbols of assumptions
-    :return: set of Rules
-    """
     rules = set()
+    for line, (consequent, antecedent) in rule_decls:
+        rules.add(Rule(set(translate(ant) for ant in antecedent), translate(consequent)))
 
-    for decl in rule_decls:
-        cleaned_decl = decl.replace(" ", "")
-        match = re.match(RULE_REGEX, cleaned_decl)
-        if match:
-            consequent_symbol = match.group(1)
-            consequent = translate_symbol(consequent_symbol, map)
-
-            antecedent = set()
-            if match.group(2) != "":
-                antecedent_symbols = match.group(2).split(",")
-
-                for ant in antecedent_symbols:
-                    antecedent.add(translate_symbol(ant, map))
-
-            rules.add(Rule(antecedent, consequent))
-
-    return rules
-
-def generate_preferences(pref_decls, assumptions):
-    """
-    :param pref_decls: list of preference declarations
-    :param assumptions: set of assumptions(Sentences)
-    :return: set of Preferences
-    """
     preferences = set()
-    assumption_symbols = [asm.symbol for asm in assumptions]
+    for line, predicate, (symbol1, symbol2) in pref_decls:
+        if symbol1 not in assumption_symbols or symbol2 not in assumption_symbols:
+            raise InvalidPreferenceDeclarationException(
+                LINE_MESSAGE.format(line, "Preferences can only be defined for assumptions!"))
+        relation = LESS_THAN if predicate == LT_PREDICATE else LESS_EQUAL
+        preferences.add(Preference(sentence(symbol1, False), sentence(symbol2, False), relation))
 
-    for decl in pref_decls:
-        cleaned_decl = decl.replace(" ", "")
+    return (assumptions, preferences, rules, contr_map)
 
-        relation = NO_RELATION
-        match = re.match(LT_REGEX, cleaned_decl)
-        if match:
-            relation = LESS_THAN
-        else:
-            match = re.match(LE_REGEX, cleaned_decl)
-            if match:
-                relation = LESS_EQUAL
-        if relation != NO_RELATION:
-            sentence_symbol1 = match.group(1)
-            if sentence_symbol1 not in assumption_symbols:
-                raise InvalidPreferenceDeclarationException("Preferences can only be defined for assumptions!")
-            sentence1 = Sentence(sentence_symbol1, False)
-
-            sentence_symbol2 = match.group(2)
-            if sentence_symbol2 not in assumption_symbols:
-                raise InvalidPreferenceDeclarationException("Preferences can only be defined for assumptions!")
-            sentence2 = Sentence(sentence_symbol2, False)
-
-            preferences.add(Preference(sentence1, sentence2, relation))
-
-    return preferences
-
-def translate_symbol(symbol, map):
+def tokenize(input_string):
     """
-    :param symbol: symbol to translate
-    :param map: dictionary mapping symbols of contraries to symbols of assumptions
-    :return: the Sentence that the symbol is mapped to, or a new Sentence with the symbol if unmapped
+    :param input_string: A string defining an ABA+ framework, or a bytes-like object with its UTF-8 encoding
+    :return: generator of tuples with two elements, skipping whitespace and comments:
+             1: punctuation character or symbol (strings)
+             2: number of the line of the token
     """
-    if (symbol in map) and (map[symbol] != DUPLICATE_USE_FOUND):
-        return Sentence(map[symbol], True)
+    line = 1
+    if isinstance(input_string, str):
+        for match in TOKEN_REGEX.finditer(input_string):
+            whitespace, comment, punctuation, symbol = match.groups()
+            if whitespace is not None:
+                line += whitespace.count("\n")
+            elif punctuation is not None:
+                yield (punctuation, line)
+            elif symbol is not None:
+                yield (sys.intern(symbol), line)
     else:
-        return Sentence(symbol, False)
+        for match in TOKEN_BYTES_REGEX.finditer(input_string):
+            whitespace, comment, punctuation, symbol = match.groups()
+            if whitespace is not None:
+                line += whitespace.count(b"\n")
+            elif punctuation is not None:
+                yield (punctuation.decode("ascii"), line)
+            elif symbol is not None:
+                yield (sys.intern(symbol.decode("utf-8")), line)
+
+def parse_declarations(input_string):
+    """
+    parse the declarations of input_string in a single pass, as they are needed
+    :param input_string: A string defining an ABA+ framework, or a bytes-like object with its UTF-8 encoding
+    :return: generator of tuples with three elements:
+             1: number of the line on which the declaration starts
+             2: predicate of the declaration
+             3: list of the arguments, symbols or lists of symbols
+    :raise InvalidDeclarationException: if a declaration is malformed or has an unknown predicate
+    """
+    tokens = tokenize(input_string)
+
+    def next_token(line):
+        token = next(tokens, None)
+        if token is None:
+            raise InvalidDeclarationException(LINE_MESSAGE.format(line, "Unexpected end of input!"))
+        return token
+
+    def unexpected(token, line):
+        return InvalidDeclarationException(LINE_MESSAGE.format(line, "Unexpected '{}'!".format(token)))
+
+    for token, line in tokens:
+        # empty declarations are ignored
+        if token == ".":
+            continue
+        if token in PUNCTUATION:
+            raise unexpected(token, line)
+
+        predicate = token
+        decl_line = line
+        if predicate not in PREDICATE_ARGS:
+            raise InvalidDeclarationException(LINE_MESSAGE.format(line, "Unknown predicate '{}'!".format(predicate)))
+
+        token, line = next_token(line)
+        if token != "(":
+            raise unexpected(token, line)
+
+        args = []
+        while True:
+            token, line = next_token(line)
+            if token == "[":
+                symbols = []
+                token, line = next_token(line)
+                while token != "]":
+                    if token in PUNCTUATION:
+                        raise unexpected(token, line)
+                    symbols.append(token)
+                    token, line = next_token(line)
+                    if token == ",":
+                        token, line = next_token(line)
+                        if token == "]":
+                            raise unexpected(token, line)
+                    elif token != "]":
+                        raise unexpected(token, line)
+                args.append(symbols)
+            elif token in PUNCTUATION:
+                raise unexpected(token, line)
+            else:
+                args.append(token)
+
+            token, line = next_token(line)
+            if token == ")":
+                break
+            if token != ",":
+                raise unexpected(token, line)
+
+        # the final declaration may omit the full stop
+        token = next(tokens, None)
+        if token is not None and token[0] != ".":
+            raise unexpected(token[0], token[1])
+
+        shape = tuple(LIST_ARG if isinstance(arg, list) else SYMBOL_ARG for arg in args)
+        if shape != PREDICATE_ARGS[predicate]:
+            raise InvalidDeclarationException(LINE_MESSAGE.format(
+                decl_line, "Invalid arguments of '{}'!".format(predicate)))
+
+        yield (decl_line, predicate, args)
+
+class InvalidDeclarationException(Exception):
+    def __init__(self, message):
+        self.message = message
 
 class InvalidContraryDeclarationException(Exception):
     def __init__(self, message):
@@ -0,0 +1,254 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+This module contains the full computation performed for an input ABA+ framework: parsing, checking (or
+automatically satisfying) WCP, generating arguments and attacks and calculating the extensions under all semantics,
+or only under the requested ones.
+Results can be cached in a ResultCache under a key that does not depend on the order or formatting of declarations,
+and optionally also under the fingerprint of the framework, which does not depend on the symbols used either.
+Partial results can be reported while the computation is in progress: first the framework with its deductions and
+attacks, then the extensions of each semantics as soon as they are calculated.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from abap_parser import *
+from aspartix_interface import *
+from abap_fingerprint import *
+
+# part of every cache key, increment when the structure of computation results or the keys change
+RESULT_FORMAT_VERSION = "2"
+
+# stage reported with the framework, its deductions and attacks before any extensions are calculated
+FRAMEWORK_STAGE = "framework"
+
+# order in which the extensions of the semantics are reported for results that are already known
+REPORTED_SEMANTICS = [GROUNDED_SEMANTICS, STABLE_SEMANTICS, COMPLETE_SEMANTICS, PREFERRED_SEMANTICS, IDEAL_SEMANTICS]
+
+
+def canonical_declarations(input_string):
+    """
+    :param input_string: A string defining an ABA+ framework
+    :return: sorted list of the distinct declarations in input_string as parsed by parse_declarations(), each
+             written without whitespace or comments, or a list with only input_string if it is malformed
+    """
+    declarations = set()
+    try:
+        for _, predicate, args in parse_declarations(input_string):
+            declarations.add("{}({})".format(predicate, ",".join(
+                "[{}]".format(",".join(arg)) if isinstance(arg, list) else arg for arg in args)))
+    except InvalidDeclarationException:
+        # the computation fails while parsing, so the key only needs to identify the input
+        return [input_string]
+    return sorted(declarations)
+
+
+def framework_key(input_string, auto_WCP=False, semantics=None):
+    """
+    :param input_string: A string defining an ABA+ framework
+    :param auto_WCP: whether WCP is automatically satisfied
+    :param semantics: collection of the semantics calculated, all of them if None
+    :return: hexadecimal hash identifying the computation results for input_string
+    """
+    h = hashlib.sha256()
+    h.update(RESULT_FORMAT_VERSION.encode("utf-8"))
+    h.update(b"\0auto_WCP\0" if auto_WCP else b"\0check_WCP\0")
+    h.update(_semantics_key(semantics))
+    for decl in canonical_declarations(input_string):
+        h.update(decl.encode("utf-8"))
+        h.update(b".")
+    return h.hexdigest()
+
+
+def fingerprint_key(abap_fingerprint, auto_WCP=False, semantics=None):
+    """
+    :param abap_fingerprint: fingerprint of an ABA_Plus object computed by fingerprint()
+    :param auto_WCP: whether WCP is automatically satisfied
+    :param semantics: collection of the semantics calculated, all of them if None
+    :return: hexadecimal hash identifying the computation results for frameworks with that fingerprint
+    """
+    h = hashlib.sha256()
+    h.update(RESULT_FORMAT_VERSION.encode("utf-8"))
+    h.update(b"\0auto_WCP\0" if auto_WCP else b"\0check_WCP\0")
+    h.update(_semantics_key(semantics))
+    h.update(b"\0fingerprint\0")
+    h.update(abap_fingerprint.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _semantics_key(semantics):
+    """
+    :return: bytes identifying the calculated semantics in a key, empty if all of them are calculated, so that the
+             keys of complete results stay the same
+    """
+    if semantics is None or set(semantics) >= set(REPORTED_SEMANTICS):
+        return b""
+    return "\0semantics\0{}\0".format(",".join(sorted(set(semantics)))).encode("utf-8")
+
+
+def parse_framework(input_string, stats=None):
+    """
+    :param input_string: A string defining an ABA+ framework
+    :param stats: Stats into which the parsing and the computations on the framework are recorded, or None
+    :return: tuple with two elements:
+             1: ABA_Plus object
+             2: dictionary mapping symbols of assumptions to symbols of their contraries
+    """
+    res = generate_aba_plus_framework(input_string, stats)
+    #reverse dictionary to map sentences to contraries
+    return (res[0], dict((v, k) for k, v in res[1].items()))
+
+
+def compute_framework(input_string, auto_WCP=False, progress=None, stats=None, semantics=None):
+    """
+    :param input_string: A string defining an ABA+ framework
+    :param auto_WCP: if True, automatically satisfy WCP, otherwise raise WCPViolationException if it is violated
+    :param progress: see compute_parsed_framework()
+    :param stats: see compute_parsed_framework(), the parsing is recorded as well
+    :param semantics: see compute_parsed_framework()
+    :return: see compute_parsed_framework()
+    """
+    abap, contr_map = parse_framework(input_string, stats)
+    return compute_parsed_framework(abap, contr_map, auto_WCP, progress, stats, semantics)
+
+
+def compute_parsed_framework(abap, contr_map, auto_WCP=False, progress=None, stats=None, semantics=None):
+    """
+    :param abap: ABA_Plus object, to which rules are added if auto_WCP is True
+    :param contr_map: dictionary mapping symbols of assumptions to symbols of their contraries
+    :param auto_WCP: if True, automatically satisfy WCP, otherwise raise WCPViolationException if it is violated
+    :param progress: function called with FRAMEWORK_STAGE and the result without 'extensions' once the attacks are
+                     generated, then with each semantics and its extensions as soon as they are calculated, or None
+    :param stats: Stats into which the phases of the computation are recorded, or None to disable instrumentation
+    :param semantics: collection of the semantics whose extensions are calculated, all of them if None
+    :return: dictionary with the following entries:
+             'abap': the ABA_Plus object
+             'contr_map': dictionary mapping symbols of assumptions to symbols of their contraries
+             'rules_added': set of Rules added to satisfy WCP if auto_WCP is True, otherwise None
+             'deductions': set of all Deductions generated
+             'attacks': set of all Attacks generated
+             'extensions': dictionary mapping each of the semantics (by default STABLE_SEMANTICS,
+                           GROUNDED_SEMANTICS, COMPLETE_SEMANTICS, PREFERRED_SEMANTICS and IDEAL_SEMANTICS) to
+                           dictionaries mapping extensions to conclusions
+    """
+    if stats is not None:
+        abap.stats = stats
+    try:
+        return _compute_parsed_framework(abap, contr_map, auto_WCP, progress, semantics)
+    finally:
+        if stats is not None:
+            # the framework is cached with the result, without the stats of this computation
+            del abap.stats
+
+
+def _compute_parsed_framework(abap, contr_map, auto_WCP, progress, semantics):
+    rules_added = abap.check_or_auto_WCP(auto_WCP=auto_WCP)
+
+    res = abap.generate_arguments_and_attacks_for_contraries()
+    attacks = res[1]
+    deductions = res[2]
+
+    result = {'abap': abap, 'contr_map': contr_map, 'rules_added': rules_added,
+              'deductions': deductions, 'attacks': attacks}
+    if progress is not None:
+        progress(FRAMEWORK_STAGE, dict(result))
+
+    asp = ASPARTIX_Interface(abap)
+    fd, solver_input = tempfile.mkstemp(suffix=".lp")
+    os.close(fd)
+    try:
+        asp.generate_input_file_for_clingo(solver_input)
+        result['extensions'] = asp.calculate_all_arguments_extensions(solver_input, progress=progress,
+                                                                      semantics=semantics)
+    finally:
+        os.remove(solver_input)
+
+    return result
+
+
+def report_result(result, progress):
+    """
+    report a complete result to progress in the same stages as compute_parsed_framework()
+    """
+    framework = dict(result)
+    del framework['extensions']
+    progress(FRAMEWORK_STAGE, framework)
+    for semantics in REPORTED_SEMANTICS:
+        if semantics in result['extensions']:
+            progress(semantics, result['extensions'][semantics])
+
+
+def compute_framework_cached(input_string, auto_WCP=False, cache=None, rename_invariant=False, progress=None,
+                             stats=None, semantics=None):
+    """
+    like compute_framework(), but look up the results in cache first and store newly computed results there
+    :param cache: ResultCache, or None to always compute
+    :param rename_invariant: if True, also reuse the results of frameworks that only differ in their symbols
+    :param progress: see compute_parsed_framework(), cached results are reported at once
+    :param stats: see compute_framework(), results found in cache are counted as CACHE_HITS
+    :param semantics: see compute_parsed_framework(), cached results of all semantics are reused for any semantics
+    """
+    if cache is None:
+        return compute_framework(input_string, auto_WCP, progress, stats, semantics)
+
+    key = framework_key(input_string, auto_WCP, semantics)
+    result = _cache_get(cache, key, framework_key(input_string, auto_WCP))
+    if result is not None:
+        if stats is not None:
+            stats.count(CACHE_HITS)
+        if progress is not None:
+            report_result(result, progress)
+        return result
+
+    abap, contr_map = parse_framework(input_string, stats)
+
+    if rename_invariant:
+        # fingerprint before rules are added to satisfy WCP
+        abap_fingerprint, renaming = fingerprint(abap, rename_invariant=True)
+        renamed_key = fingerprint_key(abap_fingerprint, auto_WCP, semantics)
+        renamed_result = _cache_get(cache, renamed_key, fingerprint_key(abap_fingerprint, auto_WCP))
+        if renamed_result is not None:
+            result = rename_sentences(renamed_result, invert_renaming(renaming))
+            result['contr_map'] = contr_map
+            cache.put(key, result)
+            if stats is not None:
+                stats.count(CACHE_HITS)
+            if progress is not None:
+                report_result(result, progress)
+            return result
+
+    result = compute_parsed_framework(abap, contr_map, auto_WCP, progress, stats, semantics)
+    cache.put(key, result)
+
+    if rename_invariant:
+        renamed_result = rename_sentences(result, renaming)
+        renamed_result['contr_map'] = {}
+        cache.put(renamed_key, renamed_result)
+
+    return result
+
+
+def _cache_get(cache, key, complete_key):
+    """
+    :param key: key of the results of the requested semantics
+    :param complete_key: key of the results of all semantics, which include those of the requested semantics
+    :return: the results cached under key or complete_key, None if there are none
+    """
+    result = cache.get(key)
+    if result is None and complete_key != key:
+        result = cache.get(complete_key)
+    return result
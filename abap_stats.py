@@ -0,0 +1,304 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+This module contains a class Stats recording the time spent in each phase of a computation and counters of the work
+done in them. Instrumentation is opt-in: ABA_Plus and ASPARTIX_Interface record into NO_STATS, which discards
+everything, unless a Stats object is attached to the framework.
+Phases may be nested, e.g. the generation of arguments and attacks is also timed within the encoding for the solver,
+so the times of the phases do not add up to the total time.
+MemoryStats additionally traces the memory allocated by Python with tracemalloc, recording the peak and retained
+bytes of each phase and the sites allocating the most memory in the outermost phases, and aborts the computation with
+a MemoryBudgetExceededException once the traced memory exceeds a budget. Memory allocated by solver processes is not
+traced.
+"""
+
+import time
+import tracemalloc
+
+PARSE_PHASE = "parse"
+VALIDATION_PHASE = "validate"
+CLOSURE_PHASE = "calc_transitive_closure"
+WCP_PHASE = "check_WCP"
+AUTO_WCP_PHASE = "check_and_partially_satisfy_WCP"
+ARGUMENTS_PHASE = "generate_arguments_and_attacks"
+ENCODING_PHASE = "encode"
+SOLVING_PHASE = "solve"
+DECODING_PHASE = "decode"
+DERIVATION_PHASE = "derive_extensions"
+CONCLUSIONS_PHASE = "conclusions"
+
+RULES_FIRED = "rules_fired"
+SUPPORT_SETS = "support_sets_generated"
+SET_COMBINATIONS = "set_combinations_produced"
+DEDUCTIONS = "deductions_generated"
+ATTACKS = "attacks_derived"
+PREFERENCES_CLOSED = "preferences_after_closure"
+RULES_ADDED = "rules_added"
+SOLVER_CALLS = "solver_calls"
+MODELS_READ = "solver_models_read"
+BYTES_WRITTEN = "bytes_written"
+BYTES_READ = "bytes_read"
+CACHE_HITS = "result_cache_hits"
+
+# number of allocation sites recorded for each phase
+DEFAULT_TOP_SITES = 10
+
+
+class Stats:
+    def __init__(self):
+        # maps phases to the total number of seconds spent in them
+        self.timers = {}
+        # maps phases to the number of times they were entered
+        self.calls = {}
+        # maps counter names to their values
+        self.counters = {}
+
+    def phase(self, name):
+        """
+        :return: context manager adding the time spent in it to the phase name
+        """
+        return _Timer(self, name)
+
+    def add_time(self, name, seconds):
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name, n=1):
+        """
+        add n to the counter name
+        """
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def check_memory(self):
+        """
+        called regularly by loops that may allocate a lot of memory, see MemoryStats
+        """
+        pass
+
+    def to_dict(self):
+        """
+        :return: dictionary with the entries 'timers', 'calls' and 'counters', which can be serialised as JSON
+        """
+        return {'timers': dict(self.timers), 'calls': dict(self.calls), 'counters': dict(self.counters)}
+
+    def __str__(self):
+        lines = ["{}: {:.6f}s ({} calls)".format(name, seconds, self.calls[name])
+                 for name, seconds in sorted(self.timers.items(), key=lambda item: -item[1])]
+        lines.extend("{}: {}".format(name, value) for name, value in sorted(self.counters.items()))
+        return "\n".join(lines)
+
+
+class MemoryStats(Stats):
+    def __init__(self, budget=None, top_sites=DEFAULT_TOP_SITES):
+        """
+        tracing starts when the first phase is entered, unless start() is called before
+        :param budget: maximum number of bytes traced at any time, no limit if None
+        :param top_sites: number of allocation sites recorded for each outermost phase, 0 to record none
+        """
+        super(MemoryStats, self).__init__()
+        self.budget = budget
+        self.top_sites = top_sites
+        # maps phases to the maximum number of bytes allocated in addition to those traced when they were entered
+        self.peaks = {}
+        # maps phases to the total number of bytes still allocated when they were left
+        self.retained = {}
+        # maps phases to dictionaries mapping allocation sites ("file:line") to the bytes retained by them
+        self.sites = {}
+        # the phases entered and not yet left, innermost last
+        self._stack = []
+        self._started = False
+
+    def start(self):
+        """
+        start tracing the memory allocations, if they are not traced yet
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+
+    def stop(self):
+        """
+        stop tracing the memory allocations, if the tracing was started by this MemoryStats
+        """
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def phase(self, name):
+        """
+        :return: context manager adding the time spent and the memory allocated in it to the phase name
+        :raise MemoryBudgetExceededException: on entering, if the traced memory exceeds the budget
+        """
+        return _MemoryTimer(self, name)
+
+    def count(self, name, n=1):
+        """
+        add n to the counter name
+        :raise MemoryBudgetExceededException: if the traced memory exceeds the budget
+        """
+        super(MemoryStats, self).count(name, n)
+        self.check_memory()
+
+    def check_memory(self):
+        """
+        :raise MemoryBudgetExceededException: if the traced memory exceeds the budget
+        """
+        if self.budget is None:
+            return
+        current = tracemalloc.get_traced_memory()[0]
+        if current > self.budget:
+            phase = self._stack[-1].name if self._stack else None
+            raise MemoryBudgetExceededException(
+                "The computation exceeded its memory budget of {} bytes with {} bytes allocated (phase: {})!".format(
+                    self.budget, current, phase))
+
+    def _enter(self, name):
+        self.start()
+        snapshot = None
+        if not self._stack and self.top_sites > 0:
+            snapshot = _take_snapshot()
+
+        current, peak = tracemalloc.get_traced_memory()
+        # the peak is reset for the new phase, the phases around it keep the peak reached so far
+        for outer in self._stack:
+            outer.peak = max(outer.peak, peak)
+        tracemalloc.reset_peak()
+        self._stack.append(_PhaseMemory(name, current, snapshot))
+        try:
+            self.check_memory()
+        except MemoryBudgetExceededException:
+            # the phase is not left if entering it fails
+            self._stack.pop()
+            raise
+
+    def _leave(self):
+        phase = self._stack.pop()
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(phase.peak, peak)
+        for outer in self._stack:
+            outer.peak = max(outer.peak, peak)
+
+        self.peaks[phase.name] = max(self.peaks.get(phase.name, 0), peak - phase.start)
+        self.retained[phase.name] = self.retained.get(phase.name, 0) + current - phase.start
+
+        if phase.snapshot is not None:
+            sites = self.sites.setdefault(phase.name, {})
+            for difference in _take_snapshot().compare_to(phase.snapshot, 'lineno'):
+                if difference.size_diff > 0:
+                    frame = difference.traceback[0]
+                    site = "{}:{}".format(frame.filename, frame.lineno)
+                    sites[site] = sites.get(site, 0) + difference.size_diff
+            top = sorted(sites.items(), key=lambda item: -item[1])[:self.top_sites]
+            self.sites[phase.name] = dict(top)
+
+    def to_dict(self):
+        """
+        :return: dictionary like Stats.to_dict() with the additional entry 'memory' mapping phases to dictionaries
+                 with the entries 'peak', 'retained' and 'sites', a list of allocation sites and the bytes retained
+                 by them, most bytes first
+        """
+        res = super(MemoryStats, self).to_dict()
+        res['memory'] = dict((name, {'peak': self.peaks[name], 'retained': self.retained[name],
+                                     'sites': sorted(self.sites.get(name, {}).items(), key=lambda item: -item[1])})
+                             for name in self.peaks)
+        return res
+
+    def __str__(self):
+        lines = [super(MemoryStats, self).__str__()]
+        for name, peak in sorted(self.peaks.items(), key=lambda item: -item[1]):
+            lines.append("{}: peak {} bytes, retained {} bytes".format(name, peak, self.retained[name]))
+            for site, size in sorted(self.sites.get(name, {}).items(), key=lambda item: -item[1]):
+                lines.append("    {}: {} bytes".format(site, size))
+        return "\n".join(lines)
+
+
+class NullStats:
+    """
+    Stats recording nothing, used while instrumentation is disabled
+    """
+    def phase(self, name):
+        return _NULL_TIMER
+
+    def add_time(self, name, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def check_memory(self):
+        pass
+
+    def __bool__(self):
+        return False
+
+
+class _Timer:
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _MemoryTimer(_Timer):
+    def __enter__(self):
+        self.stats._enter(self.name)
+        return super(_MemoryTimer, self).__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super(_MemoryTimer, self).__exit__(exc_type, exc_value, traceback)
+        self.stats._leave()
+        return False
+
+
+class _PhaseMemory:
+    def __init__(self, name, start, snapshot):
+        self.name = name
+        # number of bytes traced when the phase was entered
+        self.start = start
+        # highest number of bytes traced in the phase before the peak was last reset
+        self.peak = start
+        # snapshot taken when the phase was entered, None if the allocation sites are not recorded
+        self.snapshot = snapshot
+
+
+def _take_snapshot():
+    # the memory allocated by tracemalloc and for recording the stats is left out
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                                      tracemalloc.Filter(False, __file__)])
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+NO_STATS = NullStats()
+
+
+class MemoryBudgetExceededException(Exception):
+    def __init__(self, message):
+        self.message = message
@@ -17,10 +17,13 @@ This module contains a class ASPARTIX_Interface that acts as an interface betwee
 ASP solvers, thus enabling the computation of extensions under various semantics.
 """
 
-import subprocess
 import re
 import sys
 import os
+import functools as ft
+
+from solver_backends import *
+from abap_stats import *
 
 from sys import platform as _platform
 
@@ -47,6 +50,32 @@ COMPLETE_FILE = "comp.dl"
 PREFERRED_FILE = "prefex_gringo.lp"
 GROUNDED_FILE = "ground.dl"
 
+ADMISSIBLE_SEMANTICS = "admissible"
+STABLE_SEMANTICS = "stable"
+GROUNDED_SEMANTICS = "grounded"
+COMPLETE_SEMANTICS = "complete"
+PREFERRED_SEMANTICS = "preferred"
+IDEAL_SEMANTICS = "ideal"
+
+# maximum number of complete extensions from which the other semantics are derived in
+# calculate_all_arguments_extensions(), above it each semantics is solved separately
+COMPLETE_DERIVATION_LIMIT = 1000
+
+ASPARTIX_BACKEND = "aspartix"
+DLV_BACKEND = "dlv"
+
+register_backend(AnswerSetBackend(ASPARTIX_BACKEND, [CLINGO, "{input}", "{task}", "0"],
+                                  {ADMISSIBLE_SEMANTICS: os.path.join(MODULE_DIR, ADMISSIBLE_FILE),
+                                   STABLE_SEMANTICS: os.path.join(MODULE_DIR, STABLE_FILE),
+                                   GROUNDED_SEMANTICS: os.path.join(MODULE_DIR, GROUNDED_FILE),
+                                   COMPLETE_SEMANTICS: os.path.join(MODULE_DIR, COMPLETE_FILE),
+                                   PREFERRED_SEMANTICS: os.path.join(MODULE_DIR, PREFERRED_FILE)},
+                                  CLINGO_ANSWER, CLINGO_REGEX))
+register_backend(AnswerSetBackend(DLV_BACKEND, [os.path.join(MODULE_DIR, DLV), "{input}", "{task}",
+                                                "-filter=ideal", "-n=1"],
+                                  {IDEAL_SEMANTICS: os.path.join(MODULE_DIR, IDEAL_FILE)},
+                                  DLV_ANSWER, DLV_IDEAL_REGEX, SUCCESS_EXIT_CODES))
+
 
 
 class ASPARTIX_Interface:
@@ -55,38 +84,114 @@ class ASPARTIX_Interface:
         :param aba_plus: ABA_Plus object for which the calculation of extensions are performed
         """
         self.aba_plus = aba_plus
+        #maps assumptions to their bit in the keys of self.conclusions_cache
+        self.assumption_indices = dict((asm, idx) for idx, asm in enumerate(aba_plus.assumptions))
+        #maps bitmasks of sets of assumptions to the set of their conclusions
+        self.conclusions_cache = {}
+
+    @property
+    def stats(self):
+        """
+        Stats of the ABA+ framework, into which the calculations of extensions are recorded as well
+        """
+        return self.aba_plus.stats
 
     def generate_input_file_for_clingo(self, filename):
         """
         generate from the ABA+ framework (self.aba_plus) an input file that can be fed into an ASP solver
         :param filename: save generated file under filename
         """
+        with self.stats.phase(ENCODING_PHASE):
+            self._generate_input_file_for_clingo(filename)
+
+    def _generate_input_file_for_clingo(self, filename):
         res = self.aba_plus.generate_arguments_and_attacks_for_contraries()
         deductions = res[2]
+
+        #rules may have changed since the conclusions were cached
+        self.conclusions_cache = {}
         attacks = res[1]
 
-        #maps arguments to indices, which are used to represent the arguments in the input file
+        #maps indices to arguments, which are used to represent the arguments in the input file
         self.arguments = []
+        #maps arguments to their indices in self.arguments
+        self.argument_indices = {}
         for deduction in deductions:
-            if deduction.premise not in self.arguments:
-                self.arguments.append(deduction.premise)
+            premise = frozenset(deduction.premise)
+            if premise not in self.argument_indices:
+                self.argument_indices[premise] = len(self.arguments)
+                self.arguments.append(premise)
 
         self.attacks = set()
         for atk in attacks:
             self.attacks.add((frozenset(atk.attacker.premise),
                               frozenset(atk.attackee.premise)))
 
+        #maps indices of arguments to lists of the indices of the arguments they attack
+        self.attacked_lists = [[] for _ in range(0, len(self.arguments))]
+        #maps indices of arguments to lists of the indices of the arguments attacking them
+        self.attacker_lists = [[] for _ in range(0, len(self.arguments))]
+        facts = ["arg({}).\n".format(idx) for idx in range(0, len(self.arguments))]
+        for atk in self.attacks:
+            idx_attacker = self.argument_indices[atk[0]]
+            idx_attackee = self.argument_indices[atk[1]]
+            self.attacked_lists[idx_attacker].append(idx_attackee)
+            self.attacker_lists[idx_attackee].append(idx_attacker)
+            facts.append("att({}, {}).\n".format(idx_attacker, idx_attackee))
+
+        content = "".join(facts)
         f = open(filename, 'w')
+        f.write(content)
+        f.close()
+        self.stats.count(BYTES_WRITTEN, len(content))
 
-        for idx in range(0, len(self.arguments)):
-            f.write("arg({}).\n".format(idx))
+    def attack_index_pairs(self):
+        """
+        :return: generator of pairs (index of attacker, index of attackee) for all attacks between arguments
+        """
+        for idx_attacker, attacked in enumerate(self.attacked_lists):
+            for idx_attackee in sorted(attacked):
+                yield (idx_attacker, idx_attackee)
 
-        for atk in self.attacks:
-            idx_attacker = self.arguments.index(atk[0])
-            idx_attackee = self.arguments.index(atk[1])
-            f.write("att({}, {}).\n".format(idx_attacker, idx_attackee))
+    def export_attack_graph(self, filename, input_format=APX_FORMAT):
+        """
+        write the attack graph built by generate_input_file_for_clingo() in the given format
+        :param filename: save the attack graph under filename
+        :param input_format: APX_FORMAT, TGF_FORMAT or ASPARTIX_FORMAT
+        """
+        export_graph(filename, len(self.arguments), self.attack_index_pairs(), input_format)
 
-        f.close()
+    def decode_answer(self, answer, regex):
+        """
+        :param answer: a single answer set as output by an ASP solver
+        :param regex: regular expression matching the answer symbols
+        :return: set of Sentences(assumptions) in the union of the premises of the arguments in answer
+        """
+        extension = set()
+        for m in re.findall(regex, answer):
+            extension.update(self.arguments[int(m)])
+        return extension
+
+    def decode_answer_mask(self, answer, regex):
+        """
+        :param answer: a single answer set as output by an ASP solver
+        :param regex: regular expression matching the answer symbols
+        :return: bitmask over the indices of the arguments in answer
+        """
+        mask = 0
+        for m in re.findall(regex, answer):
+            mask |= 1 << int(m)
+        return mask
+
+    def mask_to_extension(self, mask):
+        """
+        :param mask: bitmask over the indices of arguments
+        :return: set of Sentences(assumptions) in the union of the premises of the arguments in mask
+        """
+        extension = set()
+        for idx in _bit_indices(mask):
+            extension.update(self.arguments[idx])
+        return extension
 
     def calculate_admissible_extensions(self, input_filename):
         """
@@ -110,7 +215,10 @@ class ASPARTIX_Interface:
                                the file will be fed into an ASP solver
         :return: the set of ideal sets of Sentences(assumptions) under the ABA+ framework (self.aba_plus)
         """
-        return self.calculate_extensions(DLV_IDEAL_COMMAND, input_filename, IDEAL_FILE, DLV_ANSWER, DLV_IDEAL_REGEX)
+        preferred_masks = self.solve_masks(input_filename, PREFERRED_FILE)
+        if not preferred_masks:
+            return set()
+        return {frozenset(self.mask_to_extension(self.ideal_mask(preferred_masks)))}
 
     def calculate_complete_extensions(self, input_filename):
         """
@@ -136,8 +244,7 @@ class ASPARTIX_Interface:
         """
         return self.calculate_extensions(CLINGO_COMMAND, input_filename, GROUNDED_FILE, CLINGO_ANSWER, CLINGO_REGEX)
 
-    subprocess_has_run = hasattr(subprocess, 'run')
-    def calculate_extensions(self, command, input_filename, encoding_filename, answer_header, regex):
+    def solve(self, command, input_filename, encoding_filename, answer_header):
         """
         :param command: command to run the desired ASP solver. If the command is
           DLV, the executable should be in this MODULE_DIR.
@@ -146,46 +253,56 @@ class ASPARTIX_Interface:
         :param encoding_filename: name of the file that encodes the desired semantics, which should
           not contain spaces, and which should be in this MODULE_DIR.
         :param answer_header: answer head that the desired solver outputs
-        :param regex: regular expression matching the answer symbols
-        :return: the set of sets of Sentences(assumptions) under the semantics encoded by encoding_filename
+        :return: list of the answer sets output by the solver, as strings
+        :raise SolverFailedException: if the solver fails
         """
-
         args = command.format(input_filename, encoding_filename).split(" ")
         args[args.index(encoding_filename)] = os.path.join(MODULE_DIR, encoding_filename)
+        backend = get_backend(ASPARTIX_BACKEND)
         if DLV in args:
             args[args.index(DLV)] = os.path.join(MODULE_DIR, DLV)
+            backend = get_backend(DLV_BACKEND)
 
-        if ASPARTIX_Interface.subprocess_has_run:
-            #for python 3.5 and later:
-            res = subprocess.run(args,
-                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                 universal_newlines=True)
-
-            if answer_header not in res.stdout:
-                return set()
-
-
-            results = res.stdout.split(answer_header)
-        else:
-            res = subprocess.Popen(args,
-                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            output = res.stdout.read().decode("utf-8")
+        with self.stats.phase(SOLVING_PHASE):
+            output = run_solver(args, backend.is_complete)
+        self.stats.count(SOLVER_CALLS)
+        self.stats.count(BYTES_READ, len(output))
 
-            if answer_header not in output:
-                return set()
+        if answer_header not in output:
+            return []
 
+        answers = output.split(answer_header)[1:]
+        self.stats.count(MODELS_READ, len(answers))
+        return answers
 
-            results = output.split(answer_header)
+    def solve_masks(self, input_filename, encoding_filename):
+        """
+        :param input_filename: name of the file generated by generate_input_file_for_clingo(),
+                               the file will be fed into clingo
+        :param encoding_filename: name of the ASPARTIX encoding of the desired semantics for clingo
+        :return: list of bitmasks representing the answer sets (sets of arguments) output by clingo
+        """
+        answers = self.solve(CLINGO_COMMAND, input_filename, encoding_filename, CLINGO_ANSWER)
+        with self.stats.phase(DECODING_PHASE):
+            return [self.decode_answer_mask(answer, CLINGO_REGEX) for answer in answers]
 
+    def calculate_extensions(self, command, input_filename, encoding_filename, answer_header, regex):
+        """
+        :param command: command to run the desired ASP solver. If the command is
+          DLV, the executable should be in this MODULE_DIR.
+        :param input_filename: name of the file generated by generate_input_file_for_clingo(),
+                               the file will be fed into the desired ASP solver
+        :param encoding_filename: name of the file that encodes the desired semantics, which should
+          not contain spaces, and which should be in this MODULE_DIR.
+        :param answer_header: answer head that the desired solver outputs
+        :param regex: regular expression matching the answer symbols
+        :return: the set of sets of Sentences(assumptions) under the semantics encoded by encoding_filename
+        """
         extension_sets = set()
-        answer_sets = results[1:len(results)+1]
-        for answer in answer_sets:
-            matches = re.findall(regex, answer)
-            extension = set()
-            for m in matches:
-                arg = self.arguments[int(m)]
-                extension = extension.union(arg)
-            extension_sets.add(frozenset(extension))
+        answers = self.solve(command, input_filename, encoding_filename, answer_header)
+        with self.stats.phase(DECODING_PHASE):
+            for answer in answers:
+                extension_sets.add(frozenset(self.decode_answer(answer, regex)))
 
         return extension_sets
 
@@ -211,7 +328,10 @@ class ASPARTIX_Interface:
                                the file will be fed into an ASP solver
         :return: dictionary mapping ideal sets under self.abap_plus to their conclusions
         """
-        return self.calculate_arguments_extensions(DLV_IDEAL_COMMAND, input_filename, IDEAL_FILE, DLV_ANSWER, DLV_IDEAL_REGEX)
+        preferred_masks = self.solve_masks(input_filename, PREFERRED_FILE)
+        if not preferred_masks:
+            return {}
+        return self.masks_to_arguments_extensions([self.ideal_mask(preferred_masks)])
 
     def calculate_complete_arguments_extensions(self, input_filename):
         """
@@ -251,36 +371,247 @@ class ASPARTIX_Interface:
 
         """
 
-        args = command.format(input_filename, encoding_filename).split(" ")
-        args[args.index(encoding_filename)] = os.path.join(MODULE_DIR, encoding_filename)
-        if DLV in args:
-            args[args.index(DLV)] = os.path.join(MODULE_DIR, DLV)
+        # maps sets of sentences to sets of conclusions
+        extension_dict = {}
+        answers = self.solve(command, input_filename, encoding_filename, answer_header)
+        with self.stats.phase(DECODING_PHASE):
+            for answer in answers:
+                self._add_arguments_extension(extension_dict, self.decode_answer(answer, regex))
+        return extension_dict
 
-        res = subprocess.Popen(args,
-                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        output = res.stdout.read().decode("utf-8")
+    def _add_arguments_extension(self, extension_dict, extension):
+        """
+        add extension and its conclusions to extension_dict, merging with the conclusions already recorded
+        :param extension_dict: dictionary mapping sets of Sentences to their conclusions
+        :param extension: set of Sentences(assumptions)
+        """
+        conclusions = self.conclusions(extension)
+        extension = frozenset(extension)
+        if extension in extension_dict:
+            extension_dict[extension] = extension_dict[extension].union(conclusions)
+        else:
+            extension_dict[extension] = conclusions
 
-        if answer_header not in output:
-            return {}
+    def conclusions(self, extension):
+        """
+        :param extension: set of Sentences(assumptions)
+        :return: frozenset of all Sentences that can be derived from extension,
+                 cached across all semantics calculated by this object
+        """
+        key = 0
+        for asm in extension:
+            key |= 1 << self.assumption_indices[asm]
 
-        results = output.split(answer_header)
+        if key not in self.conclusions_cache:
+            with self.stats.phase(CONCLUSIONS_PHASE):
+                self.conclusions_cache[key] = frozenset(self.aba_plus.generate_all_deductions(set(extension)))
+        return self.conclusions_cache[key]
 
-        # maps sets of sentences to sets of conclusions
+    def masks_to_arguments_extensions(self, masks):
+        """
+        :param masks: collection of bitmasks over the indices of arguments
+        :return: dictionary mapping the sets of Sentences represented by masks to their conclusions
+        """
         extension_dict = {}
-        answer_sets = results[1:len(results)+1]
-        for answer in answer_sets:
-            matches = re.findall(regex, answer)
-            extension = set()
-            conclusions = set()
-            for m in matches:
-                arg = self.arguments[int(m)]
-                extension = extension.union(arg)
-            conclusions = self.aba_plus.generate_all_deductions(extension)
-            extension = frozenset(extension)
-            if extension in extension_dict:
-                extension_dict[extension] =  extension_dict[extension].union(conclusions)
-            else:
-                extension_dict[extension] = conclusions
+        with self.stats.phase(DECODING_PHASE):
+            for mask in masks:
+                self._add_arguments_extension(extension_dict, self.mask_to_extension(mask))
         return extension_dict
 
-
+    def calculate_backend_arguments_extensions(self, backend_name, semantics, input_filename):
+        """
+        :param backend_name: name of a registered SolverBackend
+        :param semantics: semantics under which the extensions are computed
+        :param input_filename: name of the file generated by generate_input_file_for_clingo(), or by
+                               export_attack_graph() in the input format of the backend
+        :return: dictionary mapping sets under semantics to their conclusions
+        """
+        with self.stats.phase(SOLVING_PHASE):
+            masks = get_backend(backend_name).solve_masks(input_filename, semantics)
+        self.stats.count(SOLVER_CALLS)
+        self.stats.count(MODELS_READ, len(masks))
+        return self.masks_to_arguments_extensions(masks)
+
+    def calculate_portfolio_arguments_extensions(self, portfolio, semantics, input_files, timeout=None):
+        """
+        :param portfolio: Portfolio racing its backends
+        :param semantics: semantics under which the extensions are computed
+        :param input_files: dictionary mapping input formats to files written by generate_input_file_for_clingo()
+                            (ASPARTIX_FORMAT) or export_attack_graph()
+        :param timeout: maximum number of seconds to wait for a complete answer, no limit if None
+        :return: dictionary mapping sets under semantics to their conclusions
+        """
+        with self.stats.phase(SOLVING_PHASE):
+            masks = portfolio.solve_masks(input_files, semantics, timeout)[1]
+        self.stats.count(SOLVER_CALLS)
+        self.stats.count(MODELS_READ, len(masks))
+        return self.masks_to_arguments_extensions(masks)
+
+    def calculate_all_arguments_extensions(self, input_filename, derivation_limit=COMPLETE_DERIVATION_LIMIT,
+                                           progress=None, semantics=None):
+        """
+        enumerate the complete extensions with a single solver call and derive the stable, grounded,
+        preferred and ideal extensions from them
+        if there are more than derivation_limit complete extensions, or if the complete extensions are not requested,
+        the other semantics are solved separately
+        :param input_filename: name of the file generated by generate_input_file_for_clingo(),
+                               the file will be fed into an ASP solver
+        :param derivation_limit: maximum number of complete extensions to derive the other semantics from
+        :param progress: function called with each semantics and its extensions as soon as they are calculated,
+                         the grounded extension first, or None
+        :param semantics: collection of the semantics to calculate, all of them if None
+        :return: dictionary mapping each of the semantics (by default STABLE_SEMANTICS, GROUNDED_SEMANTICS,
+                 COMPLETE_SEMANTICS, PREFERRED_SEMANTICS and IDEAL_SEMANTICS) to dictionaries mapping their
+                 extensions to conclusions
+        """
+        res = {}
+
+        def requested(s):
+            return semantics is None or s in semantics
+
+        def report(s, masks):
+            res[s] = self.masks_to_arguments_extensions(masks)
+            if progress is not None:
+                progress(s, res[s])
+
+        # the grounded extension needs no solver call
+        if requested(GROUNDED_SEMANTICS):
+            with self.stats.phase(DERIVATION_PHASE):
+                grounded = self.grounded_mask()
+            report(GROUNDED_SEMANTICS, [grounded])
+
+        if requested(COMPLETE_SEMANTICS):
+            complete_masks = self.solve_masks(input_filename, COMPLETE_FILE)
+            if len(complete_masks) <= derivation_limit:
+                with self.stats.phase(DERIVATION_PHASE):
+                    derived = self.derive_from_complete_masks(complete_masks)
+                for s in [STABLE_SEMANTICS, COMPLETE_SEMANTICS, PREFERRED_SEMANTICS, IDEAL_SEMANTICS]:
+                    if requested(s):
+                        report(s, derived[s])
+                return res
+            report(COMPLETE_SEMANTICS, complete_masks)
+
+        if requested(STABLE_SEMANTICS):
+            report(STABLE_SEMANTICS, self.solve_masks(input_filename, STABLE_FILE))
+        if requested(PREFERRED_SEMANTICS) or requested(IDEAL_SEMANTICS):
+            preferred_masks = self.solve_masks(input_filename, PREFERRED_FILE)
+            if requested(PREFERRED_SEMANTICS):
+                report(PREFERRED_SEMANTICS, preferred_masks)
+            if requested(IDEAL_SEMANTICS):
+                with self.stats.phase(DERIVATION_PHASE):
+                    ideal = [self.ideal_mask(preferred_masks)] if preferred_masks else []
+                report(IDEAL_SEMANTICS, ideal)
+        return res
+
+    def grounded_mask(self):
+        """
+        calculate the grounded extension by labelling arguments IN once all their attackers are OUT and OUT once
+        they are attacked by an argument labelled IN, in time linear in the number of arguments and attacks
+        :return: bitmask representing the grounded extension
+        """
+        # maps indices of arguments to the number of their attackers not labelled OUT
+        undefeated = [0] * len(self.arguments)
+        for attacked in self.attacked_lists:
+            for idx in attacked:
+                undefeated[idx] += 1
+
+        grounded = [idx for idx, count in enumerate(undefeated) if count == 0]
+        out = [False] * len(self.arguments)
+        position = 0
+        while position < len(grounded):
+            for idx_attackee in self.attacked_lists[grounded[position]]:
+                if out[idx_attackee]:
+                    continue
+                out[idx_attackee] = True
+                for idx in self.attacked_lists[idx_attackee]:
+                    undefeated[idx] -= 1
+                    if undefeated[idx] == 0:
+                        grounded.append(idx)
+            position += 1
+
+        return _indices_to_mask(grounded, len(self.arguments))
+
+    def derive_from_complete_masks(self, complete_masks):
+        """
+        :param complete_masks: list of bitmasks representing all complete extensions (sets of arguments)
+        :return: dictionary mapping STABLE_SEMANTICS, GROUNDED_SEMANTICS, COMPLETE_SEMANTICS,
+                 PREFERRED_SEMANTICS and IDEAL_SEMANTICS to lists of bitmasks representing their extensions
+        """
+        if not complete_masks:
+            return {STABLE_SEMANTICS: [], GROUNDED_SEMANTICS: [], COMPLETE_SEMANTICS: [],
+                    PREFERRED_SEMANTICS: [], IDEAL_SEMANTICS: []}
+
+        all_arguments = (1 << len(self.arguments)) - 1
+
+        # the grounded extension is the least complete extension
+        grounded = ft.reduce(lambda x, y: x & y, complete_masks)
+
+        # preferred extensions are the maximal complete extensions
+        preferred = []
+        for mask in sorted(complete_masks, key=_popcount, reverse=True):
+            if not any(mask & pref == mask for pref in preferred):
+                preferred.append(mask)
+
+        # stable extensions are the complete extensions attacking every argument outside them
+        stable = [mask for mask in complete_masks if mask | self._attacked_by(mask) == all_arguments]
+
+        return {STABLE_SEMANTICS: stable, GROUNDED_SEMANTICS: [grounded], COMPLETE_SEMANTICS: complete_masks,
+                PREFERRED_SEMANTICS: preferred, IDEAL_SEMANTICS: [self.ideal_mask(preferred)]}
+
+    def ideal_mask(self, preferred_masks):
+        """
+        calculate the ideal extension, i.e. the maximal admissible set contained in every preferred extension,
+        by removing arguments that are not defended until the remaining set is admissible
+        :param preferred_masks: list of bitmasks representing all preferred extensions (sets of arguments)
+        :return: bitmask representing the ideal extension
+        """
+        if not preferred_masks:
+            return 0
+
+        ideal = set(_bit_indices(ft.reduce(lambda x, y: x & y, preferred_masks)))
+        while True:
+            defeated = set()
+            for idx in ideal:
+                defeated.update(self.attacked_lists[idx])
+            undefended = [idx for idx in ideal
+                          if any(idx_attacker not in defeated for idx_attacker in self.attacker_lists[idx])]
+            if not undefended:
+                return _indices_to_mask(ideal, len(self.arguments))
+            ideal.difference_update(undefended)
+
+    def _attacked_by(self, mask):
+        """
+        :param mask: bitmask over the indices of arguments
+        :return: bitmask of all arguments attacked by some argument in mask
+        """
+        attacked = []
+        for idx in _bit_indices(mask):
+            attacked.extend(self.attacked_lists[idx])
+        return _indices_to_mask(attacked, len(self.arguments))
+
+
+def _popcount(mask):
+    return bin(mask).count("1")
+
+def _bit_indices(mask):
+    """
+    :param mask: bitmask
+    :return: generator of the indices of the bits set in mask, in ascending order
+    """
+    # shifting a big int copies it, so the bits are read from its bytes instead
+    for byte_idx, byte in enumerate(mask.to_bytes((mask.bit_length() + 7) // 8, "little")):
+        while byte:
+            lowest = byte & -byte
+            yield 8 * byte_idx + lowest.bit_length() - 1
+            byte ^= lowest
+
+def _indices_to_mask(indices, size):
+    """
+    :param indices: iterable of indices smaller than size, possibly repeated
+    :param size: number of bits of the bitmask
+    :return: bitmask with the bits at indices set
+    """
+    bitmap = bytearray((size + 7) // 8)
+    for idx in indices:
+        bitmap[idx >> 3] |= 1 << (idx & 7)
+    return int.from_bytes(bytes(bitmap), "little")
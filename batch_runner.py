@@ -0,0 +1,255 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+A command line runner evaluating ABA+ frameworks stored in files, in parallel worker processes.
+Directories are searched recursively for framework files. A JSON line with the extensions, the numbers of deductions
+and attacks and the time taken by each phase is written for every file as soon as it has been evaluated.
+Files already recorded in the output file are skipped, so an interrupted run can be resumed by running it again.
+Files recorded as having exceeded the timeout are skipped as well, unless --retry-timeouts is given, in which case
+they are evaluated again and their new record is appended after the old one.
+
+usage: python3 batch_runner.py [-o OUTPUT] [-j WORKERS] [-t TIMEOUT] [--auto-WCP] [--semantics SEMANTICS ...]
+                               [--max-extensions N] [--retry-timeouts] PATH [PATH ...]
+"""
+
+import argparse
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import time
+from collections import deque
+
+from abap_batch import *
+
+FRAMEWORK_FILE_EXTENSION = ".pl"
+
+TIMEOUT_ERROR = "Timeout"
+PROCESS_ERROR = "ProcessError"
+
+
+def collect_files(paths):
+    """
+    :param paths: list of paths of framework files and directories
+    :return: sorted list of the absolute paths of the given files and of the framework files in the given directories
+    """
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                files.update(os.path.abspath(os.path.join(directory, name)) for name in names
+                             if name.endswith(FRAMEWORK_FILE_EXTENSION))
+        else:
+            files.add(os.path.abspath(path))
+    return sorted(files)
+
+
+def read_finished(output_filename, retry_timeouts=False):
+    """
+    read the files recorded in an output file, discarding a last line left incomplete by an interruption
+    :param retry_timeouts: if True, files whose last record is a timeout are not considered finished
+    :return: set of the paths of the files recorded
+    """
+    if not os.path.exists(output_filename):
+        return set()
+
+    f = open(output_filename, 'rb+')
+    content = f.read()
+    if content and not content.endswith(b"\n"):
+        f.truncate(content.rfind(b"\n") + 1)
+    f.close()
+
+    # maps the paths of the files recorded to whether their last record is a timeout
+    timed_out = {}
+    for line in content.split(b"\n"):
+        try:
+            record = json.loads(line.decode("utf-8"))
+            timed_out[record['file']] = record.get('error', {}).get('type') == TIMEOUT_ERROR
+        except (ValueError, KeyError, TypeError, AttributeError):
+            continue
+    return set(filename for filename, timeout in timed_out.items() if not (retry_timeouts and timeout))
+
+
+def evaluate_file(filename, auto_WCP=False, semantics=ALL_SEMANTICS, max_extensions=None):
+    """
+    :return: dictionary with the same entries as result_to_data(), but with the entries 'deduction_count' and
+             'attack_count' instead of 'attacks', the entry 'file' instead of 'id' and the entry 'timings' mapping
+             'parse', 'arguments', 'extensions' and 'total' to the number of seconds taken by each phase,
+             or the dictionary of file_error() if the evaluation failed
+    """
+    timestamps = {}
+
+    def progress(stage, _):
+        if stage == FRAMEWORK_STAGE:
+            timestamps['arguments'] = time.time()
+
+    start = time.time()
+    try:
+        f = open(filename, 'r')
+        input_string = f.read()
+        f.close()
+        abap, contr_map = parse_framework(input_string)
+        parsed = time.time()
+        result = compute_parsed_framework(abap, contr_map, auto_WCP, progress, semantics=semantics)
+    except Exception as e:
+        return file_error(filename, e.__class__.__name__, getattr(e, 'message', str(e)))
+
+    finished = time.time()
+    record = result_to_data(None, result, semantics, max_extensions)
+    del record['id']
+    del record['attacks']
+    record['file'] = filename
+    record['deduction_count'] = len(result['deductions'])
+    record['attack_count'] = len(result['attacks'])
+    record['timings'] = {'parse': parsed - start, 'arguments': timestamps['arguments'] - parsed,
+                         'extensions': finished - timestamps['arguments'], 'total': finished - start}
+    return record
+
+
+def file_error(filename, error_type, message):
+    """
+    :return: the dictionary of error_to_data() with the entry 'file' instead of 'id'
+    """
+    record = error_to_data(None, error_type, message)
+    del record['id']
+    record['file'] = filename
+    return record
+
+
+def _evaluate_in_process(connection, filename, auto_WCP, semantics, max_extensions):
+    connection.send(evaluate_file(filename, auto_WCP, semantics, max_extensions))
+    connection.close()
+
+
+def run(paths, output=sys.stdout, finished=set(), workers=None, timeout=None, auto_WCP=False,
+        semantics=ALL_SEMANTICS, max_extensions=None):
+    """
+    evaluate all framework files in paths which are not in finished, each in a separate process
+    :param output: file to which a JSON line is written for each evaluated file
+    :param finished: set of the paths of files which are skipped
+    :param workers: maximum number of files evaluated at the same time, at least 1, the number of CPUs if None
+    :param timeout: maximum number of seconds to evaluate a single file, no limit if None
+    :return: number of files evaluated
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers < 1:
+        raise ValueError("At least one worker is needed!")
+
+    pending = deque(filename for filename in collect_files(paths) if filename not in finished)
+    # maps connections to the path, process and start time of the files being evaluated
+    running = {}
+    count = 0
+
+    while pending or running:
+        while pending and len(running) < workers:
+            filename = pending.popleft()
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_evaluate_in_process,
+                                              args=(sender, filename, auto_WCP, semantics, max_extensions))
+            process.daemon = True
+            process.start()
+            sender.close()
+            running[receiver] = (filename, process, time.time())
+
+        wait_timeout = None
+        if timeout is not None:
+            earliest_start = min(started for _, _, started in running.values())
+            wait_timeout = max(0, earliest_start + timeout - time.time())
+
+        records = []
+        for receiver in multiprocessing.connection.wait(list(running), wait_timeout):
+            filename, process, _ = running.pop(receiver)
+            try:
+                records.append(receiver.recv())
+            except EOFError:
+                # the process ended without sending a record
+                records.append(file_error(filename, PROCESS_ERROR, "The evaluation ended unexpectedly!"))
+            receiver.close()
+            process.join()
+
+        if timeout is not None:
+            now = time.time()
+            for receiver, (filename, process, started) in list(running.items()):
+                if now - started >= timeout:
+                    del running[receiver]
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+                    records.append(file_error(filename, TIMEOUT_ERROR, "The evaluation exceeded the timeout!"))
+
+        for record in records:
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            count += 1
+
+    return count
+
+
+def positive_int(value):
+    """
+    argparse type of positive integers
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("{} is not a positive integer".format(value))
+    return number
+
+
+def positive_float(value):
+    """
+    argparse type of positive numbers
+    """
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError("{} is not a positive number".format(value))
+    return number
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Evaluate ABA+ frameworks in files and directories.")
+    parser.add_argument("paths", metavar="PATH", nargs="+",
+                        help="framework file, or directory searched for {} files".format(FRAMEWORK_FILE_EXTENSION))
+    parser.add_argument("-o", "--output",
+                        help="JSON Lines file to which the results are appended, files already recorded in it "
+                             "are skipped (default: standard output)")
+    parser.add_argument("-j", "--workers", type=positive_int,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("-t", "--timeout", type=positive_float, help="maximum number of seconds per file")
+    parser.add_argument("--auto-WCP", action="store_true", help="automatically satisfy WCP")
+    parser.add_argument("--semantics", nargs="+", choices=ALL_SEMANTICS, default=ALL_SEMANTICS,
+                        help="semantics whose extensions are recorded (default: all)")
+    parser.add_argument("--max-extensions", type=int, help="maximum number of extensions recorded per semantics")
+    parser.add_argument("--retry-timeouts", action="store_true",
+                        help="evaluate again the files recorded in the output file as having exceeded the timeout")
+    args = parser.parse_args(argv[1:])
+
+    if args.output is None:
+        run(args.paths, sys.stdout, set(), args.workers, args.timeout, args.auto_WCP, args.semantics,
+            args.max_extensions)
+        return
+
+    finished = read_finished(args.output, args.retry_timeouts)
+    output = open(args.output, 'a')
+    try:
+        run(args.paths, output, finished, args.workers, args.timeout, args.auto_WCP, args.semantics,
+            args.max_extensions)
+    finally:
+        output.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
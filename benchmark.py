@@ -0,0 +1,240 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+A benchmark suite timing the phases of the core engine on synthetic ABA+ frameworks.
+Frameworks are generated from the number of assumptions, the depth of the rules deriving the contraries, the number
+of sentences in the body of each rule (branching), the fraction of rule bodies that may use any assumption instead of
+only assumptions with a higher index (cycle density, 0 gives an acyclic attack graph) and the fraction of pairs of
+assumptions with a preference (preference density).
+One parameter is swept over a list of values while the others stay fixed, giving a scaling curve. A JSON line with
+the parameters, the median number of seconds taken by each phase and the sizes of the framework is written for
+every value, labelled e.g. with the commit being measured, so that runs on different commits can be compared.
+
+usage: python3 benchmark.py [-o OUTPUT] [--label LABEL] [--repeat N] [--seed SEED] [--assumptions N] [--depth N]
+                            [--branching N] [--cycle-density X] [--preference-density X]
+                            [--sweep PARAMETER VALUE [VALUE ...]]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from abap_parser import *
+from aspartix_interface import *
+
+# the other phases are those of abap_stats
+BUILD_PHASE = "build"
+
+PHASES = [PARSE_PHASE, BUILD_PHASE, CLOSURE_PHASE, WCP_PHASE, ARGUMENTS_PHASE, ENCODING_PHASE]
+
+DEFAULT_PARAMETERS = {'assumptions': 20, 'depth': 2, 'branching': 2, 'cycle_density': 0.5,
+                      'preference_density': 0.1}
+
+# converts values given on the command line to the type of each parameter
+PARAMETER_TYPES = {'assumptions': int, 'depth': int, 'branching': int, 'cycle_density': float,
+                   'preference_density': float}
+
+
+def generate_framework(assumptions, depth=1, branching=2, cycle_density=0.5, preference_density=0.1, seed=0):
+    """
+    :param assumptions: number of assumptions a0, a1, ..., each with a contrary c0, c1, ...
+    :param depth: number of rules applied to derive a contrary, using depth - 1 layers of intermediate sentences
+    :param branching: number of sentences in the body of each rule
+    :param cycle_density: probability that the body of a rule for the i-th contrary may use the sentences of any
+                          index instead of only those with an index higher than i
+    :param preference_density: probability of a preference between each pair of assumptions,
+                               preferences always go from lower to higher indices so they are acyclic
+    :param seed: seed of the random choices
+    :return: string defining the ABA+ framework
+    """
+    rand = random.Random(seed)
+    declarations = []
+
+    for i in range(0, assumptions):
+        declarations.append("myAsm(a{0}).\ncontrary(a{0}, c{0}).\n".format(i))
+
+    def body(i, prefix):
+        if rand.random() < cycle_density:
+            candidates = [j for j in range(0, assumptions) if j != i]
+        else:
+            candidates = list(range(i + 1, assumptions))
+        chosen = rand.sample(candidates, min(branching, len(candidates)))
+        return ", ".join("{}{}".format(prefix, j) for j in sorted(chosen))
+
+    # the sentences of layer l are derived from those of layer l + 1, the last layer from the assumptions
+    for i in range(0, assumptions):
+        prefix = "s1_" if depth > 1 else "a"
+        declarations.append("myRule(c{}, [{}]).\n".format(i, body(i, prefix)))
+        for layer in range(1, depth):
+            prefix = "s{}_".format(layer + 1) if layer + 1 < depth else "a"
+            declarations.append("myRule(s{}_{}, [{}]).\n".format(layer, i, body(i, prefix)))
+
+    for i in range(0, assumptions):
+        for j in range(i + 1, assumptions):
+            if rand.random() < preference_density:
+                declarations.append("myPrefLT(a{}, a{}).\n".format(i, j))
+
+    return "".join(declarations)
+
+
+def time_phases(input_string):
+    """
+    run each phase of the core engine once on a framework
+    :param input_string: A string defining an ABA+ framework
+    :return: tuple with two elements:
+             1: dictionary mapping each of PHASES to the number of seconds it took, where BUILD_PHASE covers
+                generate_aba_plus_framework() including the validation and one transitive closure,
+                CLOSURE_PHASE a second transitive closure of the declared preferences and ENCODING_PHASE
+                generate_input_file_for_clingo(), which generates the arguments and attacks again
+             2: dictionary with the numbers of 'assumptions', 'rules', 'preferences' (after the closure),
+                'deductions', 'attacks' and 'arguments' (distinct premises)
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    declarations = list(parse_declarations(input_string))
+    timings[PARSE_PHASE] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    abap, _ = generate_aba_plus_framework(input_string)
+    timings[BUILD_PHASE] = time.perf_counter() - start
+
+    # the closure is recalculated on a copy with only the declared preferences
+    declared = set(Preference(Sentence(args[0]), Sentence(args[1]),
+                              LESS_THAN if predicate == LT_PREDICATE else LESS_EQUAL)
+                   for _, predicate, args in declarations if predicate in (LT_PREDICATE, LE_PREDICATE))
+    copy = ABA_Plus.__new__(ABA_Plus)
+    copy.assumptions = abap.assumptions
+    copy.rules = abap.rules
+    copy.preferences = declared
+    start = time.perf_counter()
+    copy.calc_transitive_closure()
+    timings[CLOSURE_PHASE] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    abap.check_WCP()
+    timings[WCP_PHASE] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, attacks, deductions = abap.generate_arguments_and_attacks_for_contraries()
+    timings[ARGUMENTS_PHASE] = time.perf_counter() - start
+
+    asp = ASPARTIX_Interface(abap)
+    fd, solver_input = tempfile.mkstemp(suffix=".lp")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        asp.generate_input_file_for_clingo(solver_input)
+        timings[ENCODING_PHASE] = time.perf_counter() - start
+    finally:
+        os.remove(solver_input)
+
+    sizes = {'assumptions': len(abap.assumptions), 'rules': len(abap.rules), 'preferences': len(abap.preferences),
+             'deductions': len(deductions), 'attacks': len(attacks), 'arguments': len(asp.arguments)}
+    return (timings, sizes)
+
+
+def benchmark(parameters, repeat=3, seed=0):
+    """
+    :param parameters: dictionary with the arguments of generate_framework() except seed
+    :param repeat: number of times each phase is run
+    :return: dictionary with the entries 'parameters', 'seed', 'repeat', 'timings' mapping each of PHASES to the
+             median number of seconds it took and 'sizes', see time_phases()
+    """
+    input_string = generate_framework(seed=seed, **parameters)
+    runs = []
+    for _ in range(0, repeat):
+        timings, sizes = time_phases(input_string)
+        runs.append(timings)
+
+    medians = dict((phase, statistics.median(run[phase] for run in runs)) for phase in PHASES)
+    return {'parameters': dict(parameters), 'seed': seed, 'repeat': repeat, 'timings': medians, 'sizes': sizes}
+
+
+def sweep(parameters, parameter, values, repeat=3, seed=0, label=None, output=None):
+    """
+    benchmark frameworks with parameter set to each of values and the other parameters as in parameters
+    :param label: label recorded with each result, e.g. the commit being measured
+    :param output: file to which a JSON line is written for each result as soon as it is measured, or None
+    :return: list of the results of benchmark(), each with the additional entries 'label' and 'sweep' (parameter)
+    """
+    res = []
+    for value in values:
+        swept = dict(parameters)
+        swept[parameter] = value
+        result = benchmark(swept, repeat, seed)
+        result['label'] = label
+        result['sweep'] = parameter
+        res.append(result)
+        if output is not None:
+            output.write(json.dumps(result, sort_keys=True) + "\n")
+            output.flush()
+    return res
+
+
+def current_commit():
+    """
+    :return: hash of the commit checked out in the directory of this module, None if it is not a git repository
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=MODULE_DIR, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Time the phases of the core engine on synthetic ABA+ frameworks.")
+    parser.add_argument("-o", "--output", help="JSON Lines file to which the results are appended "
+                                               "(default: standard output)")
+    parser.add_argument("--label", help="label recorded with the results (default: the current commit)")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs per framework, the median is recorded")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated frameworks")
+    for parameter, default in sorted(DEFAULT_PARAMETERS.items()):
+        parser.add_argument("--" + parameter.replace("_", "-"), type=PARAMETER_TYPES[parameter], default=default,
+                            help="default: {}".format(default))
+    parser.add_argument("--sweep", nargs="+", metavar=("PARAMETER", "VALUE"),
+                        help="parameter to sweep and its values (default: assumptions 10 20 40)")
+    args = parser.parse_args(argv[1:])
+
+    parameters = dict((parameter, getattr(args, parameter)) for parameter in DEFAULT_PARAMETERS)
+    swept, values = "assumptions", [10, 20, 40]
+    if args.sweep is not None:
+        swept = args.sweep[0].replace("-", "_")
+        if swept not in PARAMETER_TYPES or len(args.sweep) < 2:
+            parser.error("--sweep takes one of {} and at least one value".format(", ".join(sorted(PARAMETER_TYPES))))
+        values = [PARAMETER_TYPES[swept](value) for value in args.sweep[1:]]
+
+    label = args.label if args.label is not None else current_commit()
+
+    if args.output is None:
+        sweep(parameters, swept, values, args.repeat, args.seed, label, sys.stdout)
+        return
+
+    output = open(args.output, 'a')
+    try:
+        sweep(parameters, swept, values, args.repeat, args.seed, label, output)
+    finally:
+        output.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,110 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+A brute force solver following the ICCMA command line interface, used to test ICCMABackend locally.
+It enumerates all subsets of arguments, so it is only suitable for small attack graphs.
+
+usage: python3 iccma_stub_solver.py -p <task> -f <file> -fo <apx|tgf>
+supported tasks: EE-CO, EE-PR, EE-ST, EE-GR, SE-GR, SE-ID
+"""
+
+import re
+import sys
+
+
+def read_graph(filename, input_format):
+    """
+    :return: tuple (arguments, attacks), list of argument names and set of pairs (attacker, attackee)
+    """
+    f = open(filename, 'r')
+    content = f.read()
+    f.close()
+
+    if input_format == "apx":
+        arguments = re.findall(r"arg\(\s*(\w+)\s*\)", content)
+        attacks = set(re.findall(r"att\(\s*(\w+)\s*,\s*(\w+)\s*\)", content))
+    else:
+        args_part, _, atts_part = content.partition("#")
+        arguments = args_part.split()
+        attacks = set(tuple(line.split()) for line in atts_part.splitlines() if line.strip())
+
+    return arguments, attacks
+
+
+def complete_extensions(arguments, attacks):
+    """
+    :return: list of frozensets of argument names, all complete extensions
+    """
+    attackers = dict((arg, set()) for arg in arguments)
+    for attacker, attackee in attacks:
+        attackers[attackee].add(attacker)
+
+    complete = []
+    for subset_mask in range(0, 1 << len(arguments)):
+        ext = frozenset(arg for idx, arg in enumerate(arguments) if subset_mask >> idx & 1)
+        if any((x, y) in attacks for x in ext for y in ext):
+            continue
+        defeated = set(y for x, y in attacks if x in ext)
+        defended = set(arg for arg in arguments if attackers[arg].issubset(defeated))
+        if defended == ext:
+            complete.append(ext)
+
+    return complete
+
+
+def solve(task, arguments, attacks):
+    """
+    :return: list of extensions for EE tasks, a single extension for SE tasks
+    """
+    complete = complete_extensions(arguments, attacks)
+    grounded = frozenset.intersection(*complete)
+    preferred = [ext for ext in complete if not any(ext < other for other in complete)]
+
+    if task == "EE-CO":
+        return complete
+    if task == "EE-PR":
+        return preferred
+    if task == "EE-ST":
+        return [ext for ext in complete
+                if ext.union(y for x, y in attacks if x in ext) == set(arguments)]
+    if task == "EE-GR":
+        return [grounded]
+    if task == "SE-GR":
+        return grounded
+    if task == "SE-ID":
+        in_all_preferred = frozenset.intersection(*preferred)
+        return max((ext for ext in complete if ext <= in_all_preferred), key=len)
+
+    raise ValueError("Unsupported task {}".format(task))
+
+
+def format_extension(ext):
+    return "[" + ",".join(sorted(ext)) + "]"
+
+
+def main(argv):
+    options = dict(zip(argv[1::2], argv[2::2]))
+    task = options["-p"]
+    arguments, attacks = read_graph(options["-f"], options.get("-fo", "apx"))
+
+    res = solve(task, arguments, attacks)
+    if task.startswith("EE"):
+        print("[" + ",".join(format_extension(ext) for ext in res) + "]")
+    else:
+        print(format_extension(res))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
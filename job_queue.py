@@ -0,0 +1,411 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+This module contains a class JobQueue that computes ABA+ frameworks in background processes.
+Jobs are recorded in an SQLite database and their results are stored in a ResultCache, so that any process sharing
+the database and the cache directory can submit jobs, poll their state, fetch their results or cancel them.
+At most max_workers jobs run at the same time across all processes sharing the database.
+The partial results of a running job are recorded as soon as they are computed, so they can be shown before the
+job has finished.
+Jobs of an instrumented JobQueue also record the time spent in each phase of their computation and the counters of
+the work done, see abap_stats. Jobs may also profile their memory and be aborted once their memory exceeds a budget.
+The deductions and attacks of a framework are not recorded with the partial results: the jobs store a snapshot of
+the framework in a SnapshotStore instead, under the key recorded with the partial result FRAMEWORK_STAGE.
+"""
+
+import multiprocessing
+import os
+import pickle
+import signal
+import sqlite3
+import threading
+import time
+import uuid
+
+from abap_pipeline import *
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_RETENTION = 24 * 60 * 60
+
+POLL_INTERVAL = 0.1
+
+# stage of the progress recorded by instrumented jobs, after their partial results
+STATS_STAGE = "stats"
+
+
+class JobQueue:
+    def __init__(self, path, cache, max_workers=DEFAULT_MAX_WORKERS, retention=DEFAULT_RETENTION, instrument=False,
+                 profile_memory=False, memory_budget=None, snapshots=None, node_label=None):
+        """
+        :param path: path of the SQLite database file recording the jobs, created if it does not exist
+        :param cache: ResultCache in which the results are stored
+        :param max_workers: maximum number of jobs computed at the same time
+        :param retention: number of seconds after their submission at which finished jobs are removed
+        :param instrument: if True, record the Stats of the jobs started by this JobQueue, see stats()
+        :param profile_memory: if True, record MemoryStats instead, with the memory allocated in each phase
+        :param memory_budget: maximum number of bytes traced by a job, which fails with
+                              MemoryBudgetExceededException once it exceeds them, no limit if None
+        :param snapshots: SnapshotStore in which the jobs store the snapshots of their frameworks as soon as the attacks
+                          are generated, or None
+        :param node_label: function mapping premises to the labels of the nodes of the snapshots, see
+                           SnapshotStore.put()
+        """
+        self.path = path
+        self.cache = cache
+        self.max_workers = max_workers
+        self.retention = retention
+        self.instrument = instrument
+        self.profile_memory = profile_memory
+        self.memory_budget = memory_budget
+        self.snapshots = snapshots
+        self.node_label = node_label
+        self._lock = threading.Lock()
+        # threads recording the outcome of the processes started by this JobQueue
+        self._watchers = []
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        connection = self._connect()
+        connection.execute("CREATE TABLE IF NOT EXISTS jobs "
+                           "(id TEXT PRIMARY KEY, state TEXT, input TEXT, auto_WCP INTEGER, result_key TEXT, "
+                           "error BLOB, pid INTEGER, submitted REAL, semantics TEXT)")
+        if "semantics" not in [column[1] for column in connection.execute("PRAGMA table_info(jobs)")]:
+            # databases created before jobs could be restricted to some semantics
+            connection.execute("ALTER TABLE jobs ADD COLUMN semantics TEXT")
+        connection.execute("CREATE TABLE IF NOT EXISTS progress "
+                           "(seq INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT, stage TEXT, data BLOB)")
+        connection.execute("CREATE INDEX IF NOT EXISTS progress_job_id ON progress (job_id)")
+        connection.commit()
+        connection.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def submit(self, input_string, auto_WCP=False, semantics=None):
+        """
+        :param input_string: A string defining an ABA+ framework
+        :param auto_WCP: if True, automatically satisfy WCP
+        :param semantics: collection of the semantics whose extensions are calculated, all of them if None
+        :return: id of the new job
+        """
+        job_id = uuid.uuid4().hex
+        connection = self._connect()
+        self._remove_old_jobs(connection)
+        connection.execute("INSERT INTO jobs (id, state, input, auto_WCP, submitted, semantics) "
+                           "VALUES (?, ?, ?, ?, ?, ?)",
+                           (job_id, QUEUED, input_string, int(auto_WCP), time.time(),
+                            None if semantics is None else ",".join(semantics)))
+        connection.commit()
+        connection.close()
+
+        self.dispatch()
+        return job_id
+
+    def dispatch(self):
+        """
+        start queued jobs while fewer than self.max_workers jobs are running
+        """
+        with self._lock:
+            while True:
+                job = self._claim()
+                if job is None:
+                    return
+
+                job_id, input_string, auto_WCP, semantics = job
+                # start the process only after the claim is committed, so it does not inherit an open transaction
+                process = multiprocessing.Process(target=_run_job,
+                                                  args=(self.path, self.cache, job_id, input_string, bool(auto_WCP),
+                                                        self.instrument, self.profile_memory, self.memory_budget,
+                                                        self.snapshots, self.node_label, _parse_semantics(semantics)))
+                process.daemon = True
+                process.start()
+
+                connection = self._connect()
+                connection.execute("UPDATE jobs SET pid = ? WHERE id = ?", (process.pid, job_id))
+                connection.commit()
+                state = connection.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+                connection.close()
+                if state == CANCELLED:
+                    # cancelled before its process was known
+                    process.terminate()
+
+                watcher = threading.Thread(target=self._watch, args=(job_id, process))
+                watcher.daemon = True
+                watcher.start()
+                self._watchers = [thread for thread in self._watchers if thread.is_alive()] + [watcher]
+
+    def close(self):
+        """
+        wait until the processes started by this JobQueue have ended and their outcome has been recorded, including
+        the processes of queued jobs started in the meantime
+        """
+        while True:
+            with self._lock:
+                watchers = [thread for thread in self._watchers if thread.is_alive()]
+                self._watchers = watchers
+            if not watchers:
+                return
+            for thread in watchers:
+                thread.join()
+
+    def _claim(self):
+        """
+        mark the oldest queued job as running if fewer than self.max_workers jobs are running
+        :return: tuple of id, input string, auto_WCP and semantics (as stored) of the claimed job, None if no job was
+                 claimed
+        """
+        connection = self._connect()
+        try:
+            # no other process can claim jobs until this transaction ends
+            connection.execute("BEGIN IMMEDIATE")
+            # jobs whose process has ended without recording a result no longer count as running
+            for job_id, pid in connection.execute("SELECT id, pid FROM jobs WHERE state = ? AND pid IS NOT NULL",
+                                                  (RUNNING,)).fetchall():
+                if not _process_alive(pid):
+                    error = pickle.dumps(JobFailedException("The computation ended unexpectedly!"))
+                    connection.execute("UPDATE jobs SET state = ?, error = ? WHERE id = ?", (FAILED, error, job_id))
+            running = connection.execute("SELECT COUNT(*) FROM jobs WHERE state = ?", (RUNNING,)).fetchone()[0]
+            job = None
+            if running < self.max_workers:
+                job = connection.execute("SELECT id, input, auto_WCP, semantics FROM jobs WHERE state = ? "
+                                         "ORDER BY submitted LIMIT 1", (QUEUED,)).fetchone()
+            if job is not None:
+                connection.execute("UPDATE jobs SET state = ?, pid = NULL WHERE id = ?", (RUNNING, job[0]))
+            connection.commit()
+        finally:
+            connection.close()
+        return job
+
+    def _remove_old_jobs(self, connection):
+        old_jobs = "SELECT id FROM jobs WHERE submitted < ? AND state IN ({})".format(
+            ", ".join("?" * len(FINISHED_STATES)))
+        parameters = (time.time() - self.retention,) + FINISHED_STATES
+        connection.execute("DELETE FROM progress WHERE job_id IN ({})".format(old_jobs), parameters)
+        connection.execute("DELETE FROM jobs WHERE id IN ({})".format(old_jobs), parameters)
+
+    def _watch(self, job_id, process):
+        process.join()
+        # mark the job as failed if the process ended without recording a result
+        self._finish(job_id, RUNNING, FAILED,
+                     error=pickle.dumps(JobFailedException("The computation ended unexpectedly!")))
+        self.dispatch()
+
+    def _finish(self, job_id, from_state, to_state, error=None):
+        connection = self._connect()
+        connection.execute("UPDATE jobs SET state = ?, error = ? WHERE id = ? AND state = ?",
+                           (to_state, error, job_id, from_state))
+        connection.commit()
+        connection.close()
+
+    def _row(self, job_id):
+        connection = self._connect()
+        row = connection.execute("SELECT state, result_key, error, pid FROM jobs WHERE id = ?",
+                                 (job_id,)).fetchone()
+        connection.close()
+        if row is None:
+            raise KeyError(job_id)
+        return row
+
+    def state(self, job_id):
+        """
+        :return: QUEUED, RUNNING, DONE, FAILED or CANCELLED
+        :raise KeyError: if there is no job with job_id
+        """
+        state, _, _, pid = self._row(job_id)
+        if state == RUNNING and pid is not None and not _process_alive(pid):
+            self._finish(job_id, RUNNING, FAILED,
+                         error=pickle.dumps(JobFailedException("The computation ended unexpectedly!")))
+            return FAILED
+        return state
+
+    def result(self, job_id):
+        """
+        :return: the result of the finished job, see compute_parsed_framework()
+        :raise: the exception raised by the computation if the job failed,
+                JobNotFinishedException if the job has not finished or was cancelled
+        """
+        state, result_key, error, _ = self._row(job_id)
+        if state == FAILED:
+            raise pickle.loads(error)
+        if state != DONE:
+            raise JobNotFinishedException("The job is {}!".format(state))
+
+        result = self.cache.get(result_key)
+        if result is None:
+            # the result has been evicted from the cache in the meantime
+            input_string, auto_WCP = self.input(job_id)
+            connection = self._connect()
+            semantics = connection.execute("SELECT semantics FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            connection.close()
+            result = compute_framework_cached(input_string, auto_WCP, self.cache, rename_invariant=True,
+                                              semantics=_parse_semantics(semantics))
+        return result
+
+    def input(self, job_id):
+        """
+        :return: tuple of the input string and auto_WCP of the job
+        :raise KeyError: if there is no job with job_id
+        """
+        connection = self._connect()
+        row = connection.execute("SELECT input, auto_WCP FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        connection.close()
+        if row is None:
+            raise KeyError(job_id)
+        return (row[0], bool(row[1]))
+
+    def progress(self, job_id, after=0):
+        """
+        :param after: only return the partial results recorded after the one with this sequence number
+        :return: list of the partial results of the job recorded so far, as tuples with three elements:
+                 1: sequence number of the partial result
+                 2: FRAMEWORK_STAGE or semantics, see compute_parsed_framework(), or STATS_STAGE
+                 3: partial result, for FRAMEWORK_STAGE a dictionary with the entries 'contr_map', 'rules_added'
+                    and 'snapshot_key' (key of the snapshot of the framework if the jobs store snapshots)
+        """
+        connection = self._connect()
+        rows = connection.execute("SELECT seq, stage, data FROM progress WHERE job_id = ? AND seq > ? ORDER BY seq",
+                                  (job_id, after)).fetchall()
+        connection.close()
+        return [(seq, stage, pickle.loads(data)) for seq, stage, data in rows]
+
+    def stats(self, job_id):
+        """
+        :return: dictionary with the Stats of the computation of the job, see Stats.to_dict() and
+                 MemoryStats.to_dict(), None if the job was not instrumented or has not finished its computation
+        """
+        connection = self._connect()
+        row = connection.execute("SELECT data FROM progress WHERE job_id = ? AND stage = ? ORDER BY seq DESC LIMIT 1",
+                                 (job_id, STATS_STAGE)).fetchone()
+        connection.close()
+        if row is None:
+            return None
+        return pickle.loads(row[0])
+
+    def wait(self, job_id, timeout=None):
+        """
+        wait until the job has finished
+        :param timeout: maximum number of seconds to wait, no limit if None
+        :return: the final state of the job, or its current state after timeout
+        """
+        start = time.time()
+        state = self.state(job_id)
+        while state not in FINISHED_STATES and (timeout is None or time.time() - start < timeout):
+            time.sleep(POLL_INTERVAL)
+            state = self.state(job_id)
+        return state
+
+    def cancel(self, job_id):
+        """
+        cancel the job, terminating its process if it is running
+        """
+        state, _, _, pid = self._row(job_id)
+        if state == QUEUED:
+            self._finish(job_id, QUEUED, CANCELLED)
+        elif state == RUNNING:
+            self._finish(job_id, RUNNING, CANCELLED)
+            if pid is None:
+                # dispatch() terminates the process once it is started
+                return
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+
+def _run_job(path, cache, job_id, input_string, auto_WCP, instrument=False, profile_memory=False,
+             memory_budget=None, snapshots=None, node_label=None, semantics=None):
+    """
+    compute a job in a worker process and record its outcome
+    """
+    key = framework_key(input_string, auto_WCP, semantics)
+    # the framework does not depend on the semantics
+    snapshot_key = framework_key(input_string, auto_WCP)
+
+    def progress(stage, partial_result):
+        if stage == FRAMEWORK_STAGE:
+            if snapshots is not None:
+                snapshots.put(snapshot_key, partial_result, node_label)
+            partial_result = {'contr_map': partial_result['contr_map'], 'rules_added': partial_result['rules_added'],
+                              'snapshot_key': snapshot_key}
+        connection = sqlite3.connect(path, timeout=30)
+        connection.execute("INSERT INTO progress (job_id, stage, data) VALUES (?, ?, ?)",
+                           (job_id, stage, sqlite3.Binary(pickle.dumps(partial_result, pickle.HIGHEST_PROTOCOL))))
+        connection.commit()
+        connection.close()
+
+    stats = None
+    if profile_memory or memory_budget is not None:
+        stats = MemoryStats(memory_budget, DEFAULT_TOP_SITES if profile_memory else 0)
+    elif instrument:
+        stats = Stats()
+
+    to_state = DONE
+    error = None
+    try:
+        compute_framework_cached(input_string, auto_WCP, cache, rename_invariant=True, progress=progress, stats=stats,
+                                 semantics=semantics)
+    except Exception as e:
+        to_state = FAILED
+        error = pickle.dumps(e)
+
+    if stats is not None:
+        if isinstance(stats, MemoryStats):
+            stats.stop()
+        # the stats of failed jobs show where a memory budget was exceeded
+        if instrument or profile_memory:
+            progress(STATS_STAGE, stats.to_dict())
+
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute("UPDATE jobs SET state = ?, result_key = ?, error = ? WHERE id = ? AND state = ?",
+                       (to_state, key, error, job_id, RUNNING))
+    connection.commit()
+    connection.close()
+
+
+def _parse_semantics(semantics):
+    """
+    :param semantics: semantics of a job as stored in the database, separated by commas, or None for all semantics
+    :return: list of the semantics, or None for all semantics
+    """
+    if semantics is None:
+        return None
+    return [s for s in semantics.split(",") if s]
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+class JobFailedException(Exception):
+    def __init__(self, message):
+        self.message = message
+
+class JobNotFinishedException(Exception):
+    def __init__(self, message):
+        self.message = message
@@ -0,0 +1,126 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+This module contains a class ResultCache, a disk-backed cache of computation results with least recently used
+eviction once the cached results exceed a maximum size.
+Results are stored as pickle files named by their keys, so the cache can be shared by several processes.
+"""
+
+import os
+import pickle
+import tempfile
+
+CACHE_FILE_EXTENSION = ".pickle"
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ResultCache:
+    file_extension = CACHE_FILE_EXTENSION
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        :param directory: directory where the results are stored, created if it does not exist
+        :param max_bytes: maximum total size of the stored results in bytes
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.file_extension)
+
+    def get(self, key):
+        """
+        :param key: hexadecimal string identifying the result
+        :return: the result stored under key, None if there is none
+        """
+        path = self._path(key)
+        try:
+            f = open(path, 'rb')
+        except (IOError, OSError):
+            return None
+
+        try:
+            result = pickle.load(f)
+        except Exception:
+            # a corrupt or outdated entry is treated as missing
+            f.close()
+            self._remove(path)
+            return None
+        f.close()
+
+        # the modification time records the last use for the eviction
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key, result):
+        """
+        store result under key and evict the least recently used results if the cache has grown too large
+        :param key: hexadecimal string identifying the result
+        :param result: picklable object
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        f = os.fdopen(fd, 'wb')
+        try:
+            pickle.dump(result, f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+        # replace atomically so that concurrent readers never see a partially written file
+        os.replace(tmp_path, self._path(key))
+
+        self.evict()
+
+    def evict(self):
+        """
+        remove the least recently used results until the total size is at most self.max_bytes
+        """
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.file_extension):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_bytes:
+                break
+            self._remove(path)
+            total_size -= size
+
+    def clear(self):
+        """
+        remove all stored results
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith(self.file_extension):
+                self._remove(os.path.join(self.directory, name))
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,126 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+This module contains a class SessionResultStore, a dictionary-like store of calculation results per session.
+Results are kept compressed in an SQLite database, so all worker processes of a deployment share them.
+Results expire after a period without access, and the least recently accessed results are evicted once the store
+exceeds a maximum size.
+"""
+
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 2 * 60 * 60
+
+
+class SessionResultStore:
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        """
+        :param path: path of the SQLite database file, created if it does not exist
+        :param max_bytes: maximum total size of the compressed results in bytes
+        :param ttl: number of seconds after the last access at which a result expires
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        connection = self._connect()
+        connection.execute("CREATE TABLE IF NOT EXISTS results "
+                           "(key TEXT PRIMARY KEY, data BLOB, size INTEGER, last_access REAL)")
+        connection.commit()
+        connection.close()
+
+    def _connect(self):
+        # one connection per operation, so that the store can be used from any thread
+        return sqlite3.connect(self.path, timeout=30)
+
+    def __getitem__(self, key):
+        """
+        :return: the result stored under key
+        :raise KeyError: if there is no result under key or it has expired
+        """
+        connection = self._connect()
+        try:
+            row = connection.execute("SELECT data, last_access FROM results WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None or row[1] < now - self.ttl:
+                raise KeyError(key)
+            connection.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, key))
+            connection.commit()
+        finally:
+            connection.close()
+
+        return pickle.loads(zlib.decompress(row[0]))
+
+    def __setitem__(self, key, result):
+        """
+        store result under key and evict expired and least recently accessed results if the store is too large
+        """
+        data = zlib.compress(pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+
+        connection = self._connect()
+        try:
+            connection.execute("INSERT OR REPLACE INTO results (key, data, size, last_access) VALUES (?, ?, ?, ?)",
+                               (key, sqlite3.Binary(data), len(data), time.time()))
+            self._evict(connection)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def __delitem__(self, key):
+        connection = self._connect()
+        try:
+            connection.execute("DELETE FROM results WHERE key = ?", (key,))
+            connection.commit()
+        finally:
+            connection.close()
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        """
+        :return: the result stored under key, default if there is none
+        """
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def _evict(self, connection):
+        connection.execute("DELETE FROM results WHERE last_access < ?", (time.time() - self.ttl,))
+
+        total_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+
+        rows = connection.execute("SELECT key, size FROM results ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if total_size <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM results WHERE key = ?", (key,))
+            total_size -= size
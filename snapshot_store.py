@@ -0,0 +1,135 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+This module contains a class SnapshotStore, a disk-backed store of compiled frameworks with their deductions, attacks
+and attack graphs, evicted like a ResultCache.
+Every process attaches the stored files read-only as memory maps, so processes serving the same framework share a
+single copy of it in the page cache instead of holding their own.
+A SnapshotStore can be used by several threads. Detached snapshots are not closed, since other threads may still
+read them: their memory maps are released once the last reference to them is dropped.
+"""
+
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from abap_compiled import *
+from result_cache import ResultCache
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# maximum number of snapshots kept attached by a process
+DEFAULT_MAX_ATTACHED = 32
+
+
+class SnapshotStore(ResultCache):
+    file_extension = COMPILED_FILE_EXTENSION
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, max_attached=DEFAULT_MAX_ATTACHED):
+        """
+        :param directory: directory where the snapshots are stored, created if it does not exist
+        :param max_bytes: maximum total size of the stored snapshots in bytes
+        :param max_attached: maximum number of snapshots kept attached by this process
+        """
+        super(SnapshotStore, self).__init__(directory, max_bytes)
+        self.max_attached = max_attached
+        # maps keys to the CompiledFrameworks attached by this process, least recently used first
+        self._attached = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # the attached snapshots belong to this process, a process unpickling the store attaches its own
+        state = dict(self.__dict__)
+        del state['_attached']
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._attached = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :param key: hexadecimal string identifying the snapshot
+        :return: CompiledFramework attached to the snapshot stored under key, None if there is none
+        """
+        path = self._path(key)
+        # the modification time records the last use for the eviction
+        try:
+            os.utime(path, None)
+        except OSError:
+            # evicted, possibly by another process
+            self._detach(key)
+            return None
+
+        with self._lock:
+            snapshot = self._attached.pop(key, None)
+            if snapshot is None:
+                try:
+                    snapshot = CompiledFramework(path)
+                except (IOError, OSError):
+                    return None
+                except InvalidCompiledFrameworkException:
+                    # an outdated entry is treated as missing
+                    self._remove(path)
+                    return None
+            self._attached[key] = snapshot
+
+            while len(self._attached) > self.max_attached:
+                self._attached.popitem(last=False)
+        return snapshot
+
+    def open(self, key):
+        """
+        attach the snapshot stored under key independently of the snapshots attached by get(), e.g. for streaming it
+        while other snapshots are attached and detached
+        :param key: hexadecimal string identifying the snapshot
+        :return: new CompiledFramework, which must be closed by the caller, None if there is no snapshot under key
+        """
+        try:
+            return CompiledFramework(self._path(key))
+        except (IOError, OSError, InvalidCompiledFrameworkException):
+            return None
+
+    def put(self, key, result, node_label=None):
+        """
+        store a snapshot of result under key and evict the least recently used snapshots if the store has grown
+        too large
+        :param key: hexadecimal string identifying the snapshot
+        :param result: result of compute_parsed_framework()
+        :param node_label: function mapping premises to the labels of the nodes of the graph, see compile_framework()
+        """
+        # the snapshot is compiled with the contrary map of the parser
+        contr_map = dict((contrary, asm) for asm, contrary in result['contr_map'].items())
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        os.close(fd)
+        try:
+            compile_framework(tmp_path, result['abap'], contr_map, result['deductions'], result['attacks'], node_label)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+        # replace atomically so that concurrent readers never see a partially written file,
+        # processes still attached to a replaced file keep reading it until they detach
+        os.replace(tmp_path, self._path(key))
+        self._detach(key)
+
+        self.evict()
+
+    def _detach(self, key):
+        with self._lock:
+            self._attached.pop(key, None)
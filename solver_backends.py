@@ -0,0 +1,414 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+This module contains a registry of solver backends that compute extensions of abstract argumentation frameworks
+(attack graphs between arguments identified by indices), as well as exporters of attack graphs in the input formats
+of those backends.
+Besides the ASPARTIX encodings for clingo and DLV, any solver following the ICCMA command line interface can be
+registered with ICCMABackend.
+"""
+
+import abc
+import subprocess
+import threading
+import queue
+import time
+import re
+
+ASPARTIX_FORMAT = "aspartix"
+APX_FORMAT = "apx"
+TGF_FORMAT = "tgf"
+
+# ICCMA names arguments by identifiers, the index of an argument is appended to this prefix
+ICCMA_ARGUMENT_PREFIX = "a"
+ICCMA_ARGUMENT_REGEX = r"a(\d+)"
+ICCMA_NO_EXTENSION = "NO"
+
+# maps semantics to the ICCMA tasks computing their extensions
+ICCMA_TASKS = {"complete": "EE-CO", "preferred": "EE-PR", "stable": "EE-ST",
+               "grounded": "SE-GR", "ideal": "SE-ID"}
+
+# clingo prints this when there is no answer set, e.g. no stable extension
+UNSATISFIABLE = "UNSATISFIABLE"
+
+# exit codes of solvers that ran successfully, in particular of ICCMA solvers
+SUCCESS_EXIT_CODES = (0,)
+# clingo exits with 10 if it found answer sets, 20 if there are none and 30 if it found all of them
+CLINGO_EXIT_CODES = (10, 20, 30)
+
+# pyclingo, the clingo application of the Python package, always exits with 0 and prints the status UNKNOWN instead
+# of these statuses when it failed
+PYCLINGO_HEADER = "pyclingo version"
+CLINGO_STATUSES = ("SATISFIABLE", "UNSATISFIABLE")
+
+# maps names to registered SolverBackends
+backends = {}
+
+
+def register_backend(backend):
+    """
+    register backend under its name, replacing any backend previously registered under that name
+    :param backend: SolverBackend
+    """
+    backends[backend.name] = backend
+
+
+def get_backend(name):
+    """
+    :param name: name under which the backend was registered
+    :return: the registered SolverBackend
+    """
+    if name not in backends:
+        raise UnknownBackendException("No solver backend registered under the name {}!".format(name))
+    return backends[name]
+
+
+def run_solver(args, is_complete=None):
+    """
+    :param args: list of the command line arguments starting the solver
+    :param is_complete: function mapping the standard output and the exit code of the solver to True if the output
+                        contains a complete answer, e.g. SolverBackend.is_complete, or None to accept any output
+    :return: standard output of the solver
+    :raise SolverFailedException: if is_complete rejects the output
+    """
+    if hasattr(subprocess, 'run'):
+        #for python 3.5 and later:
+        res = subprocess.run(args,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                             universal_newlines=True)
+        output, returncode = res.stdout, res.returncode
+    else:
+        res = subprocess.Popen(args,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        output = res.communicate()[0].decode("utf-8")
+        returncode = res.returncode
+
+    if is_complete is not None and not is_complete(output, returncode):
+        raise SolverFailedException("The solver {} failed with exit code {}!".format(args[0], returncode))
+    return output
+
+
+def graph_lines(argument_count, attacks, input_format):
+    """
+    lazily generate the lines of a file describing an attack graph
+    :param argument_count: number of arguments, which are identified by the indices 0 to argument_count - 1
+    :param attacks: iterable of pairs (index of attacker, index of attackee)
+    :param input_format: ASPARTIX_FORMAT, APX_FORMAT or TGF_FORMAT
+    :return: generator of lines
+    """
+    if input_format == ASPARTIX_FORMAT:
+        for idx in range(0, argument_count):
+            yield "arg({}).\n".format(idx)
+        for attacker, attackee in attacks:
+            yield "att({}, {}).\n".format(attacker, attackee)
+
+    elif input_format == APX_FORMAT:
+        for idx in range(0, argument_count):
+            yield "arg({}{}).\n".format(ICCMA_ARGUMENT_PREFIX, idx)
+        for attacker, attackee in attacks:
+            yield "att({0}{1},{0}{2}).\n".format(ICCMA_ARGUMENT_PREFIX, attacker, attackee)
+
+    elif input_format == TGF_FORMAT:
+        for idx in range(0, argument_count):
+            yield "{}{}\n".format(ICCMA_ARGUMENT_PREFIX, idx)
+        yield "#\n"
+        for attacker, attackee in attacks:
+            yield "{0}{1} {0}{2}\n".format(ICCMA_ARGUMENT_PREFIX, attacker, attackee)
+
+    else:
+        raise UnknownFormatException("Unknown attack graph format {}!".format(input_format))
+
+
+def export_graph(filename, argument_count, attacks, input_format):
+    """
+    write an attack graph to a file without building the whole file content in memory
+    :param filename: save the attack graph under filename
+    :param argument_count: number of arguments, which are identified by the indices 0 to argument_count - 1
+    :param attacks: iterable of pairs (index of attacker, index of attackee)
+    :param input_format: ASPARTIX_FORMAT, APX_FORMAT or TGF_FORMAT
+    """
+    f = open(filename, 'w')
+    f.writelines(graph_lines(argument_count, attacks, input_format))
+    f.close()
+
+
+def indices_to_mask(indices):
+    """
+    :param indices: iterable of indices of arguments
+    :return: bitmask over the indices
+    """
+    mask = 0
+    for idx in indices:
+        mask |= 1 << int(idx)
+    return mask
+
+
+class SolverBackend(abc.ABC):
+    def __init__(self, name, command, tasks, input_format, exit_codes=SUCCESS_EXIT_CODES):
+        """
+        :param name: name under which the backend is registered
+        :param command: list of command line arguments starting the solver, where "{input}" is replaced by
+                        the name of the input file, "{task}" by the task and "{format}" by input_format
+        :param tasks: dictionary mapping the supported semantics to what "{task}" is replaced by
+        :param input_format: format of the input file expected by the solver
+        :param exit_codes: exit codes of the solver when it ran successfully
+        """
+        self.name = name
+        self.command = command
+        self.tasks = tasks
+        self.input_format = input_format
+        self.exit_codes = exit_codes
+
+    def supports(self, semantics):
+        """
+        :return: True if the backend can compute extensions under semantics, False otherwise
+        """
+        return semantics in self.tasks
+
+    def command_args(self, input_filename, semantics):
+        """
+        :return: list of command line arguments computing the extensions of input_filename under semantics
+        """
+        if not self.supports(semantics):
+            raise UnsupportedSemanticsException("The solver backend {} does not support {} semantics!"
+                                                .format(self.name, semantics))
+        task = self.tasks[semantics]
+        return [arg.format(input=input_filename, task=task, format=self.input_format) for arg in self.command]
+
+    def solve_masks(self, input_filename, semantics):
+        """
+        :param input_filename: file describing the attack graph in self.input_format
+        :param semantics: semantics under which the extensions are computed
+        :return: list of bitmasks representing the extensions (sets of arguments)
+        """
+        output = run_solver(self.command_args(input_filename, semantics), self.is_complete)
+        return self.parse_output(output, semantics)
+
+    def start(self, input_filename, semantics):
+        """
+        start the solver without waiting for it to finish
+        :return: the Popen object of the solver process
+        """
+        return subprocess.Popen(self.command_args(input_filename, semantics),
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                universal_newlines=True)
+
+    def is_complete(self, output, returncode):
+        """
+        :param output: standard output of the solver
+        :param returncode: exit code of the solver
+        :return: True if output contains a complete answer, False if the solver failed
+        """
+        return returncode in self.exit_codes
+
+    @abc.abstractmethod
+    def parse_output(self, output, semantics):
+        """
+        :param output: standard output of the solver
+        :param semantics: semantics under which the extensions were computed
+        :return: list of bitmasks representing the extensions (sets of arguments)
+        """
+
+
+class AnswerSetBackend(SolverBackend):
+    def __init__(self, name, command, tasks, answer_header, regex, exit_codes=CLINGO_EXIT_CODES):
+        """
+        backend running an ASP solver on an ASPARTIX encoding
+        :param answer_header: answer head that the solver outputs
+        :param regex: regular expression matching the indices of the arguments in an answer
+        :param exit_codes: exit codes of the solver when it ran successfully, those of clingo by default
+        """
+        SolverBackend.__init__(self, name, command, tasks, ASPARTIX_FORMAT, exit_codes)
+        self.answer_header = answer_header
+        self.regex = regex
+
+    def answers(self, output):
+        """
+        :param output: standard output of the solver
+        :return: list of the answer sets in output, as strings
+        """
+        if self.answer_header not in output:
+            return []
+        return output.split(self.answer_header)[1:]
+
+    def is_complete(self, output, returncode):
+        if output.startswith(PYCLINGO_HEADER):
+            return returncode == 0 and any(line in CLINGO_STATUSES for line in output.splitlines())
+        return returncode in self.exit_codes and (self.answer_header in output or UNSATISFIABLE in output)
+
+    def parse_output(self, output, semantics):
+        return [indices_to_mask(re.findall(self.regex, answer)) for answer in self.answers(output)]
+
+
+class ICCMABackend(SolverBackend):
+    def __init__(self, name, command, input_format=APX_FORMAT, tasks=ICCMA_TASKS):
+        """
+        backend running a solver following the ICCMA command line interface, e.g.
+        ICCMABackend("mysolver", ["mysolver", "-p", "{task}", "-f", "{input}", "-fo", "{format}"])
+        """
+        SolverBackend.__init__(self, name, command, tasks, input_format)
+
+    def is_complete(self, output, returncode):
+        output = output.strip()
+        return returncode in self.exit_codes and \
+            (output == ICCMA_NO_EXTENSION or (output.startswith("[") and output.endswith("]")))
+
+    def parse_output(self, output, semantics):
+        output = output.strip()
+        if output == ICCMA_NO_EXTENSION:
+            return []
+
+        # the output of an enumeration task is a list of lists, that of a single extension task a list
+        if self.tasks[semantics].startswith("EE"):
+            extensions = re.findall(r"\[([^\[\]]*)\]", output[1:-1])
+        else:
+            extensions = re.findall(r"\[([^\[\]]*)\]", output)
+
+        return [indices_to_mask(re.findall(ICCMA_ARGUMENT_REGEX, ext)) for ext in extensions]
+
+
+class BackendStats:
+    def __init__(self):
+        """
+        statistics of a backend racing under one semantics in a Portfolio
+        """
+        self.races = 0
+        self.wins = 0
+        self.total_latency = 0.0
+
+    def win_rate(self):
+        return self.wins / self.races if self.races else 0.0
+
+    def mean_latency(self):
+        """
+        :return: mean time in seconds the backend took to win, None if it never won
+        """
+        return self.total_latency / self.wins if self.wins else None
+
+
+class Portfolio:
+    def __init__(self, backend_names, max_concurrent=None):
+        """
+        a portfolio runs several backends on the same problem concurrently and takes the first complete answer
+        :param backend_names: names of registered backends taking part in the races
+        :param max_concurrent: maximum number of backends started per race, all if None;
+                               the backends with the best record under the semantics are started
+        """
+        self.backend_names = list(backend_names)
+        self.max_concurrent = max_concurrent
+        # maps semantics to dictionaries mapping backend names to BackendStats
+        self.stats = {}
+
+    def backend_stats(self, semantics, backend_name):
+        """
+        :return: the BackendStats of the backend under semantics
+        """
+        semantics_stats = self.stats.setdefault(semantics, {})
+        if backend_name not in semantics_stats:
+            semantics_stats[backend_name] = BackendStats()
+        return semantics_stats[backend_name]
+
+    def order(self, semantics):
+        """
+        :return: list of the backend names, those which won most often and fastest under semantics first
+        """
+        def rank(name):
+            stats = self.backend_stats(semantics, name)
+            latency = stats.mean_latency()
+            return (-stats.win_rate(), latency if latency is not None else float("inf"))
+
+        return sorted(self.backend_names, key=rank)
+
+    def solve_masks(self, input_files, semantics, timeout=None):
+        """
+        race the backends supporting semantics, return the first complete answer and kill the other solvers
+        :param input_files: dictionary mapping input formats to files describing the same attack graph
+        :param semantics: semantics under which the extensions are computed
+        :param timeout: maximum number of seconds to wait for a complete answer, no limit if None
+        :return: tuple (name of the winning backend, list of bitmasks representing the extensions)
+        """
+        candidates = []
+        for name in self.order(semantics):
+            backend = get_backend(name)
+            if backend.supports(semantics) and backend.input_format in input_files:
+                candidates.append(backend)
+        if self.max_concurrent is not None:
+            candidates = candidates[:self.max_concurrent]
+        if not candidates:
+            raise UnsupportedSemanticsException("No backend in the portfolio supports {} semantics!"
+                                                .format(semantics))
+
+        finished = queue.Queue()
+        processes = []
+        start_time = time.time()
+        for backend in candidates:
+            process = backend.start(input_files[backend.input_format], semantics)
+            processes.append(process)
+            thread = threading.Thread(target=_wait_for_solver, args=(backend, process, start_time, finished))
+            thread.daemon = True
+            thread.start()
+
+        winner = None
+        try:
+            for _ in candidates:
+                remaining = None if timeout is None else max(0, timeout - (time.time() - start_time))
+                backend, output, returncode, latency = finished.get(timeout=remaining)
+                if backend.is_complete(output, returncode):
+                    winner = backend
+                    break
+        except queue.Empty:
+            pass
+        finally:
+            for process in processes:
+                if process.poll() is None:
+                    process.kill()
+
+        for backend in candidates:
+            self.backend_stats(semantics, backend.name).races += 1
+        if winner is None:
+            raise PortfolioFailedException("No backend in the portfolio computed the {} extensions!"
+                                           .format(semantics))
+
+        stats = self.backend_stats(semantics, winner.name)
+        stats.wins += 1
+        stats.total_latency += latency
+
+        return (winner.name, winner.parse_output(output, semantics))
+
+
+def _wait_for_solver(backend, process, start_time, finished):
+    output = process.communicate()[0]
+    finished.put((backend, output, process.returncode, time.time() - start_time))
+
+
+class UnknownBackendException(Exception):
+    def __init__(self, message):
+        self.message = message
+
+class UnsupportedSemanticsException(Exception):
+    def __init__(self, message):
+        self.message = message
+
+class UnknownFormatException(Exception):
+    def __init__(self, message):
+        self.message = message
+
+class SolverFailedException(Exception):
+    def __init__(self, message):
+        self.message = message
+
+class PortfolioFailedException(Exception):
+    def __init__(self, message):
+        self.message = message
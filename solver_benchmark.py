@@ -0,0 +1,403 @@
+"""Copyright 2017 Ziyi Bao, Department of Computing, Imperial College London
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License."""
+
+"""
+An end-to-end benchmark harness running a corpus of ABA+ frameworks and abstract attack graphs through each solver
+backend under each semantics.
+Every run is split into the encoding of the input file, the spawn of the solver process, the solve time until the
+solver has exited and the decoding of its answer. The median and 95th percentile of each phase, the median and 95th
+percentile latency of the whole run and the peak resident set size of the solver are recorded for each instance,
+backend and semantics, and can be compared against a baseline written by an earlier run.
+The corpus consists of framework files (.pl), attack graph files (.apx, .tgf) and generated instances, ABA+
+frameworks from benchmark.generate_framework() and random attack graphs in the style of the ICCMA generators.
+
+usage: python3 solver_benchmark.py [-o OUTPUT] [--baseline BASELINE] [--report REPORT] [--repeat N]
+                                   [--backends NAME ...] [--semantics SEMANTICS ...] [--iccma NAME=COMMAND]
+                                   [--no-generated] [--label LABEL] [PATH ...]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from abap_parser import generate_aba_plus_framework
+from benchmark import generate_framework, current_commit
+from aspartix_interface import *
+
+ENCODING_PHASE = "encode"
+SPAWN_PHASE = "spawn"
+SOLVE_PHASE = "solve"
+DECODING_PHASE = "decode"
+TOTAL = "total"
+
+RUN_PHASES = [ENCODING_PHASE, SPAWN_PHASE, SOLVE_PHASE, DECODING_PHASE, TOTAL]
+
+ALL_SEMANTICS = [STABLE_SEMANTICS, GROUNDED_SEMANTICS, COMPLETE_SEMANTICS, PREFERRED_SEMANTICS, IDEAL_SEMANTICS]
+
+FRAMEWORK_KIND = "aba"
+GRAPH_KIND = "af"
+
+# maps file extensions to the format of the attack graphs they contain
+GRAPH_FILE_FORMATS = {".apx": APX_FORMAT, ".tgf": TGF_FORMAT}
+FRAMEWORK_FILE_EXTENSION = ".pl"
+
+# a median latency changed by more than this fraction of the baseline is reported
+DEFAULT_THRESHOLD = 0.1
+
+REGRESSION = "regression"
+IMPROVEMENT = "improvement"
+UNCHANGED = "unchanged"
+NEW = "new"
+MISSING = "missing"
+
+
+class FrameworkInstance:
+    kind = FRAMEWORK_KIND
+
+    def __init__(self, name, input_string):
+        """
+        :param name: name identifying the instance in the results
+        :param input_string: A string defining an ABA+ framework
+        """
+        self.name = name
+        self.abap = generate_aba_plus_framework(input_string)[0]
+        self.asp = None
+
+    def encode(self, filename, input_format):
+        """
+        generate the arguments and attacks and write the attack graph to filename in input_format
+        """
+        self.asp = ASPARTIX_Interface(self.abap)
+        self.asp.generate_input_file_for_clingo(filename)
+        if input_format != ASPARTIX_FORMAT:
+            # the graph built for the ASPARTIX encoding is written again in the format of the backend
+            self.asp.export_attack_graph(filename, input_format)
+
+    def decode(self, masks):
+        """
+        :param masks: list of bitmasks over the arguments, as returned by SolverBackend.parse_output()
+        :return: dictionary mapping the extensions to their conclusions
+        """
+        return self.asp.masks_to_arguments_extensions(masks)
+
+
+class GraphInstance:
+    kind = GRAPH_KIND
+
+    def __init__(self, name, argument_count, attacks):
+        """
+        :param name: name identifying the instance in the results
+        :param argument_count: number of arguments, which are identified by the indices 0 to argument_count - 1
+        :param attacks: list of pairs (index of attacker, index of attackee)
+        """
+        self.name = name
+        self.argument_count = argument_count
+        self.attacks = attacks
+
+    def encode(self, filename, input_format):
+        export_graph(filename, self.argument_count, self.attacks, input_format)
+
+    def decode(self, masks):
+        return masks
+
+
+def generate_attack_graph(argument_count, attack_probability=0.1, seed=0):
+    """
+    generate a random attack graph in which each attack exists with the same probability, like the Erdos-Renyi
+    family of the ICCMA benchmarks
+    :return: list of pairs (index of attacker, index of attackee)
+    """
+    rand = random.Random(seed)
+    return [(attacker, attackee) for attacker in range(0, argument_count) for attackee in range(0, argument_count)
+            if rand.random() < attack_probability]
+
+
+def read_attack_graph(filename, input_format):
+    """
+    :param input_format: APX_FORMAT or TGF_FORMAT
+    :return: tuple with two elements, the arguments are numbered in the order of their declaration:
+             1: number of arguments
+             2: list of pairs (index of attacker, index of attackee)
+    """
+    f = open(filename, 'r')
+    content = f.read()
+    f.close()
+
+    if input_format == APX_FORMAT:
+        names = re.findall(r"arg\(\s*([^\s,()]+)\s*\)", content)
+        attacks = re.findall(r"att\(\s*([^\s,()]+)\s*,\s*([^\s,()]+)\s*\)", content)
+    else:
+        names_part, _, attacks_part = content.partition("#")
+        names = names_part.split()
+        attacks = [tuple(line.split()[:2]) for line in attacks_part.splitlines() if line.strip()]
+
+    indices = dict((name, idx) for idx, name in enumerate(names))
+    return (len(names), [(indices[attacker], indices[attackee]) for attacker, attackee in attacks])
+
+
+def load_corpus(paths, generated=True, seed=0):
+    """
+    :param paths: list of framework and attack graph files and of directories searched for them
+    :param generated: if True, add generated ABA+ frameworks and attack graphs to the corpus
+    :return: list of FrameworkInstances and GraphInstances
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                files.extend(os.path.join(directory, name) for name in names)
+        else:
+            files.append(path)
+
+    corpus = []
+    for filename in sorted(files):
+        extension = os.path.splitext(filename)[1]
+        if extension == FRAMEWORK_FILE_EXTENSION:
+            f = open(filename, 'r')
+            corpus.append(FrameworkInstance(filename, f.read()))
+            f.close()
+        elif extension in GRAPH_FILE_FORMATS:
+            argument_count, attacks = read_attack_graph(filename, GRAPH_FILE_FORMATS[extension])
+            corpus.append(GraphInstance(filename, argument_count, attacks))
+
+    if generated:
+        for assumptions in (10, 20):
+            corpus.append(FrameworkInstance("generated-aba-{}".format(assumptions),
+                                            generate_framework(assumptions, seed=seed)))
+        for argument_count in (20, 40):
+            corpus.append(GraphInstance("generated-af-{}".format(argument_count), argument_count,
+                                        generate_attack_graph(argument_count, seed=seed)))
+
+    return corpus
+
+
+def run_measured(args):
+    """
+    run a solver to completion
+    :param args: list of the command line arguments starting the solver
+    :return: tuple with five elements:
+             1: standard output of the solver
+             2: number of seconds taken to spawn the solver process
+             3: number of seconds from the spawn until the solver exited
+             4: peak resident set size of the solver process in kilobytes
+             5: exit code of the solver, negated signal number if it was killed by a signal
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+    spawned = time.perf_counter()
+    output = process.stdout.read()
+    process.stdout.close()
+    # waiting for the process directly yields the resource usage of this process alone
+    _, status, usage = os.wait4(process.pid, 0)
+    finished = time.perf_counter()
+    process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    max_rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return (output, spawned - start, finished - spawned, max_rss, process.returncode)
+
+
+def measure(instance, backend, semantics, directory):
+    """
+    run an instance through a backend once
+    :param directory: directory in which the input file is written
+    :return: dictionary with the entries 'timings' mapping each of RUN_PHASES to the number of seconds it took,
+             'max_rss' (kilobytes), 'extensions' (number of extensions) and 'complete' (False if the solver failed)
+    """
+    input_filename = os.path.join(directory, "input." + backend.input_format)
+
+    start = time.perf_counter()
+    instance.encode(input_filename, backend.input_format)
+    encoded = time.perf_counter()
+
+    output, spawn_time, solve_time, max_rss, returncode = run_measured(backend.command_args(input_filename,
+                                                                                            semantics))
+
+    decode_start = time.perf_counter()
+    complete = backend.is_complete(output, returncode)
+    extensions = instance.decode(backend.parse_output(output, semantics))
+    decoded = time.perf_counter()
+
+    timings = {ENCODING_PHASE: encoded - start, SPAWN_PHASE: spawn_time, SOLVE_PHASE: solve_time,
+               DECODING_PHASE: decoded - decode_start}
+    timings[TOTAL] = sum(timings.values())
+    return {'timings': timings, 'max_rss': max_rss, 'extensions': len(extensions), 'complete': complete}
+
+
+def percentile(values, fraction):
+    """
+    :return: the nearest-rank percentile of values, e.g. the median for fraction 0.5
+    """
+    ordered = sorted(values)
+    return ordered[max(0, int(math.ceil(fraction * len(ordered))) - 1)]
+
+
+def run_corpus(corpus, backend_names, semantics=ALL_SEMANTICS, repeat=5):
+    """
+    run every instance of corpus through every backend under every semantics the backend supports
+    :param backend_names: names of registered backends
+    :param repeat: number of runs of each instance through each backend under each semantics
+    :return: list of dictionaries, one for each instance, backend and semantics, with the entries 'instance',
+             'kind', 'backend', 'semantics', 'runs', 'median' and 'p95' (each mapping RUN_PHASES to seconds),
+             'max_rss' (largest peak resident set size of the solver in kilobytes), 'extensions' and 'failures'
+             (number of runs in which the solver failed)
+    """
+    directory = tempfile.mkdtemp()
+    results = []
+    try:
+        for instance in corpus:
+            for backend_name in backend_names:
+                backend = get_backend(backend_name)
+                for s in semantics:
+                    if not backend.supports(s):
+                        continue
+                    runs = [measure(instance, backend, s, directory) for _ in range(0, repeat)]
+                    results.append({
+                        'instance': instance.name, 'kind': instance.kind, 'backend': backend_name, 'semantics': s,
+                        'runs': repeat,
+                        'median': dict((phase, statistics.median(run['timings'][phase] for run in runs))
+                                       for phase in RUN_PHASES),
+                        'p95': dict((phase, percentile([run['timings'][phase] for run in runs], 0.95))
+                                    for phase in RUN_PHASES),
+                        'max_rss': max(run['max_rss'] for run in runs),
+                        'extensions': runs[-1]['extensions'],
+                        'failures': sum(1 for run in runs if not run['complete'])})
+    finally:
+        shutil.rmtree(directory)
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    :param results: list returned by run_corpus()
+    :param baseline: list returned by an earlier run_corpus()
+    :param threshold: fraction by which a median latency has to change to be reported
+    :return: list of dictionaries with the entries 'instance', 'backend', 'semantics', 'baseline' and 'current'
+             (median total latencies, None if missing), 'change' (current / baseline - 1, None if either is missing)
+             and 'status' (REGRESSION, IMPROVEMENT, UNCHANGED, NEW or MISSING)
+    """
+    def key(result):
+        return (result['instance'], result['backend'], result['semantics'])
+
+    baseline_latencies = dict((key(result), result['median'][TOTAL]) for result in baseline)
+    current_latencies = dict((key(result), result['median'][TOTAL]) for result in results)
+
+    rows = []
+    for k in sorted(set(baseline_latencies) | set(current_latencies)):
+        before = baseline_latencies.get(k)
+        after = current_latencies.get(k)
+        change = None
+        if before is None:
+            status = NEW
+        elif after is None:
+            status = MISSING
+        else:
+            change = after / before - 1 if before > 0 else 0.0
+            if change > threshold:
+                status = REGRESSION
+            elif change < -threshold:
+                status = IMPROVEMENT
+            else:
+                status = UNCHANGED
+        rows.append({'instance': k[0], 'backend': k[1], 'semantics': k[2], 'baseline': before, 'current': after,
+                     'change': change, 'status': status})
+    return rows
+
+
+def format_report(rows):
+    """
+    :param rows: list returned by compare()
+    :return: plain text table of the comparison, followed by the number of rows of each status
+    """
+    def seconds(value):
+        return "-" if value is None else "{:.4f}".format(value)
+
+    lines = ["{:<40} {:<10} {:<10} {:>10} {:>10} {:>8}  {}".format(
+        "instance", "backend", "semantics", "baseline", "current", "change", "status")]
+    for row in rows:
+        change = "-" if row['change'] is None else "{:+.1%}".format(row['change'])
+        lines.append("{:<40} {:<10} {:<10} {:>10} {:>10} {:>8}  {}".format(
+            row['instance'][-40:], row['backend'], row['semantics'], seconds(row['baseline']),
+            seconds(row['current']), change, row['status']))
+
+    counts = dict((status, sum(1 for row in rows if row['status'] == status))
+                  for status in (REGRESSION, IMPROVEMENT, UNCHANGED, NEW, MISSING))
+    lines.append("")
+    lines.append(", ".join("{}: {}".format(status, count) for status, count in counts.items()))
+    return "\n".join(lines) + "\n"
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the solver backends end to end.")
+    parser.add_argument("paths", metavar="PATH", nargs="*",
+                        help="framework (.pl) or attack graph (.apx, .tgf) file, or directory searched for them")
+    parser.add_argument("-o", "--output", help="JSON file to which the results are written, which can be used as "
+                                               "the baseline of a later run (default: standard output)")
+    parser.add_argument("--baseline", help="JSON file written by an earlier run to compare against")
+    parser.add_argument("--report", help="file to which the comparison against the baseline is written "
+                                         "(default: standard error)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fraction by which a median latency has to change to be reported")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs per instance, backend and semantics")
+    parser.add_argument("--backends", nargs="+", help="names of the backends to run (default: all registered)")
+    parser.add_argument("--semantics", nargs="+", choices=ALL_SEMANTICS, default=ALL_SEMANTICS)
+    parser.add_argument("--iccma", action="append", default=[], metavar="NAME=COMMAND",
+                        help="register a solver following the ICCMA interface, e.g. "
+                             "'mysolver=mysolver -p {task} -f {input} -fo {format}'")
+    parser.add_argument("--no-generated", action="store_true", help="only run the given files")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated instances")
+    parser.add_argument("--label", help="label recorded with the results (default: the current commit)")
+    args = parser.parse_args(argv[1:])
+
+    for solver in args.iccma:
+        name, _, command = solver.partition("=")
+        register_backend(ICCMABackend(name, shlex.split(command)))
+    backend_names = args.backends if args.backends is not None else sorted(backends)
+
+    corpus = load_corpus(args.paths, not args.no_generated, args.seed)
+    results = run_corpus(corpus, backend_names, args.semantics, args.repeat)
+    document = {'label': args.label if args.label is not None else current_commit(), 'results': results}
+
+    if args.output is None:
+        sys.stdout.write(json.dumps(document, indent=1, sort_keys=True) + "\n")
+    else:
+        f = open(args.output, 'w')
+        json.dump(document, f, indent=1, sort_keys=True)
+        f.close()
+
+    if args.baseline is not None:
+        f = open(args.baseline, 'r')
+        baseline = json.load(f)['results']
+        f.close()
+        report = format_report(compare(results, baseline, args.threshold))
+        if args.report is None:
+            sys.stderr.write(report)
+        else:
+            f = open(args.report, 'w')
+            f.write(report)
+            f.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -17,8 +17,33 @@ __email__ = "zb714@ic.ac.uk"
 __copyright__ = "Copyright (c) 2016 Ziyi Bao"
 
 import unittest
+import sys
+import time
+import tempfile
+import shutil
+import json
+import tracemalloc
+import mmap
+import pickle
+import sqlite3
+import subprocess
+import threading
 from aspartix_interface import *
 from abap_parser import *
+from abap_pipeline import *
+from abap_fingerprint import *
+from result_cache import *
+from session_store import *
+from job_queue import *
+from abap_batch import *
+from batch_runner import *
+from abap_compiled import *
+from snapshot_store import *
+from benchmark import *
+from solver_benchmark import *
+from abap_clusters import *
+from abap_ndjson import *
+from abap_listing import *
 
 class TestABAPlus(unittest.TestCase):
 
@@ -857,7 +882,177 @@ class TestABAPParser(unittest.TestCase):
         self.assertEqual(abap.rules, rules)
 
 
+    def test_generate_aba_plus_symbols_containing_predicates(self):
+        abap, contr_map = generate_aba_plus_framework("myAsm(a). myAsm(myAsm_b). contrary(a, contrary_a).\n"
+                                                      "myRule(contrary_a, [myAsm_b]). myRule(myRule_c, []).")
+
+        a = Sentence("a", False)
+        b = Sentence("myAsm_b", False)
+        c = Sentence("myRule_c", False)
+        self.assertEqual(abap.assumptions, {a, b})
+        self.assertEqual(abap.rules, {Rule({b}, a.contrary()), Rule(set(), c)})
+        self.assertEqual(contr_map, {"contrary_a": "a"})
+
+    def test_generate_aba_plus_comments_and_line_breaks(self):
+        abap = generate_aba_plus_framework("% assumptions\nmyAsm(a). myAsm(b). % b is an assumption\n"
+                                           "myPrefLT(\n  a,\n  b\n).\r\nmyAsm(c)")[0]
+
+        a = Sentence("a", False)
+        b = Sentence("b", False)
+        self.assertEqual(abap.assumptions, {a, b, Sentence("c", False)})
+        self.assertEqual(abap.preferences, {Preference(a, b, LESS_THAN)})
+
+    def test_generate_aba_plus_sentences_interned(self):
+        abap = generate_aba_plus_framework("myAsm(a). myRule(p, [a]). myRule(q, [a]).")[0]
+
+        antecedents = [next(iter(rule.antecedent)) for rule in abap.rules]
+        self.assertIs(antecedents[0], antecedents[1])
+        self.assertIn(antecedents[0], abap.assumptions)
+        self.assertIs(antecedents[0], next(iter(abap.assumptions)))
+
+    def test_generate_aba_plus_errors_report_lines(self):
+        def message(input_string, exception):
+            with self.assertRaises(exception) as context:
+                generate_aba_plus_framework(input_string)
+            return context.exception.message
+
+        self.assertEqual(message("myAsm(a).\n\nmyRule(p, [a,]).", InvalidDeclarationException),
+                         "Line 3: Unexpected ']'!")
+        self.assertEqual(message("myAsm(a).\nmyAsm(b, c).", InvalidDeclarationException),
+                         "Line 2: Invalid arguments of 'myAsm'!")
+        self.assertEqual(message("myAsm(a).\nmyFact(a).", InvalidDeclarationException),
+                         "Line 2: Unknown predicate 'myFact'!")
+        self.assertEqual(message("myAsm(a).\nmyRule(p, [a]", InvalidDeclarationException),
+                         "Line 2: Unexpected end of input!")
+        self.assertEqual(message("myAsm(a).\ncontrary(b, x).", InvalidContraryDeclarationException),
+                         "Line 2: Contraries cannot be declared for non-assumptions!")
+        self.assertEqual(message("myAsm(a).\n\ncontrary(a, x).\ncontrary(a, y).", DuplicateSymbolException),
+                         "Line 4: The contrary of an assumption can only be mapped to a single symbol!")
+        self.assertEqual(message("myAsm(a).\nmyPrefLE(a, b).", InvalidPreferenceDeclarationException),
+                         "Line 2: Preferences can only be defined for assumptions!")
+
+
+    def test_generate_aba_plus_from_file_same_as_string(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "framework.pl")
+            input_string = "myAsm(\u03b1). myAsm(b). contrary(\u03b1, x).\nmyRule(x, [b]). myPrefLE(b, \u03b1)."
+            f = open(filename, 'w', encoding="utf-8")
+            f.write(input_string)
+            f.close()
+
+            from_file = generate_aba_plus_framework_from_file(filename)
+            from_string = generate_aba_plus_framework(input_string)
+            self.assertEqual(from_file[0].assumptions, from_string[0].assumptions)
+            self.assertEqual(from_file[0].rules, from_string[0].rules)
+            self.assertEqual(from_file[0].preferences, from_string[0].preferences)
+            self.assertEqual(from_file[1], {"x": "\u03b1"})
+
+            open(filename, 'w').close()
+            self.assertEqual(generate_aba_plus_framework_from_file(filename)[0].assumptions, set())
+        finally:
+            shutil.rmtree(directory)
+
+    def test_parse_declarations_from_file_streamed(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "framework.pl")
+            f = open(filename, 'w')
+            for i in range(0, 40000):
+                f.write("myRule(p{0}, [a{0}, b{0}]).\n".format(i % 10))
+            f.close()
+
+            f = open(filename, 'rb')
+            input = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            tracemalloc.start()
+            count = 0
+            # only the symbols are kept, as in a framework
+            symbols = set()
+            for _, _, args in parse_declarations(input):
+                symbols.add(args[0])
+                symbols.update(args[1])
+                count += 1
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            input.close()
+            f.close()
+
+            self.assertEqual(count, 40000)
+            # declarations are not accumulated, so the peak is far below the file size
+            self.assertLess(peak, os.path.getsize(filename) / 5)
+        finally:
+            shutil.rmtree(directory)
+
+
 class TestASPARTIXInterface(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, filename):
+        """
+        :return: path of filename in the temporary directory of the test
+        """
+        return os.path.join(self.directory, filename)
+
+    def test_generate_input_file_for_clingo(self):
+        a = Sentence("a")
+        b = Sentence("b")
+        c = Sentence("c")
+        assumptions = {a, b, c}
+
+        rule1 = Rule({a, c}, b.contrary())
+        rule2 = Rule({b}, a.contrary())
+        rules = {rule1, rule2}
+
+        abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=set())
+
+        asp = ASPARTIX_Interface(abap)
+        asp.generate_input_file_for_clingo(self.path("test_generate_input_file.lp"))
+
+        self.assertEqual(len(asp.arguments), len(set(asp.arguments)))
+        for premise, idx in asp.argument_indices.items():
+            self.assertEqual(asp.arguments[idx], premise)
+
+        with open(self.path("test_generate_input_file.lp")) as f:
+            facts = f.read().splitlines()
+
+        self.assertEqual(len(facts), len(asp.arguments) + len(asp.attacks))
+        self.assertIn("att({}, {}).".format(asp.argument_indices[frozenset({a, c})],
+                                            asp.argument_indices[frozenset({b})]), facts)
+
+    def test_attack_index_pairs(self):
+        assumptions = {Sentence("a{}".format(i)) for i in range(0, 40)}
+        rules = {Rule({Sentence("a{}".format(i))}, Sentence("a{}".format((7 * i) % 40)).contrary())
+                 for i in range(0, 40)}
+        abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=set())
+
+        asp = ASPARTIX_Interface(abap)
+        asp.generate_input_file_for_clingo(self.path("test_generate_input_file.lp"))
+
+        pairs = list(asp.attack_index_pairs())
+        self.assertEqual(len(pairs), len(asp.attacks))
+        self.assertEqual({(asp.arguments[i], asp.arguments[j]) for i, j in pairs}, asp.attacks)
+        attackers = {i for i, _ in pairs}
+        mask = sum(1 << i for i in attackers)
+        self.assertEqual(asp.mask_to_extension(mask), set().union(*[asp.arguments[i] for i in attackers]))
+
+    def test_grounded_mask_agrees_with_clingo(self):
+        # a chain a0 -> a1 -> ... -> a29 followed by the cycle a30 -> a31 -> a32 -> a30 attacked by a29
+        assumptions = {Sentence("a{}".format(i)) for i in range(0, 33)}
+        rules = {Rule({Sentence("a{}".format(i))}, Sentence("a{}".format(i + 1)).contrary()) for i in range(0, 32)}
+        rules.add(Rule({Sentence("a32")}, Sentence("a30").contrary()))
+        abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=set())
+
+        asp = ASPARTIX_Interface(abap)
+        asp.generate_input_file_for_clingo(self.path("test_calculate_extensions.lp"))
+
+        grounded = frozenset(asp.mask_to_extension(asp.grounded_mask()))
+        self.assertEqual(grounded, {Sentence("a{}".format(i)) for i in range(0, 30, 2)})
+        self.assertEqual({grounded}, asp.calculate_grounded_extensions(self.path("test_calculate_extensions.lp")))
+
     def test_simple_calculate_admissible_extensions(self):
         a = Sentence("a")
         b = Sentence("b")
@@ -869,9 +1064,9 @@ class TestASPARTIXInterface(unittest.TestCase):
         abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences = set())
 
         asp = ASPARTIX_Interface(abap)
-        asp.generate_input_file_for_clingo("test.lp")
+        asp.generate_input_file_for_clingo(self.path("test.lp"))
 
-        adm_ext =  asp.calculate_admissible_extensions("test.lp")
+        adm_ext =  asp.calculate_admissible_extensions(self.path("test.lp"))
 
         self.assertEqual(adm_ext, {frozenset({a}), frozenset()})
 
@@ -886,9 +1081,9 @@ class TestASPARTIXInterface(unittest.TestCase):
         abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=set())
 
         asp = ASPARTIX_Interface(abap)
-        asp.generate_input_file_for_clingo("test.lp")
+        asp.generate_input_file_for_clingo(self.path("test.lp"))
 
-        stable_ext = asp.calculate_stable_extensions("test.lp")
+        stable_ext = asp.calculate_stable_extensions(self.path("test.lp"))
 
         self.assertEqual(stable_ext, {frozenset({a})})
 
@@ -909,9 +1104,9 @@ class TestASPARTIXInterface(unittest.TestCase):
         abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=preferences)
 
         asp = ASPARTIX_Interface(abap)
-        asp.generate_input_file_for_clingo("test4.lp")
+        asp.generate_input_file_for_clingo(self.path("test4.lp"))
 
-        stable_ext = asp.calculate_stable_extensions("test4.lp")
+        stable_ext = asp.calculate_stable_extensions(self.path("test4.lp"))
 
         self.assertEqual(stable_ext, set())
 
@@ -936,18 +1131,18 @@ class TestASPARTIXInterface(unittest.TestCase):
         abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=preferences)
 
         asp = ASPARTIX_Interface(abap)
-        asp.generate_input_file_for_clingo("test_calculate_extensions.lp")
+        asp.generate_input_file_for_clingo(self.path("test_calculate_extensions.lp"))
 
-        stable_ext = asp.calculate_stable_extensions("test_calculate_extensions.lp")
+        stable_ext = asp.calculate_stable_extensions(self.path("test_calculate_extensions.lp"))
         self.assertEqual(stable_ext, {frozenset([a, d]), frozenset([b, d])})
 
-        complete_ext = asp.calculate_complete_extensions("test_calculate_extensions.lp")
+        complete_ext = asp.calculate_complete_extensions(self.path("test_calculate_extensions.lp"))
 
-        preferred_ext = asp.calculate_preferred_extensions("test_calculate_extensions.lp")
+        preferred_ext = asp.calculate_preferred_extensions(self.path("test_calculate_extensions.lp"))
 
-        grounded_ext = asp.calculate_grounded_extensions("test_calculate_extensions.lp")
+        grounded_ext = asp.calculate_grounded_extensions(self.path("test_calculate_extensions.lp"))
 
-        ideal_ext = asp.calculate_ideal_extensions("test_calculate_extensions.lp")
+        ideal_ext = asp.calculate_ideal_extensions(self.path("test_calculate_extensions.lp"))
 
     # example 6 from aba+ unit tests
     def test_calculate_extensions2(self):
@@ -968,21 +1163,21 @@ class TestASPARTIXInterface(unittest.TestCase):
         abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=preferences)
 
         asp = ASPARTIX_Interface(abap)
-        asp.generate_input_file_for_clingo("test_calculate_extensions2.lp")
+        asp.generate_input_file_for_clingo(self.path("test_calculate_extensions2.lp"))
 
-        stable_ext = asp.calculate_stable_extensions("test_calculate_extensions2.lp")
+        stable_ext = asp.calculate_stable_extensions(self.path("test_calculate_extensions2.lp"))
         self.assertEqual(stable_ext, {frozenset([a, b]), frozenset([b, c])})
 
-        complete_ext = asp.calculate_complete_extensions("test_calculate_extensions2.lp")
+        complete_ext = asp.calculate_complete_extensions(self.path("test_calculate_extensions2.lp"))
         self.assertEqual(complete_ext, {frozenset([b]), frozenset([a, b]), frozenset([b, c])})
 
-        preferred_ext = asp.calculate_preferred_extensions("test_calculate_extensions2.lp")
+        preferred_ext = asp.calculate_preferred_extensions(self.path("test_calculate_extensions2.lp"))
         self.assertEqual(preferred_ext, {frozenset([a, b]), frozenset([b, c])})
 
-        grounded_ext = asp.calculate_grounded_extensions("test_calculate_extensions2.lp")
+        grounded_ext = asp.calculate_grounded_extensions(self.path("test_calculate_extensions2.lp"))
         self.assertEqual(grounded_ext, {frozenset([b])})
 
-        ideal_ext = asp.calculate_ideal_extensions("test_calculate_extensions2.lp")
+        ideal_ext = asp.calculate_ideal_extensions(self.path("test_calculate_extensions2.lp"))
         self.assertEqual(ideal_ext, {frozenset([b])})
 
     # example 7 from aba+ unit tests
@@ -1004,21 +1199,21 @@ class TestASPARTIXInterface(unittest.TestCase):
         abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=preferences)
 
         asp = ASPARTIX_Interface(abap)
-        asp.generate_input_file_for_clingo("test_calculate_extensions3.lp")
+        asp.generate_input_file_for_clingo(self.path("test_calculate_extensions3.lp"))
 
-        stable_ext = asp.calculate_stable_extensions("test_calculate_extensions3.lp")
+        stable_ext = asp.calculate_stable_extensions(self.path("test_calculate_extensions3.lp"))
         self.assertEqual(stable_ext, {frozenset([a, b])})
 
-        complete_ext = asp.calculate_complete_extensions("test_calculate_extensions3.lp")
+        complete_ext = asp.calculate_complete_extensions(self.path("test_calculate_extensions3.lp"))
         self.assertEqual(complete_ext, {frozenset([a, b])})
 
-        preferred_ext = asp.calculate_preferred_extensions("test_calculate_extensions3.lp")
+        preferred_ext = asp.calculate_preferred_extensions(self.path("test_calculate_extensions3.lp"))
         self.assertEqual(preferred_ext, {frozenset([a, b])})
 
-        grounded_ext = asp.calculate_grounded_extensions("test_calculate_extensions3.lp")
+        grounded_ext = asp.calculate_grounded_extensions(self.path("test_calculate_extensions3.lp"))
         self.assertEqual(grounded_ext, {frozenset([a, b])})
 
-        ideal_ext = asp.calculate_ideal_extensions("test_calculate_extensions3.lp")
+        ideal_ext = asp.calculate_ideal_extensions(self.path("test_calculate_extensions3.lp"))
         self.assertEqual(ideal_ext, {frozenset([a, b])})
 
     # example 8 from aba+ unit tests
@@ -1039,21 +1234,21 @@ class TestASPARTIXInterface(unittest.TestCase):
         abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=preferences)
 
         asp = ASPARTIX_Interface(abap)
-        asp.generate_input_file_for_clingo("test_calculate_extensions2.lp")
+        asp.generate_input_file_for_clingo(self.path("test_calculate_extensions2.lp"))
 
-        stable_ext = asp.calculate_stable_extensions("test_calculate_extensions2.lp")
+        stable_ext = asp.calculate_stable_extensions(self.path("test_calculate_extensions2.lp"))
         self.assertEqual(stable_ext, {frozenset([b, c])})
 
-        complete_ext = asp.calculate_complete_extensions("test_calculate_extensions2.lp")
+        complete_ext = asp.calculate_complete_extensions(self.path("test_calculate_extensions2.lp"))
         self.assertEqual(complete_ext, {frozenset([b, c])})
 
-        preferred_ext = asp.calculate_preferred_extensions("test_calculate_extensions2.lp")
+        preferred_ext = asp.calculate_preferred_extensions(self.path("test_calculate_extensions2.lp"))
         self.assertEqual(preferred_ext, {frozenset([b, c])})
 
-        grounded_ext = asp.calculate_grounded_extensions("test_calculate_extensions2.lp")
+        grounded_ext = asp.calculate_grounded_extensions(self.path("test_calculate_extensions2.lp"))
         self.assertEqual(grounded_ext, {frozenset([b, c])})
 
-        ideal_ext = asp.calculate_ideal_extensions("test_calculate_extensions2.lp")
+        ideal_ext = asp.calculate_ideal_extensions(self.path("test_calculate_extensions2.lp"))
         self.assertEqual(ideal_ext, {frozenset([b, c])})
 
     def test_calculate_extensions5(self):
@@ -1070,21 +1265,21 @@ class TestASPARTIXInterface(unittest.TestCase):
         abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=preferences)
 
         asp = ASPARTIX_Interface(abap)
-        asp.generate_input_file_for_clingo("test_calculate_extensions5.lp")
+        asp.generate_input_file_for_clingo(self.path("test_calculate_extensions5.lp"))
 
-        stable_ext = asp.calculate_stable_extensions("test_calculate_extensions5.lp")
+        stable_ext = asp.calculate_stable_extensions(self.path("test_calculate_extensions5.lp"))
         self.assertEqual(stable_ext, {frozenset([b])})
 
-        complete_ext = asp.calculate_complete_extensions("test_calculate_extensions5.lp")
+        complete_ext = asp.calculate_complete_extensions(self.path("test_calculate_extensions5.lp"))
         self.assertEqual(complete_ext, {frozenset([b])})
 
-        preferred_ext = asp.calculate_preferred_extensions("test_calculate_extensions5.lp")
+        preferred_ext = asp.calculate_preferred_extensions(self.path("test_calculate_extensions5.lp"))
         self.assertEqual(preferred_ext, {frozenset([b])})
 
-        grounded_ext = asp.calculate_grounded_extensions("test_calculate_extensions5.lp")
+        grounded_ext = asp.calculate_grounded_extensions(self.path("test_calculate_extensions5.lp"))
         self.assertEqual(grounded_ext, {frozenset([b])})
 
-        ideal_ext = asp.calculate_ideal_extensions("test_calculate_extensions5.lp")
+        ideal_ext = asp.calculate_ideal_extensions(self.path("test_calculate_extensions5.lp"))
         self.assertEqual(ideal_ext, {frozenset([b])})
 
     def test_calculate_extensions6(self):
@@ -1104,23 +1299,1404 @@ class TestASPARTIXInterface(unittest.TestCase):
         abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=preferences)
 
         asp = ASPARTIX_Interface(abap)
-        asp.generate_input_file_for_clingo("test_calculate_extensions6.lp")
+        asp.generate_input_file_for_clingo(self.path("test_calculate_extensions6.lp"))
 
-        stable_ext = asp.calculate_stable_extensions("test_calculate_extensions6.lp")
+        stable_ext = asp.calculate_stable_extensions(self.path("test_calculate_extensions6.lp"))
         self.assertEqual(stable_ext, {frozenset([b,c])})
 
-        complete_ext = asp.calculate_complete_extensions("test_calculate_extensions6.lp")
+        complete_ext = asp.calculate_complete_extensions(self.path("test_calculate_extensions6.lp"))
         self.assertEqual(complete_ext, {frozenset([b,c])})
 
-        preferred_ext = asp.calculate_preferred_extensions("test_calculate_extensions6.lp")
+        preferred_ext = asp.calculate_preferred_extensions(self.path("test_calculate_extensions6.lp"))
         self.assertEqual(preferred_ext, {frozenset([b,c])})
 
-        grounded_ext = asp.calculate_grounded_extensions("test_calculate_extensions6.lp")
+        grounded_ext = asp.calculate_grounded_extensions(self.path("test_calculate_extensions6.lp"))
         self.assertEqual(grounded_ext, {frozenset([b,c])})
 
-        ideal_ext = asp.calculate_ideal_extensions("test_calculate_extensions6.lp")
+        ideal_ext = asp.calculate_ideal_extensions(self.path("test_calculate_extensions6.lp"))
         self.assertEqual(ideal_ext, {frozenset([b,c])})
 
+    def test_calculate_all_arguments_extensions(self):
+        input_file = self.path("test_calculate_all_extensions.lp")
+        a = Sentence("a")
+        b = Sentence("b")
+        c = Sentence("c")
+        d = Sentence("d")
+
+        frameworks = [({a, b, c, d},
+                       {Rule({a}, b.contrary()), Rule({b}, a.contrary()),
+                        Rule({a}, c.contrary()), Rule({c}, b.contrary())},
+                       {Preference(c, b, LESS_THAN)}),
+                      ({a, b, c},
+                       {Rule({a}, b.contrary()), Rule({b}, c.contrary()), Rule({c}, a.contrary())},
+                       {Preference(b, a, LESS_THAN)}),
+                      ({a, b, c},
+                       {Rule({a, c}, b.contrary()), Rule({b, c}, a.contrary())},
+                       {Preference(a, b, LESS_THAN), Preference(b, c, LESS_THAN)}),
+                      ({a, b, c, d},
+                       {Rule({a}, b.contrary()), Rule({b, c}, d.contrary())},
+                       {Preference(a, b, LESS_THAN)})]
+
+        for assumptions, rules, preferences in frameworks:
+            abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=preferences)
+
+            asp = ASPARTIX_Interface(abap)
+            asp.generate_input_file_for_clingo(input_file)
+
+            all_ext = asp.calculate_all_arguments_extensions(input_file)
+
+            self.assertEqual(all_ext[STABLE_SEMANTICS],
+                             asp.calculate_stable_arguments_extensions(input_file))
+            self.assertEqual(all_ext[GROUNDED_SEMANTICS],
+                             asp.calculate_grounded_arguments_extensions(input_file))
+            self.assertEqual(all_ext[COMPLETE_SEMANTICS],
+                             asp.calculate_complete_arguments_extensions(input_file))
+            self.assertEqual(all_ext[PREFERRED_SEMANTICS],
+                             asp.calculate_preferred_arguments_extensions(input_file))
+            self.assertEqual(all_ext[IDEAL_SEMANTICS],
+                             asp.calculate_ideal_arguments_extensions(input_file))
+
+            self.assertEqual(all_ext, asp.calculate_all_arguments_extensions(input_file, derivation_limit=0))
+
+            for semantics in [[STABLE_SEMANTICS], [COMPLETE_SEMANTICS, IDEAL_SEMANTICS],
+                              [PREFERRED_SEMANTICS, GROUNDED_SEMANTICS], [IDEAL_SEMANTICS]]:
+                self.assertEqual(asp.calculate_all_arguments_extensions(input_file, semantics=semantics),
+                                 dict((s, all_ext[s]) for s in semantics))
+
+            # the grounded extension needs no solver call, so the input file is not read
+            self.assertEqual(asp.calculate_all_arguments_extensions(self.path("test_missing_input.lp"),
+                                                                    semantics=[GROUNDED_SEMANTICS]),
+                             {GROUNDED_SEMANTICS: all_ext[GROUNDED_SEMANTICS]})
+
+    def test_conclusions_cached_across_semantics(self):
+        a = Sentence("a")
+        b = Sentence("b")
+        c = Sentence("c")
+        assumptions = {a, b, c}
+
+        rules = {Rule({a}, b.contrary()), Rule({b}, c.contrary()), Rule({c}, a.contrary())}
+
+        abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=set())
+
+        asp = ASPARTIX_Interface(abap)
+        asp.generate_input_file_for_clingo(self.path("test_conclusions_cache.lp"))
+
+        closures = []
+        generate_all_deductions = abap.generate_all_deductions
+        def counting_generate_all_deductions(deduce_from):
+            closures.append(frozenset(deduce_from))
+            return generate_all_deductions(deduce_from)
+        abap.generate_all_deductions = counting_generate_all_deductions
+
+        complete_ext = asp.calculate_complete_arguments_extensions(self.path("test_conclusions_cache.lp"))
+        grounded_ext = asp.calculate_grounded_arguments_extensions(self.path("test_conclusions_cache.lp"))
+        preferred_ext = asp.calculate_preferred_arguments_extensions(self.path("test_conclusions_cache.lp"))
+
+        self.assertEqual(complete_ext, {frozenset(): set()})
+        self.assertEqual(grounded_ext, complete_ext)
+        self.assertEqual(preferred_ext, complete_ext)
+        self.assertEqual(closures, [frozenset()])
+
+    def test_ideal_extensions_agree_with_dlv(self):
+        a = Sentence("a")
+        b = Sentence("b")
+        c = Sentence("c")
+        d = Sentence("d")
+        assumptions = {a, b, c, d}
 
+        rule1 = Rule({a}, b.contrary())
+        rule2 = Rule({b}, a.contrary())
+        rule3 = Rule({a}, c.contrary())
+        rule4 = Rule({c}, b.contrary())
+        rule5 = Rule({b}, d.contrary())
+        rules = {rule1, rule2, rule3, rule4, rule5}
+
+        abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=set())
+
+        asp = ASPARTIX_Interface(abap)
+        asp.generate_input_file_for_clingo(self.path("test_ideal_extensions.lp"))
+
+        ideal_ext = asp.calculate_ideal_extensions(self.path("test_ideal_extensions.lp"))
+        dlv_ideal_ext = asp.calculate_extensions(DLV_IDEAL_COMMAND, self.path("test_ideal_extensions.lp"), IDEAL_FILE,
+                                                 DLV_ANSWER, DLV_IDEAL_REGEX)
+        self.assertEqual(ideal_ext, dlv_ideal_ext)
+        self.assertEqual(ideal_ext, {frozenset([a, d])})
+
+    def test_failed_solver_raises(self):
+        missing_input = self.path("test_missing_input.lp")
+        a = Sentence("a")
+        abap = ABA_Plus(assumptions={a}, rules=set(), preferences=set())
+
+        asp = ASPARTIX_Interface(abap)
+        asp.generate_input_file_for_clingo(self.path("test_ideal_extensions.lp"))
+
+        # clingo fails on a missing input file instead of reporting that there is no answer
+        self.assertRaises(SolverFailedException, asp.calculate_ideal_extensions, missing_input)
+        self.assertRaises(SolverFailedException, asp.calculate_ideal_arguments_extensions, missing_input)
+        self.assertRaises(SolverFailedException, asp.calculate_backend_arguments_extensions, ASPARTIX_BACKEND,
+                          STABLE_SEMANTICS, missing_input)
+        self.assertEqual(asp.calculate_ideal_extensions(self.path("test_ideal_extensions.lp")), {frozenset([a])})
+
+
+STUB_SOLVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "iccma_stub_solver.py")
+
+
+class TestSolverBackends(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, filename):
+        """
+        :return: path of filename in the temporary directory of the test
+        """
+        return os.path.join(self.directory, filename)
+
+    def register_backend(self, backend):
+        """
+        register backend for the duration of the test, restoring the module's registry afterwards
+        """
+        if backend.name in backends:
+            self.addCleanup(register_backend, backends[backend.name])
+        else:
+            self.addCleanup(backends.pop, backend.name, None)
+        register_backend(backend)
+
+    def test_graph_lines(self):
+        attacks = [(0, 1), (1, 1)]
+
+        self.assertEqual(list(graph_lines(2, attacks, ASPARTIX_FORMAT)),
+                         ["arg(0).\n", "arg(1).\n", "att(0, 1).\n", "att(1, 1).\n"])
+        self.assertEqual(list(graph_lines(2, attacks, APX_FORMAT)),
+                         ["arg(a0).\n", "arg(a1).\n", "att(a0,a1).\n", "att(a1,a1).\n"])
+        self.assertEqual(list(graph_lines(2, attacks, TGF_FORMAT)),
+                         ["a0\n", "a1\n", "#\n", "a0 a1\n", "a1 a1\n"])
+
+    def test_iccma_parse_output(self):
+        backend = ICCMABackend("parse_test", ["solver"])
+
+        self.assertEqual(backend.parse_output("[[a0,a2],[a1]]\n", COMPLETE_SEMANTICS), [5, 2])
+        self.assertEqual(backend.parse_output("[[]]", PREFERRED_SEMANTICS), [0])
+        self.assertEqual(backend.parse_output("[]", STABLE_SEMANTICS), [])
+        self.assertEqual(backend.parse_output("[a1]", GROUNDED_SEMANTICS), [2])
+        self.assertEqual(backend.parse_output("[]", IDEAL_SEMANTICS), [0])
+        self.assertEqual(backend.parse_output("NO", IDEAL_SEMANTICS), [])
+
+    def test_is_complete_checks_exit_code(self):
+        backend = ICCMABackend("parse_test", ["solver"])
+        self.assertTrue(backend.is_complete("[[a0]]\n", 0))
+        self.assertFalse(backend.is_complete("[[a0]]\n", 1))
+        self.assertFalse(backend.is_complete("", 0))
+
+        backend = AnswerSetBackend("answer_set_test", ["solver"], {}, CLINGO_ANSWER, CLINGO_REGEX)
+        for returncode in CLINGO_EXIT_CODES:
+            self.assertTrue(backend.is_complete("Answer: 1\nin(0)\nSATISFIABLE\n", returncode))
+        self.assertTrue(backend.is_complete("UNSATISFIABLE\n", 20))
+        self.assertFalse(backend.is_complete("Answer: 1\nin(0)\n", 0))
+        self.assertFalse(backend.is_complete("Answer: 1\nin(0)\n", 33))
+        self.assertTrue(backend.is_complete("pyclingo version 5\nAnswer: 1\nin(0)\nSATISFIABLE\n", 0))
+        self.assertFalse(backend.is_complete("pyclingo version 5\n*** ERROR: (pyclingo): parsing failed\nUNKNOWN\n", 0))
+
+    def test_portfolio_ignores_failed_exit_code(self):
+        open(self.path("test_portfolio_failed.apx"), "w").close()
+        self.register_backend(ICCMABackend("crashing", [sys.executable, "-c", "print('[]'); raise SystemExit(1)"]))
+
+        portfolio = Portfolio(["crashing"])
+        self.assertRaises(PortfolioFailedException, portfolio.solve_masks,
+                          {APX_FORMAT: self.path("test_portfolio_failed.apx")}, STABLE_SEMANTICS)
+
+    def test_unknown_backend(self):
+        self.assertRaises(UnknownBackendException, get_backend, "no_such_backend")
+
+    def test_solver_backend_is_abstract(self):
+        self.assertRaises(TypeError, SolverBackend, "abstract", ["solver"], ICCMA_TASKS, APX_FORMAT)
+
+    def test_iccma_stub_backend_agrees_with_aspartix(self):
+        a = Sentence("a")
+        b = Sentence("b")
+        c = Sentence("c")
+        d = Sentence("d")
+        assumptions = {a, b, c, d}
+
+        rule1 = Rule({a}, b.contrary())
+        rule2 = Rule({b}, a.contrary())
+        rule3 = Rule({a}, c.contrary())
+        rule4 = Rule({c}, b.contrary())
+        rules = {rule1, rule2, rule3, rule4}
+
+        pref = Preference(c, b, LESS_THAN)
+        preferences = {pref}
+
+        abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=preferences)
+
+        asp = ASPARTIX_Interface(abap)
+        asp.generate_input_file_for_clingo(self.path("test_backends.lp"))
+        all_ext = asp.calculate_all_arguments_extensions(self.path("test_backends.lp"))
+
+        for input_format in [APX_FORMAT, TGF_FORMAT]:
+            self.register_backend(ICCMABackend("stub", [sys.executable, STUB_SOLVER,
+                                                        "-p", "{task}", "-f", "{input}", "-fo", "{format}"],
+                                               input_format))
+            asp.export_attack_graph(self.path("test_backends." + input_format), input_format)
+
+            for semantics in [STABLE_SEMANTICS, GROUNDED_SEMANTICS, COMPLETE_SEMANTICS,
+                              PREFERRED_SEMANTICS, IDEAL_SEMANTICS]:
+                self.assertEqual(asp.calculate_backend_arguments_extensions("stub", semantics,
+                                                                            self.path("test_backends." + input_format)),
+                                 all_ext[semantics])
+
+        self.assertEqual(asp.calculate_backend_arguments_extensions(ASPARTIX_BACKEND, STABLE_SEMANTICS,
+                                                                    self.path("test_backends.lp")),
+                         all_ext[STABLE_SEMANTICS])
+        self.assertEqual(asp.calculate_backend_arguments_extensions(DLV_BACKEND, IDEAL_SEMANTICS,
+                                                                    self.path("test_backends.lp")),
+                         all_ext[IDEAL_SEMANTICS])
+
+    def test_portfolio_takes_first_complete_answer(self):
+        a = Sentence("a")
+        b = Sentence("b")
+        assumptions = {a, b}
+
+        rule = Rule({a}, b.contrary())
+        rules = {rule}
+
+        abap = ABA_Plus(assumptions=assumptions, rules=rules, preferences=set())
+
+        asp = ASPARTIX_Interface(abap)
+        asp.generate_input_file_for_clingo(self.path("test_portfolio.lp"))
+        asp.export_attack_graph(self.path("test_portfolio.apx"), APX_FORMAT)
+        input_files = {ASPARTIX_FORMAT: self.path("test_portfolio.lp"), APX_FORMAT: self.path("test_portfolio.apx")}
+
+        self.register_backend(ICCMABackend("sleeping", [sys.executable, "-c", "import time; time.sleep(60)"]))
+        self.register_backend(ICCMABackend("failing", [sys.executable, "-c", "pass"]))
+        self.register_backend(ICCMABackend("stub", [sys.executable, STUB_SOLVER,
+                                                    "-p", "{task}", "-f", "{input}", "-fo", "{format}"]))
+
+        portfolio = Portfolio(["sleeping", "failing", "stub", ASPARTIX_BACKEND])
+
+        start = time.time()
+        for _ in range(0, 3):
+            stable_ext = asp.calculate_portfolio_arguments_extensions(portfolio, STABLE_SEMANTICS, input_files)
+            self.assertEqual(stable_ext, {frozenset({a}): {a, b.contrary()}})
+        self.assertLess(time.time() - start, 30)
+
+        stats = portfolio.stats[STABLE_SEMANTICS]
+        self.assertEqual(stats["sleeping"].wins, 0)
+        self.assertEqual(stats["failing"].wins, 0)
+        self.assertEqual(stats["stub"].wins + stats[ASPARTIX_BACKEND].wins, 3)
+        self.assertEqual(stats["stub"].races, 3)
+        self.assertNotIn("sleeping", portfolio.order(STABLE_SEMANTICS)[:1])
+
+    def test_portfolio_fails_without_complete_answer(self):
+        open(self.path("test_portfolio_failed.apx"), "w").close()
+        self.register_backend(ICCMABackend("failing", [sys.executable, "-c", "pass"]))
+        self.register_backend(ICCMABackend("sleeping", [sys.executable, "-c", "import time; time.sleep(60)"]))
+
+        portfolio = Portfolio(["failing"])
+        self.assertRaises(PortfolioFailedException, portfolio.solve_masks,
+                          {APX_FORMAT: self.path("test_portfolio_failed.apx")}, STABLE_SEMANTICS)
+
+        portfolio = Portfolio(["sleeping"])
+        self.assertRaises(PortfolioFailedException, portfolio.solve_masks,
+                          {APX_FORMAT: self.path("test_portfolio_failed.apx")}, STABLE_SEMANTICS, 1)
+        self.assertEqual(portfolio.stats[STABLE_SEMANTICS]["sleeping"].races, 1)
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_put_and_get(self):
+        cache = ResultCache(self.directory)
+
+        self.assertIsNone(cache.get("abc"))
+        cache.put("abc", {'value': {1, 2}})
+        self.assertEqual(cache.get("abc"), {'value': {1, 2}})
+
+    def test_least_recently_used_evicted(self):
+        cache = ResultCache(self.directory)
+        cache.put("first", "x" * 1000)
+        cache.put("second", "y" * 1000)
+        entry_size = os.path.getsize(os.path.join(self.directory, "first" + CACHE_FILE_EXTENSION))
+
+        os.utime(os.path.join(self.directory, "first" + CACHE_FILE_EXTENSION), (0, 0))
+        os.utime(os.path.join(self.directory, "second" + CACHE_FILE_EXTENSION), (1, 1))
+        cache.get("first")
+
+        cache.max_bytes = 2 * entry_size
+        cache.put("third", "z" * 1000)
+
+        self.assertEqual(cache.get("first"), "x" * 1000)
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual(cache.get("third"), "z" * 1000)
+
+    def test_framework_key_ignores_order_and_whitespace(self):
+        input1 = "myAsm(a).\nmyAsm(b).\ncontrary(a, x).\nmyRule(x, [b])."
+        input2 = "myRule(x,[ b ]).  contrary(a,x).\r\nmyAsm(b). myAsm(a).\n"
+
+        self.assertEqual(framework_key(input1), framework_key(input2))
+        self.assertNotEqual(framework_key(input1), framework_key(input1, auto_WCP=True))
+        self.assertNotEqual(framework_key(input1), framework_key(input1 + "myAsm(c)."))
+
+    def test_framework_key_ignores_comments_and_keeps_token_boundaries(self):
+        self.assertEqual(framework_key("myAsm(a). % comment\nmyAsm(b)."), framework_key("myAsm(a). myAsm(b)."))
+        # the declaration myAsm(b) is commented out in the second input
+        self.assertNotEqual(framework_key("myAsm(a). %x\nmyAsm(b)."), framework_key("myAsm(a). %xmyAsm(b)."))
+        self.assertNotEqual(framework_key("myAsm(a b)."), framework_key("myAsm(ab)."))
+
+    def test_compute_framework_cached(self):
+        cache = ResultCache(self.directory)
+        f = open("unit_tests_example6_input.pl")
+        input_string = f.read()
+        f.close()
+
+        computed = compute_framework_cached(input_string, False, cache)
+        cached = compute_framework_cached(input_string, False, cache)
+
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        self.assertEqual(cached['abap'].rules, computed['abap'].rules)
+        self.assertEqual(cached['attacks'], computed['attacks'])
+        self.assertEqual(cached['extensions'], computed['extensions'])
+
+        a = Sentence("a", False)
+        b = Sentence("b", False)
+        c = Sentence("c", False)
+        self.assertEqual(set(cached['extensions'][STABLE_SEMANTICS]), {frozenset([a, b]), frozenset([b, c])})
+        self.assertEqual(set(cached['extensions'][GROUNDED_SEMANTICS]), {frozenset([b])})
+
+    def test_compute_framework_progress(self):
+        cache = ResultCache(self.directory)
+        input_string = "myAsm(a). myAsm(b). myAsm(c). contrary(a, x). contrary(b, y). " \
+                       "myRule(x, [b]). myRule(y, [c]). myPrefLT(b, c)."
+
+        for _ in range(2):
+            # computed the first time, read from the cache the second time
+            reported = []
+            result = compute_framework_cached(input_string, False, cache,
+                                              progress=lambda stage, value: reported.append((stage, value)))
+
+            stages = [stage for stage, _ in reported]
+            self.assertEqual(stages[:2], [FRAMEWORK_STAGE, GROUNDED_SEMANTICS])
+            self.assertEqual(set(stages), {FRAMEWORK_STAGE} | set(REPORTED_SEMANTICS))
+            self.assertEqual(len(stages), 6)
+            self.assertEqual(reported[0][1]['attacks'], result['attacks'])
+            self.assertNotIn('extensions', reported[0][1])
+            for stage, value in reported[1:]:
+                self.assertEqual(value, result['extensions'][stage])
+
+    def test_compute_framework_cached_semantics(self):
+        cache = ResultCache(self.directory)
+        input_string = "myAsm(a). myAsm(b). myAsm(c). contrary(a, x). contrary(b, y). " \
+                       "myRule(x, [b]). myRule(y, [c]). myPrefLT(b, c)."
+
+        computed = compute_framework_cached(input_string, False, cache,
+                                            semantics=[GROUNDED_SEMANTICS, STABLE_SEMANTICS])
+        self.assertEqual(set(computed['extensions']), {GROUNDED_SEMANTICS, STABLE_SEMANTICS})
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+        complete = compute_framework_cached(input_string, False, cache)
+        self.assertEqual(set(complete['extensions']), set(REPORTED_SEMANTICS))
+        self.assertEqual(complete['extensions'][STABLE_SEMANTICS], computed['extensions'][STABLE_SEMANTICS])
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+        # the results of all semantics are reused for any semantics
+        ideal = compute_framework_cached(input_string, False, cache, semantics=[IDEAL_SEMANTICS])
+        self.assertEqual(ideal['extensions'][IDEAL_SEMANTICS], complete['extensions'][IDEAL_SEMANTICS])
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_compute_framework_cached_rename_invariant(self):
+        cache = ResultCache(self.directory)
+        input1 = "myAsm(a). myAsm(b). myAsm(c). contrary(a, x). contrary(b, y). " \
+                 "myRule(x, [b]). myRule(y, [c]). myPrefLT(b, c)."
+        input2 = "myAsm(p). myAsm(q). myAsm(r). contrary(p, u). contrary(q, v). " \
+                 "myRule(u, [q]). myRule(v, [r]). myPrefLT(q, r)."
+
+        compute_framework_cached(input1, False, cache, rename_invariant=True)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+        translated = compute_framework_cached(input2, False, cache, rename_invariant=True)
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+
+        computed = compute_framework(input2)
+        self.assertEqual(translated['abap'].rules, computed['abap'].rules)
+        self.assertEqual(translated['contr_map'], {"p": "u", "q": "v"})
+        self.assertEqual(translated['attacks'], computed['attacks'])
+        self.assertEqual(translated['extensions'], computed['extensions'])
+
+
+class TestABAPFingerprint(unittest.TestCase):
+    def setUp(self):
+        a = Sentence("a")
+        b = Sentence("b")
+        c = Sentence("c")
+        d = Sentence("d")
+        self.framework = (a, b, c, d)
+
+    def build(self, a, b, c, d):
+        assumptions = {a, b, c}
+        rules = {Rule({a, c}, b.contrary()), Rule({b}, d), Rule({d}, a.contrary())}
+        preferences = {Preference(a, b, LESS_THAN)}
+        return ABA_Plus(assumptions=assumptions, rules=rules, preferences=preferences)
+
+    def test_fingerprint_exact(self):
+        a, b, c, d = self.framework
+        abap = self.build(a, b, c, d)
+
+        digest, renaming = fingerprint(abap)
+        self.assertEqual(renaming, {"a": "a", "b": "b", "c": "c", "d": "d"})
+        self.assertEqual(digest, fingerprint(self.build(a, b, c, d))[0])
+        self.assertNotEqual(digest, fingerprint(self.build(Sentence("e"), b, c, d))[0])
+
+    def test_fingerprint_rename_invariant(self):
+        a, b, c, d = self.framework
+        abap = self.build(a, b, c, d)
+        renamed = self.build(Sentence("x"), Sentence("y"), Sentence("z"), Sentence("w"))
+
+        digest, renaming = fingerprint(abap, rename_invariant=True)
+        renamed_digest, renamed_renaming = fingerprint(renamed, rename_invariant=True)
+
+        self.assertEqual(digest, renamed_digest)
+        self.assertNotEqual(fingerprint(abap)[0], fingerprint(renamed)[0])
+        self.assertEqual(renamed_renaming["x"], renaming["a"])
+        self.assertEqual(renamed_renaming["w"], renaming["d"])
+
+    def test_fingerprint_distinguishes_frameworks(self):
+        a, b, c, d = self.framework
+        abap = self.build(a, b, c, d)
+        other = self.build(a, b, c, d)
+        other.rules.add(Rule({c}, d))
+
+        self.assertNotEqual(fingerprint(abap, rename_invariant=True)[0],
+                            fingerprint(other, rename_invariant=True)[0])
+
+    def test_fingerprint_breaks_ties_of_colour_refinement(self):
+        def cycle(symbols):
+            # every assumption attacks the next one, so colour refinement gives all of them the same colour
+            sentences = [Sentence(symbol) for symbol in symbols]
+            rules = set(Rule({sentences[i]}, sentences[(i + 1) % len(sentences)].contrary())
+                        for i in range(0, len(sentences)))
+            return ABA_Plus(assumptions=set(sentences), rules=rules, preferences=set())
+
+        digest = fingerprint(cycle(["a", "b", "c", "d", "e", "f"]), rename_invariant=True)[0]
+        self.assertEqual(fingerprint(cycle(["a", "c", "e", "b", "f", "d"]), rename_invariant=True)[0], digest)
+        self.assertNotEqual(fingerprint(cycle(["a", "b", "c", "d", "e"]), rename_invariant=True)[0], digest)
+
+        # without individualisations, ties are broken by the original symbols
+        abap = cycle(["a", "c", "e", "b", "f", "d"])
+        symbols = framework_symbols(abap)
+        self.assertEqual(canonical_renaming(abap, symbols, 0),
+                         dict((symbol, CANONICAL_SYMBOL.format(idx)) for idx, symbol in enumerate(sorted(symbols))))
+
+    def test_rename_sentences(self):
+        a, b, c, d = self.framework
+        abap = self.build(a, b, c, d)
+        renaming = fingerprint(abap, rename_invariant=True)[1]
+
+        renamed = rename_sentences(abap, renaming)
+        self.assertIsInstance(renamed, ABA_Plus)
+        self.assertEqual(rename_sentences(renamed, invert_renaming(renaming)).rules, abap.rules)
+        self.assertEqual(rename_sentences(renamed, invert_renaming(renaming)).preferences, abap.preferences)
+        self.assertEqual(rename_sentences({frozenset([a]): {a, b.contrary()}}, {"a": "x", "b": "y"}),
+                         {frozenset([Sentence("x")]): {Sentence("x"), Sentence("y", True)}})
+
+
+class TestSessionResultStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "results.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_set_and_get(self):
+        store = SessionResultStore(self.path)
+        a = Sentence("a")
+        store["session"] = {'extension': {frozenset([a]): {a}}}
+
+        self.assertEqual(store["session"], {'extension': {frozenset([a]): {a}}})
+        self.assertEqual(SessionResultStore(self.path)["session"], {'extension': {frozenset([a]): {a}}})
+        self.assertRaises(KeyError, lambda: store["other_session"])
+        self.assertNotIn("other_session", store)
+
+        del store["session"]
+        self.assertIsNone(store.get("session"))
+
+    def test_expired_results_removed(self):
+        store = SessionResultStore(self.path, ttl=-1)
+        store["session"] = "result"
+
+        self.assertRaises(KeyError, lambda: store["session"])
+
+    def test_least_recently_accessed_evicted(self):
+        store = SessionResultStore(self.path)
+        store["first"] = os.urandom(1000)
+        store["second"] = os.urandom(1000)
+        store["first"]
+
+        store.max_bytes = 2500
+        store["third"] = os.urandom(1000)
+
+        self.assertIn("first", store)
+        self.assertNotIn("second", store)
+        self.assertIn("third", store)
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "jobs.sqlite3")
+        self.cache = ResultCache(os.path.join(self.directory, "cache"))
+        self.queues = []
+
+    def tearDown(self):
+        # the watcher threads must record the outcome of the jobs before their database is removed
+        for queue in self.queues:
+            queue.close()
+        shutil.rmtree(self.directory)
+
+    def job_queue(self, **kwargs):
+        queue = JobQueue(self.path, self.cache, **kwargs)
+        self.queues.append(queue)
+        return queue
+
+    def test_job_computed(self):
+        queue = self.job_queue()
+        input_string = "myAsm(a). myAsm(b). myAsm(c). contrary(a, x). contrary(b, y). " \
+                       "myRule(x, [b]). myRule(y, [c]). myPrefLT(b, c)."
+        job_id = queue.submit(input_string)
+
+        self.assertEqual(queue.wait(job_id, timeout=60), DONE)
+        computed = compute_framework(input_string)
+        result = queue.result(job_id)
+        self.assertEqual(result['attacks'], computed['attacks'])
+        self.assertEqual(result['extensions'], computed['extensions'])
+
+    def test_job_progress(self):
+        queue = self.job_queue()
+        job_id = queue.submit("myAsm(a). myAsm(b). contrary(a, x). myRule(x, [b]).")
+        self.assertEqual(queue.wait(job_id, timeout=60), DONE)
+
+        progress = queue.progress(job_id)
+        self.assertEqual([stage for _, stage, _ in progress][:2], [FRAMEWORK_STAGE, GROUNDED_SEMANTICS])
+        self.assertEqual(len(progress), 6)
+        self.assertEqual(progress[1][2], queue.result(job_id)['extensions'][GROUNDED_SEMANTICS])
+        self.assertEqual(queue.progress(job_id, after=progress[-2][0]), progress[-1:])
+
+    def test_job_stores_snapshot(self):
+        snapshots = SnapshotStore(os.path.join(self.directory, "snapshots"))
+        queue = self.job_queue(snapshots=snapshots)
+        input_string = "myAsm(a). myAsm(b). contrary(a, x). myRule(x, [b])."
+        job_id = queue.submit(input_string)
+        self.assertEqual(queue.wait(job_id, timeout=60), DONE)
+
+        framework = queue.progress(job_id)[0][2]
+        self.assertEqual(set(framework), {'contr_map', 'rules_added', 'snapshot_key'})
+        self.assertEqual(framework['snapshot_key'], framework_key(input_string))
+        snapshot = snapshots.open(framework['snapshot_key'])
+        self.assertEqual(len(snapshot.attackers), len(queue.result(job_id)['attacks']))
+        snapshot.close()
+        self.assertEqual(queue.input(job_id), (input_string, False))
+        self.assertRaises(KeyError, queue.input, "unknown")
+
+    def test_old_jobs_removed(self):
+        queue = self.job_queue(retention=-1)
+        job_id = queue.submit("myAsm(a).")
+        self.assertEqual(queue.wait(job_id, timeout=60), DONE)
+
+        other_job_id = queue.submit("myAsm(b).")
+        self.assertRaises(KeyError, queue.state, job_id)
+        self.assertEqual(queue.progress(job_id), [])
+        queue.wait(other_job_id, timeout=60)
+
+    def test_job_failed(self):
+        queue = self.job_queue()
+        job_id = queue.submit("myAsm(a). myAsm(b). contrary(a, x). myRule(x, [b]). myPrefLT(b, a).")
+
+        self.assertEqual(queue.wait(job_id, timeout=60), FAILED)
+        self.assertRaises(WCPViolationException, queue.result, job_id)
+
+    def test_dead_job_not_counted_as_running(self):
+        queue = self.job_queue(max_workers=1)
+        dead_job_id = queue.submit("myAsm(a).")
+        self.assertEqual(queue.wait(dead_job_id, timeout=60), DONE)
+        process = subprocess.Popen([sys.executable, "-c", ""])
+        process.wait()
+        # as if the process of the job had been killed before recording its result
+        connection = sqlite3.connect(self.path)
+        connection.execute("UPDATE jobs SET state = ?, pid = ? WHERE id = ?", (RUNNING, process.pid, dead_job_id))
+        connection.commit()
+        connection.close()
+
+        job_id = queue.submit("myAsm(b).")
+        self.assertEqual(queue.wait(job_id, timeout=60), DONE)
+        self.assertRaises(JobFailedException, queue.result, dead_job_id)
+
+    def test_queued_job_cancelled(self):
+        queue = self.job_queue(max_workers=0)
+        job_id = queue.submit("myAsm(a).")
+
+        self.assertEqual(queue.state(job_id), QUEUED)
+        self.assertRaises(JobNotFinishedException, queue.result, job_id)
+        queue.cancel(job_id)
+        self.assertEqual(queue.state(job_id), CANCELLED)
+
+        queue.max_workers = 1
+        queue.dispatch()
+        self.assertEqual(queue.state(job_id), CANCELLED)
+        self.assertRaises(KeyError, queue.state, "unknown")
+
+    def test_queued_jobs_started_in_order(self):
+        queue = self.job_queue(max_workers=0)
+        first = queue.submit("myAsm(a).")
+        second = queue.submit("myAsm(b).")
+
+        queue.max_workers = 1
+        queue.dispatch()
+        self.assertNotEqual(queue.state(first), QUEUED)
+        self.assertEqual(queue.wait(first, timeout=60), DONE)
+        self.assertEqual(queue.wait(second, timeout=60), DONE)
+
+
+class TestABAPBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.queue = JobQueue(os.path.join(self.directory, "jobs.sqlite3"),
+                              ResultCache(os.path.join(self.directory, "cache")))
+
+    def tearDown(self):
+        self.queue.close()
+        shutil.rmtree(self.directory)
+
+    def test_parse_batch_request(self):
+        frameworks, semantics, max_extensions, timeout = parse_batch_request(
+            {'frameworks': ["myAsm(a).", {'id': "b", 'input': "myAsm(b).", 'auto_WCP': True}],
+             'semantics': [GROUNDED_SEMANTICS], 'max_extensions': 1})
+        self.assertEqual(frameworks, [(0, "myAsm(a).", False), ("b", "myAsm(b).", True)])
+        self.assertEqual(semantics, [GROUNDED_SEMANTICS])
+        self.assertEqual(max_extensions, 1)
+        self.assertIsNone(timeout)
+
+        self.assertEqual(parse_batch_request({'framework': "myAsm(a)."})[0], [(0, "myAsm(a).", False)])
+        self.assertRaises(BatchRequestException, parse_batch_request, [])
+        self.assertRaises(BatchRequestException, parse_batch_request, {'frameworks': [1]})
+        self.assertRaises(BatchRequestException, parse_batch_request,
+                          {'framework': "myAsm(a).", 'semantics': ["unknown"]})
+        self.assertRaises(BatchRequestException, parse_batch_request, {'framework': "myAsm(a).", 'timeout': 0})
+        self.assertRaises(BatchRequestException, parse_batch_request, {'framework': "myAsm(a).", 'timeout': True})
+        self.assertRaises(BatchRequestException, parse_batch_request,
+                          {'framework': "myAsm(a).", 'max_extensions': True})
+
+    def test_compute_batch(self):
+        frameworks = [("first", "myAsm(a). myAsm(b). contrary(a, x). contrary(b, y). "
+                                "myRule(x, [b]). myRule(y, [a]).", False),
+                      ("second", "myAsm(a). myAsm(b). contrary(a, x). myRule(x, [b]). myPrefLT(b, a).", False),
+                      ("third", "myAsm(a). myAsm(b). contrary(a, x). myRule(x, [b]). myPrefLT(b, a).", True)]
+        res = compute_batch(self.queue, frameworks, [STABLE_SEMANTICS, GROUNDED_SEMANTICS], max_extensions=1,
+                            timeout=60)
+
+        self.assertEqual([r['id'] for r in res], ["first", "second", "third"])
+
+        self.assertEqual(res[0]['state'], DONE)
+        self.assertIsNone(res[0]['rules_added'])
+        self.assertEqual(res[0]['attacks'], [[["a"], ["b"], NORMAL_ATK], [["b"], ["a"], NORMAL_ATK]])
+        self.assertEqual(set(res[0]['extensions']), {STABLE_SEMANTICS, GROUNDED_SEMANTICS})
+        self.assertEqual(res[0]['extensions'][GROUNDED_SEMANTICS], [[[], []]])
+        self.assertEqual(res[0]['extensions'][STABLE_SEMANTICS], [[["a"], ["a", "y"]]])
+        self.assertEqual(res[0]['truncated'], [STABLE_SEMANTICS])
+
+        self.assertEqual(res[1]['state'], FAILED)
+        self.assertEqual(res[1]['error']['type'], "WCPViolationException")
+
+        self.assertEqual(res[2]['state'], DONE)
+        self.assertEqual(res[2]['rules_added'], [["~b", ["a"]]])
+
+        # only the requested semantics are calculated
+        result = self.queue.cache.get(framework_key(frameworks[0][1], False, [STABLE_SEMANTICS, GROUNDED_SEMANTICS]))
+        self.assertEqual(set(result['extensions']), {STABLE_SEMANTICS, GROUNDED_SEMANTICS})
+
+        json.dumps(res)
+
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, "corpus", "nested"))
+        self.first = os.path.join(self.directory, "corpus", "first.pl")
+        self.second = os.path.join(self.directory, "corpus", "nested", "second.pl")
+        shutil.copy("unit_tests_example6_input.pl", self.first)
+        f = open(self.second, 'w')
+        f.write("myAsm(a). myAsm(b). contrary(a, x). myRule(x, [b]). myPrefLT(b, a).")
+        f.close()
+        f = open(os.path.join(self.directory, "corpus", "notes.txt"), 'w')
+        f.write("not a framework")
+        f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read_records(self, filename):
+        f = open(filename)
+        records = [json.loads(line) for line in f]
+        f.close()
+        return dict((record['file'], record) for record in records)
+
+    def test_collect_files(self):
+        self.assertEqual(collect_files([os.path.join(self.directory, "corpus"), self.first]),
+                         sorted([self.first, self.second]))
+
+    def test_run_and_resume(self):
+        output_filename = os.path.join(self.directory, "results.jsonl")
+        output = open(output_filename, 'a')
+        self.assertEqual(run([os.path.join(self.directory, "corpus")], output, workers=2), 2)
+        output.close()
+
+        records = self.read_records(output_filename)
+        self.assertEqual(records[self.first]['state'], DONE)
+        self.assertEqual(records[self.first]['extensions'][GROUNDED_SEMANTICS], [[["b"], ["b"]]])
+        self.assertGreater(records[self.first]['attack_count'], 0)
+        self.assertEqual(set(records[self.first]['timings']), {'parse', 'arguments', 'extensions', 'total'})
+        self.assertEqual(records[self.second]['state'], FAILED)
+        self.assertEqual(records[self.second]['error']['type'], "WCPViolationException")
+
+        # an interrupted run leaves an incomplete last line, which is discarded
+        f = open(output_filename, 'a')
+        f.write('{"file": "')
+        f.close()
+        finished = read_finished(output_filename)
+        self.assertEqual(finished, {self.first, self.second})
+
+        output = open(output_filename, 'a')
+        self.assertEqual(run([os.path.join(self.directory, "corpus")], output, finished), 0)
+        output.close()
+        self.assertEqual(len(self.read_records(output_filename)), 2)
+
+    def test_timeout(self):
+        large = os.path.join(self.directory, "large.pl")
+        f = open(large, 'w')
+        n = 120
+        for i in range(0, n):
+            f.write("myAsm(a{0}). contrary(a{0}, c{0}). myRule(c{0}, [a{1}, a{2}]).\n".format(i, (i + 1) % n,
+                                                                                           (i + 7) % n))
+        f.close()
+
+        output_filename = os.path.join(self.directory, "results.jsonl")
+        output = open(output_filename, 'a')
+        run([large, self.first], output, workers=2, timeout=0.05)
+        output.close()
+
+        records = self.read_records(output_filename)
+        self.assertEqual(records[large]['error']['type'], TIMEOUT_ERROR)
+
+        self.assertEqual(read_finished(output_filename), {large, self.first})
+        self.assertEqual(read_finished(output_filename, retry_timeouts=True),
+                         set(filename for filename, record in records.items()
+                             if record['state'] == DONE or record['error']['type'] != TIMEOUT_ERROR))
+        self.assertNotIn(large, read_finished(output_filename, retry_timeouts=True))
+
+    def test_invalid_workers(self):
+        self.assertRaises(ValueError, run, [self.first], workers=0)
+        self.assertRaises(SystemExit, main, ["batch_runner.py", "-j", "0", self.first])
+        self.assertRaises(SystemExit, main, ["batch_runner.py", "-t", "0", self.first])
+
+
+class TestABAPCompiled(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "framework" + COMPILED_FILE_EXTENSION)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        abap, contr_map = generate_aba_plus_framework_from_file("unit_tests_example6_input.pl")
+        compile_framework(self.filename, abap, contr_map)
+
+        compiled = CompiledFramework(self.filename)
+        self.assertFalse(compiled.has_arguments)
+        loaded = compiled.aba_plus()
+        self.assertEqual(loaded.assumptions, abap.assumptions)
+        self.assertEqual(loaded.rules, abap.rules)
+        # the preferences are loaded transitively closed
+        self.assertEqual(loaded.preferences, abap.preferences)
+        self.assertEqual(compiled.contr_map(), contr_map)
+        compiled.close()
+
+        loaded, loaded_contr_map = generate_aba_plus_framework_from_file(self.filename)
+        self.assertEqual(loaded.rules, abap.rules)
+        self.assertEqual(loaded_contr_map, contr_map)
+        self.assertEqual(compute_parsed_framework(loaded, loaded_contr_map)['extensions'],
+                         compute_parsed_framework(abap, contr_map)['extensions'])
+
+    def test_round_trip_arguments(self):
+        abap, contr_map = generate_aba_plus_framework("myAsm(a). myAsm(b). myAsm(c). contrary(a, x). "
+                                                      "contrary(b, y). myRule(x, [b, c]). myRule(y, [a]). "
+                                                      "myPrefLE(a, b). myPrefLT(b, c).")
+        abap.check_or_auto_WCP(auto_WCP=True)
+        _, attacks, deductions = abap.generate_arguments_and_attacks_for_contraries()
+        compile_framework(self.filename, abap, contr_map, deductions, attacks)
+
+        compiled = CompiledFramework(self.filename)
+        self.assertTrue(compiled.has_arguments)
+        loaded_deductions = compiled.deductions()
+        self.assertEqual(set(loaded_deductions), set(deductions))
+        self.assertEqual(compiled.attacks(loaded_deductions), attacks)
+        self.assertEqual(compiled.aba_plus().rules, abap.rules)
+        compiled.close()
+
+    def test_graph(self):
+        abap, contr_map = generate_aba_plus_framework("myAsm(a). myAsm(b). myAsm(c). contrary(a, x). "
+                                                      "contrary(b, y). myRule(x, [b, c]). myRule(y, [a]). "
+                                                      "myPrefLT(b, a).")
+        abap.check_or_auto_WCP(auto_WCP=True)
+        _, attacks, deductions = abap.generate_arguments_and_attacks_for_contraries()
+        compile_framework(self.filename, abap, contr_map, deductions, attacks,
+                          lambda premise: ",".join(sorted(sentence.symbol for sentence in premise)))
+
+        compiled = CompiledFramework(self.filename)
+        labels = compiled.node_labels()
+        self.assertEqual(sorted(labels), sorted(set(",".join(sorted(s.symbol for s in ded.premise))
+                                                    for ded in deductions)))
+
+        links = {}
+        for source, target, link_type in zip(compiled.link_sources.tolist(), compiled.link_targets.tolist(),
+                                             compiled.link_types.tolist()):
+            links[(labels[source], labels[target])] = link_type
+        expected = {}
+        for attacker, attackee, attack_type in convert_to_attacks_between_sets(attacks):
+            key = (",".join(sorted(s.symbol for s in attacker)), ",".join(sorted(s.symbol for s in attackee)))
+            expected[key] = expected.get(key, 0) | attack_type
+        self.assertEqual(links, expected)
+
+        a = Sentence("a")
+        c = Sentence("c")
+        within = dict(zip(labels, compiled.nodes_within({a, c, Sentence("unknown")}).tolist()))
+        self.assertTrue(within["a"])
+        self.assertTrue(within["c"])
+        self.assertFalse(within["b,c"])
+
+        bitmap = compiled.membership_bitmap({a, c})
+        self.assertEqual(len(bitmap), (len(labels) + 7) // 8)
+        self.assertEqual([bool(bitmap[i // 8] >> (i % 8) & 1) for i in range(0, len(labels))],
+                         [within[label] for label in labels])
+
+        graph = json.loads(compiled.graph_json())
+        self.assertEqual([node["name"] for node in graph["nodes"]], labels)
+        self.assertEqual(dict(((labels[link["source"]], labels[link["target"]]), link["value"])
+                              for link in graph["links"]), expected)
+        self.assertIs(compiled.graph_json(), compiled.graph_json())
+        compiled.close()
+
+    def test_independent_of_hash_seed(self):
+        compiled_files = []
+        for seed in ["1", "2", "3"]:
+            filename = os.path.join(self.directory, "framework" + seed + COMPILED_FILE_EXTENSION)
+            environment = dict(os.environ, PYTHONHASHSEED=seed)
+            subprocess.check_call([sys.executable, "abap_compiled.py", "unit_tests_example6_input.pl", filename,
+                                   "--arguments", "--auto-WCP"], env=environment,
+                                  cwd=os.path.dirname(os.path.abspath(__file__)))
+            f = open(filename, 'rb')
+            compiled_files.append(f.read())
+            f.close()
+        self.assertEqual(compiled_files[1], compiled_files[0])
+        self.assertEqual(compiled_files[2], compiled_files[0])
+
+    def test_invalid_file(self):
+        f = open(self.filename, 'wb')
+        f.write(b"myAsm(a).")
+        f.close()
+        self.assertRaises(InvalidCompiledFrameworkException, CompiledFramework, self.filename)
+
+        abap, contr_map = generate_aba_plus_framework("myAsm(a).")
+        compile_framework(self.filename, abap, contr_map)
+        compiled = CompiledFramework(self.filename)
+        self.assertRaises(InvalidCompiledFrameworkException, compiled.deductions)
+        compiled.close()
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_put_and_get(self):
+        store = SnapshotStore(self.directory)
+        result = compute_framework("myAsm(a). myAsm(b). contrary(a, x). contrary(b, y). myRule(x, [b]). "
+                                   "myRule(y, [a]).")
+
+        self.assertIsNone(store.get("abc"))
+        store.put("abc", result)
+        snapshot = store.get("abc")
+        self.assertIs(store.get("abc"), snapshot)
+        self.assertEqual(set(snapshot.deductions()), result['deductions'])
+        self.assertEqual(snapshot.attacks(), result['attacks'])
+        self.assertEqual(snapshot.contr_map(), {'x': 'a', 'y': 'b'})
+
+        # another process attaches the same file
+        other = SnapshotStore(self.directory)
+        self.assertEqual(other.get("abc").attacks(), result['attacks'])
+
+        # opened snapshots are independent of the attached ones
+        opened = store.open("abc")
+        self.assertIsNot(opened, snapshot)
+        opened.close()
+        self.assertEqual(snapshot.attacks(), result['attacks'])
+        self.assertIsNone(store.open("unknown"))
+
+    def test_least_recently_attached_detached(self):
+        store = SnapshotStore(self.directory, max_attached=1)
+        result = compute_framework("myAsm(a). contrary(a, x).")
+        store.put("first", result)
+        store.put("second", result)
+
+        first = store.get("first")
+        store.get("second")
+        self.assertNotIn("first", store._attached)
+        self.assertIsNot(store.get("first"), first)
+        # a detached snapshot stays readable while it is used
+        self.assertEqual(first.contr_map(), {'x': 'a'})
+
+    def test_pickled(self):
+        store = SnapshotStore(self.directory, max_attached=2)
+        store.put("abc", compute_framework("myAsm(a). contrary(a, x)."))
+        store.get("abc")
+
+        # e.g. passed to the process of a job started with the spawn method
+        unpickled = pickle.loads(pickle.dumps(store))
+        self.assertEqual(unpickled.max_attached, 2)
+        self.assertEqual(len(unpickled._attached), 0)
+        self.assertEqual(unpickled.get("abc").contr_map(), {'x': 'a'})
+
+    def test_used_by_threads(self):
+        store = SnapshotStore(self.directory, max_attached=1)
+        result = compute_framework("myAsm(a). myAsm(b). contrary(a, x). contrary(b, y). myRule(x, [b]).")
+        keys = ["first", "second", "third"]
+        for key in keys:
+            store.put(key, result)
+        errors = []
+
+        def read(offset):
+            try:
+                for i in range(0, 200):
+                    snapshot = store.get(keys[(i + offset) % len(keys)])
+                    self.assertEqual(snapshot.attacks(), result['attacks'])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=read, args=(offset,)) for offset in range(0, 4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_evicted(self):
+        store = SnapshotStore(self.directory)
+        store.put("abc", compute_framework("myAsm(a). contrary(a, x)."))
+        self.assertIsNotNone(store.get("abc"))
+        SnapshotStore(self.directory).clear()
+        self.assertIsNone(store.get("abc"))
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_generate_framework(self):
+        input_string = generate_framework(12, depth=3, branching=2, cycle_density=0, preference_density=0.5, seed=1)
+        self.assertEqual(input_string, generate_framework(12, depth=3, branching=2, cycle_density=0,
+                                                          preference_density=0.5, seed=1))
+        abap, contr_map = generate_aba_plus_framework(input_string)
+        self.assertEqual(len(abap.assumptions), 12)
+        self.assertEqual(len(contr_map), 12)
+        # a rule for each contrary and each of the 2 layers of intermediate sentences
+        self.assertEqual(len(abap.rules), 36)
+        self.assertTrue(all(len(rule.antecedent) <= 2 for rule in abap.rules))
+
+    def test_acyclic(self):
+        abap, _ = generate_aba_plus_framework(generate_framework(10, depth=2, cycle_density=0))
+        # the contrary of each assumption is only derived from sentences with higher indices
+        def index(sentence):
+            return int(sentence.symbol.split("_")[-1].lstrip("acs"))
+        for rule in abap.rules:
+            self.assertTrue(all(index(sentence) > index(rule.consequent) for sentence in rule.antecedent))
+
+    def test_sweep(self):
+        parameters = dict(DEFAULT_PARAMETERS, assumptions=5)
+        results = sweep(parameters, 'depth', [1, 2], repeat=1, label="test")
+        self.assertEqual([result['parameters']['depth'] for result in results], [1, 2])
+        self.assertEqual(set(results[0]['timings']), set(PHASES))
+        self.assertEqual(results[1]['sizes']['rules'], 10)
+        self.assertEqual(results[0]['label'], "test")
+
+
+class TestSolverBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_read_attack_graph(self):
+        attacks = generate_attack_graph(8, 0.3, seed=2)
+        self.assertEqual(attacks, generate_attack_graph(8, 0.3, seed=2))
+        for input_format in (APX_FORMAT, TGF_FORMAT):
+            filename = os.path.join(self.directory, "graph." + input_format)
+            export_graph(filename, 8, attacks, input_format)
+            self.assertEqual(read_attack_graph(filename, input_format), (8, attacks))
+
+    def test_run(self):
+        filename = os.path.join(self.directory, "graph.apx")
+        export_graph(filename, 3, [(0, 1), (1, 0), (1, 2)], APX_FORMAT)
+        corpus = load_corpus([filename, "unit_tests_example6_input.pl"], generated=False)
+        self.assertEqual([instance.kind for instance in corpus], [GRAPH_KIND, FRAMEWORK_KIND])
+
+        results = run_corpus(corpus, [ASPARTIX_BACKEND], [STABLE_SEMANTICS, GROUNDED_SEMANTICS, IDEAL_SEMANTICS],
+                      repeat=2)
+        # the ASPARTIX backend does not compute ideal extensions
+        self.assertEqual([(result['kind'], result['semantics']) for result in results],
+                         [(GRAPH_KIND, STABLE_SEMANTICS), (GRAPH_KIND, GROUNDED_SEMANTICS),
+                          (FRAMEWORK_KIND, STABLE_SEMANTICS), (FRAMEWORK_KIND, GROUNDED_SEMANTICS)])
+        self.assertEqual(results[0]['extensions'], 2)
+        self.assertEqual(results[3]['extensions'], 1)
+        for result in results:
+            self.assertEqual(result['failures'], 0)
+            self.assertGreater(result['max_rss'], 0)
+            self.assertEqual(set(result['median']), set(RUN_PHASES))
+            self.assertGreaterEqual(result['p95'][TOTAL], result['median'][TOTAL])
+
+    def test_compare(self):
+        def result(instance, latency):
+            return {'instance': instance, 'backend': ASPARTIX_BACKEND, 'semantics': STABLE_SEMANTICS,
+                    'median': {TOTAL: latency}}
+
+        baseline = [result("a", 1.0), result("b", 1.0), result("c", 1.0), result("d", 1.0)]
+        current = [result("a", 1.5), result("b", 0.5), result("c", 1.05), result("e", 1.0)]
+        rows = compare(current, baseline)
+        self.assertEqual([row['status'] for row in rows], [REGRESSION, IMPROVEMENT, UNCHANGED, MISSING, NEW])
+        self.assertAlmostEqual(rows[0]['change'], 0.5)
+        self.assertIn("regression: 1", format_report(rows))
+
+        self.assertEqual(percentile([3, 1, 2, 4], 0.5), 2)
+        self.assertEqual(percentile(list(range(1, 21)), 0.95), 19)
+
+
+class TestStats(unittest.TestCase):
+    input_string = "myAsm(a). myAsm(b). myAsm(c). contrary(a, x). contrary(b, y). " \
+                   "myRule(x, [b]). myRule(y, [c]). myPrefLT(b, c)."
+
+    def test_phases_recorded(self):
+        stats = Stats()
+        result = compute_framework(self.input_string, stats=stats)
+
+        for phase in [PARSE_PHASE, VALIDATION_PHASE, CLOSURE_PHASE, WCP_PHASE, ARGUMENTS_PHASE, ENCODING_PHASE,
+                      SOLVING_PHASE, DECODING_PHASE]:
+            self.assertIn(phase, stats.timers)
+            self.assertGreater(stats.calls[phase], 0)
+        # the deductions are generated again for the encoding
+        self.assertEqual(stats.counters[DEDUCTIONS], 2 * len(result['deductions']))
+        self.assertEqual(stats.counters[PREFERENCES_CLOSED], 1)
+        self.assertGreater(stats.counters[RULES_FIRED], 0)
+        self.assertGreater(stats.counters[SOLVER_CALLS], 0)
+        self.assertGreater(stats.counters[BYTES_WRITTEN], 0)
+        self.assertIn(SOLVING_PHASE, str(stats))
+        self.assertEqual(json.loads(json.dumps(stats.to_dict())), stats.to_dict())
+
+        # the framework returned with the result no longer records into stats
+        self.assertIs(result['abap'].stats, NO_STATS)
+        calls = dict(stats.calls)
+        result['abap'].generate_arguments_and_attacks_for_contraries()
+        self.assertEqual(stats.calls, calls)
+
+    def test_disabled(self):
+        self.assertFalse(NO_STATS)
+        abap, _ = generate_aba_plus_framework(self.input_string)
+        self.assertIs(abap.stats, NO_STATS)
+        with NO_STATS.phase(SOLVING_PHASE):
+            NO_STATS.count(SOLVER_CALLS)
+
+    def test_cache_hits(self):
+        directory = tempfile.mkdtemp()
+        try:
+            cache = ResultCache(directory)
+            compute_framework_cached(self.input_string, cache=cache, stats=Stats())
+
+            stats = Stats()
+            compute_framework_cached(self.input_string, cache=cache, stats=stats)
+            self.assertEqual(stats.counters, {CACHE_HITS: 1})
+            self.assertEqual(stats.timers, {})
+        finally:
+            shutil.rmtree(directory)
+
+    def test_job_stats(self):
+        directory = tempfile.mkdtemp()
+        cache = ResultCache(os.path.join(directory, "cache"))
+        queue = JobQueue(os.path.join(directory, "jobs.sqlite3"), cache, instrument=True)
+        try:
+            job_id = queue.submit(self.input_string)
+            self.assertEqual(queue.wait(job_id, timeout=60), DONE)
+
+            stats = queue.stats(job_id)
+            self.assertIn(SOLVING_PHASE, stats['timers'])
+            self.assertEqual(queue.progress(job_id)[-1][1], STATS_STAGE)
+
+            queue.instrument = False
+            job_id = queue.submit("myAsm(a).")
+            self.assertEqual(queue.wait(job_id, timeout=60), DONE)
+            self.assertIsNone(queue.stats(job_id))
+        finally:
+            queue.close()
+            shutil.rmtree(directory)
+
+    def test_job_memory_budget(self):
+        directory = tempfile.mkdtemp()
+        cache = ResultCache(os.path.join(directory, "cache"))
+        queue = JobQueue(os.path.join(directory, "jobs.sqlite3"), cache, profile_memory=True, memory_budget=1024)
+        try:
+            job_id = queue.submit(self.input_string)
+            self.assertEqual(queue.wait(job_id, timeout=60), FAILED)
+            self.assertRaises(MemoryBudgetExceededException, queue.result, job_id)
+            self.assertIn('memory', queue.stats(job_id))
+        finally:
+            queue.close()
+            shutil.rmtree(directory)
+
+    def test_memory_profile(self):
+        stats = MemoryStats(top_sites=3)
+        try:
+            compute_framework(self.input_string, stats=stats)
+        finally:
+            stats.stop()
+        self.assertFalse(tracemalloc.is_tracing())
+
+        memory = stats.to_dict()['memory']
+        self.assertEqual(set(memory), set(stats.timers))
+        self.assertGreater(memory[PARSE_PHASE]['peak'], 0)
+        self.assertGreater(memory[PARSE_PHASE]['retained'], 0)
+        self.assertLessEqual(len(memory[PARSE_PHASE]['sites']), 3)
+        self.assertTrue(any("abap_parser.py" in site for site, _ in memory[PARSE_PHASE]['sites']))
+        # the arguments are generated again within the encoding
+        self.assertGreaterEqual(memory[ENCODING_PHASE]['peak'], memory[ARGUMENTS_PHASE]['peak'])
+        self.assertIn("peak", str(stats))
+
+    def test_memory_budget(self):
+        stats = MemoryStats(budget=1024, top_sites=0)
+        try:
+            self.assertRaises(MemoryBudgetExceededException, compute_framework, self.input_string, stats=stats)
+        finally:
+            stats.stop()
+        self.assertEqual(stats._stack, [])
+
+        stats = MemoryStats(budget=64 * 1024 * 1024, top_sites=0)
+        try:
+            compute_framework(self.input_string, stats=stats)
+        finally:
+            stats.stop()
+        self.assertEqual(stats.to_dict()['memory'][PARSE_PHASE]['sites'], [])
+
+
+class TestABAPClusters(unittest.TestCase):
+    def test_strongly_connected_components(self):
+        # 0 <-> 1 -> 2 -> 3 -> 2, 4 attacks itself, 5 is isolated
+        sources = [0, 1, 1, 2, 3, 4]
+        targets = [1, 0, 2, 3, 2, 4]
+        self.assertEqual(strongly_connected_components(6, sources, targets), [0, 0, 1, 1, 2, 3])
+
+        # long paths do not exceed the recursion limit
+        n = 5000
+        components = strongly_connected_components(n, list(range(0, n)), list(range(1, n)) + [0])
+        self.assertEqual(set(components), {0})
+
+    def test_summarize_graph(self):
+        labels = ["a", "b", "c", "d"]
+        sources = [0, 1, 0, 2, 3]
+        targets = [1, 0, 2, 3, 1]
+        types = [NORMAL_ATK, NORMAL_ATK, NORMAL_ATK, REVERSE_ATK, REVERSE_ATK]
+        clusters = [0, 0, 1, 1]
+        groups = [3, 3, 3, 2]
+
+        summary = summarize_graph(labels, sources, targets, types, clusters, groups)
+        self.assertEqual(summary["nodes"], [{"name": "a (+1)", "group": 3, "cluster": 0, "size": 2},
+                                            {"name": "c (+1)", "group": 2, "cluster": 1, "size": 2}])
+        links = dict(((link["source"], link["target"]), (link["value"], link["count"]))
+                     for link in summary["links"])
+        self.assertEqual(links, {(0, 0): (NORMAL_ATK, 2), (0, 1): (NORMAL_ATK, 1),
+                                 (1, 1): (REVERSE_ATK, 1), (1, 0): (REVERSE_ATK, 1)})
+
+        expanded = summarize_graph(labels, sources, targets, types, clusters, groups, expanded=[1])
+        self.assertEqual([node.get("node") for node in expanded["nodes"]], [None, 2, 3])
+        self.assertEqual(sum(link["count"] for link in expanded["links"]), len(sources))
+
+    def test_condensation_levels(self):
+        # 0 <-> 1 -> 2 -> 3, 1 -> 3, 4 is isolated
+        self.assertEqual(condensation_levels(5, [0, 1, 1, 2, 1], [1, 0, 2, 3, 3]), [0, 0, 1, 2, 0])
+
+    def test_bound_clusters(self):
+        # a path of 100 nodes without cycles has only clusters of single nodes
+        n = 100
+        sources = list(range(0, n - 1))
+        targets = list(range(1, n))
+        clusters = strongly_connected_components(n, sources, targets)
+        self.assertEqual(len(set(clusters)), n)
+        self.assertIs(bound_clusters(clusters, sources, targets, n), clusters)
+
+        bounded = bound_clusters(clusters, sources, targets, 10)
+        self.assertEqual(len(set(bounded)), 10)
+        self.assertEqual(bounded, sorted(bounded))
+
+        # the cycle 100 <-> 101 is kept, the single nodes are merged into the 4 other clusters
+        clusters = strongly_connected_components(n + 2, sources + [n, n + 1], targets + [n + 1, n])
+        bounded = bound_clusters(clusters, sources + [n, n + 1], targets + [n + 1, n], 5)
+        self.assertEqual(len(set(bounded)), 5)
+        self.assertEqual(bounded[n], bounded[n + 1])
+        self.assertNotIn(bounded[n], bounded[:n])
+
+        # too many cycles are merged as well
+        sources = list(range(0, 20))
+        targets = [i + 1 if i % 2 == 0 else i - 1 for i in range(0, 20)]
+        clusters = strongly_connected_components(20, sources, targets)
+        self.assertEqual(len(set(bound_clusters(clusters, sources, targets, 3))), 1)
+
+    def test_summarize_snapshot(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "framework" + COMPILED_FILE_EXTENSION)
+            result = compute_framework("myAsm(a). myAsm(b). myAsm(c). contrary(a, x). contrary(b, y). "
+                                       "contrary(c, z). myRule(x, [b]). myRule(y, [a]). myRule(z, [a, b]).")
+            compile_framework(filename, result['abap'], dict((c, a) for a, c in result['contr_map'].items()),
+                              result['deductions'], result['attacks'], lambda premise: str(len(premise)))
+            snapshot = CompiledFramework(filename)
+            n_nodes = len(snapshot.node_labels())
+            groups = [1] * n_nodes
+
+            # a and b attack each other, {a, b} attacks c and is attacked by a and b
+            summary = summarize_snapshot(snapshot, SCC_CLUSTERING, groups)
+            self.assertEqual(sorted(node.get("size", 1) for node in summary["nodes"]), [1, 3])
+            self.assertEqual(sum(link["count"] for link in summary["links"]), len(snapshot.link_sources))
+
+            # {a} and {a, b} share the first assumption a
+            summary = summarize_snapshot(snapshot, ASSUMPTION_CLUSTERING, groups)
+            self.assertEqual(sorted(node.get("size", 1) for node in summary["nodes"]), [1, 1, 2])
+            summary = summarize_snapshot(snapshot, ASSUMPTION_CLUSTERING, groups, max_nodes=1)
+            self.assertEqual([node.get("size") for node in summary["nodes"]], [n_nodes])
+            self.assertRaises(ValueError, summarize_snapshot, snapshot, "unknown", groups)
+            snapshot.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestABAPNDJSON(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "framework" + COMPILED_FILE_EXTENSION)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_stream_graph(self):
+        abap, contr_map = generate_aba_plus_framework("myAsm(a). myAsm(b). myAsm(c). contrary(a, x). "
+                                                      "contrary(b, y). myRule(x, [b, c]). myRule(y, [a]). "
+                                                      "myPrefLT(b, a).")
+        abap.check_or_auto_WCP(auto_WCP=True)
+        _, attacks, deductions = abap.generate_arguments_and_attacks_for_contraries()
+        compile_framework(self.filename, abap, contr_map, deductions, attacks,
+                          lambda premise: ",".join(sorted(sentence.symbol for sentence in premise)))
+
+        snapshot = CompiledFramework(self.filename)
+        expected_nodes = list(snapshot.node_labels())
+        expected_links = list(zip(snapshot.link_sources.tolist(), snapshot.link_targets.tolist(),
+                                  snapshot.link_types.tolist()))
+        # small chunks, so that the graph is streamed in several of them
+        chunks = list(stream_graph(snapshot, lambda attacker, attackee, type: "{}>{}".format(attacker, attackee),
+                                   chunk_size=64))
+        self.assertGreater(len(chunks), 1)
+        # the snapshot is closed at the end of the stream
+        self.assertFalse(hasattr(snapshot, "link_sources"))
+
+        records = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual([record["type"] for record in records],
+                         sorted((record["type"] for record in records),
+                                key=[NODE_RECORD, LINK_RECORD, ATTACK_RECORD].index))
+        self.assertEqual([record["name"] for record in records if record["type"] == NODE_RECORD], expected_nodes)
+        self.assertEqual([(record["source"], record["target"], record["value"]) for record in records
+                          if record["type"] == LINK_RECORD], expected_links)
+
+        # the attacks are those between the premises of the deductions
+        attack_records = [record for record in records if record["type"] == ATTACK_RECORD]
+        def label(premise):
+            return ",".join(sorted(sentence.symbol for sentence in premise))
+        self.assertEqual(set((expected_nodes[record["attacker"]], expected_nodes[record["attackee"]],
+                              record["value"]) for record in attack_records),
+                         set((label(attacker), label(attackee), attack_type)
+                             for attacker, attackee, attack_type in convert_to_attacks_between_sets(attacks)))
+        self.assertEqual(attack_records[0]["text"], "{}>{}".format(expected_nodes[attack_records[0]["attacker"]],
+                                                                   expected_nodes[attack_records[0]["attackee"]]))
+
+    def test_no_graph(self):
+        abap, contr_map = generate_aba_plus_framework("myAsm(a).")
+        compile_framework(self.filename, abap, contr_map)
+        snapshot = CompiledFramework(self.filename)
+        self.assertRaises(InvalidCompiledFrameworkException, list, stream_graph(snapshot))
+
+
+class TestABAPListing(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        filename = os.path.join(self.directory, "framework" + COMPILED_FILE_EXTENSION)
+        abap, contr_map = generate_aba_plus_framework("myAsm(a). myAsm(b). myAsm(c). contrary(a, x). "
+                                                      "contrary(b, y). myRule(x, [b, c]). myRule(y, [a]). "
+                                                      "myPrefLT(b, a).")
+        abap.check_or_auto_WCP(auto_WCP=True)
+        _, self.attacks, deductions = abap.generate_arguments_and_attacks_for_contraries()
+        compile_framework(filename, abap, contr_map, deductions, self.attacks,
+                          lambda premise: ",".join(sorted(sentence.symbol for sentence in premise)))
+        self.snapshot = CompiledFramework(filename)
+
+    def tearDown(self):
+        self.snapshot.close()
+        shutil.rmtree(self.directory)
+
+    def labelled(self, attacks):
+        labels = self.snapshot.node_labels()
+        return set((labels[attacker], labels[attackee], attack_type) for attacker, attackee, attack_type in attacks)
+
+    def test_list_attacks(self):
+        def label(premise):
+            return ",".join(sorted(sentence.symbol for sentence in premise))
+        expected = set((label(attacker), label(attackee), attack_type)
+                       for attacker, attackee, attack_type in convert_to_attacks_between_sets(self.attacks))
+
+        total, attacks = list_attacks(self.snapshot, limit=MAX_PAGE_SIZE)
+        self.assertEqual(total, len(expected))
+        self.assertEqual(self.labelled(attacks), expected)
+
+        # the pages are consecutive
+        first_total, first = list_attacks(self.snapshot, 0, 2)
+        _, rest = list_attacks(self.snapshot, 2, MAX_PAGE_SIZE)
+        self.assertEqual(first_total, total)
+        self.assertEqual(first + rest, attacks)
+
+        _, reverse = list_attacks(self.snapshot, limit=MAX_PAGE_SIZE, attack_type=REVERSE_ATK)
+        self.assertEqual(self.labelled(reverse), set(atk for atk in expected if atk[2] == REVERSE_ATK))
+
+        _, with_a = list_attacks(self.snapshot, limit=MAX_PAGE_SIZE, assumption="a")
+        self.assertEqual(self.labelled(with_a), set(atk for atk in expected if "a" in atk[0] or "a" in atk[1]))
+        self.assertEqual(list_attacks(self.snapshot, assumption="unknown"), (0, []))
+
+    def test_list_extensions(self):
+        a = Sentence("a")
+        b = Sentence("b")
+        extension_map = {1: ({a}, {a}, 1), 2: ({b}, {b}, 2), 3: ({a, b}, {a, b}, 2)}
 
+        self.assertEqual(list_extensions(extension_map, extension_type=2),
+                         (2, [(2, {b}, {b}, 2), (3, {a, b}, {a, b}, 2)]))
+        self.assertEqual(list_extensions(extension_map, assumption="a", offset=1), (2, [(3, {a, b}, {a, b}, 2)]))
+        self.assertEqual(list_extensions(extension_map, limit=1)[1], [(1, {a}, {a}, 1)])
 
+        self.assertEqual(parse_page(None, None), (0, DEFAULT_PAGE_SIZE))
+        self.assertEqual(parse_page("5", str(MAX_PAGE_SIZE + 1)), (5, MAX_PAGE_SIZE))
+        self.assertRaises(ValueError, parse_page, "-1", None)
+        self.assertRaises(ValueError, parse_page, "x", None)